@@ -0,0 +1,96 @@
+from collections import defaultdict
+from pathlib import Path
+
+import mido
+from pydantic import BaseModel
+
+from benchmarks.synthetic_video import GroundTruthNote
+from piano_midi.note_events import A0_OFFSET
+
+
+class DetectedNote(BaseModel):
+    key_index: int
+    start: int
+    end: int
+
+
+class Accuracy(BaseModel):
+    expected: int
+    detected: int
+    matched: int
+
+    @property
+    def precision(self) -> float:
+        return self.matched / self.detected if self.detected else 1.0
+
+    @property
+    def recall(self) -> float:
+        return self.matched / self.expected if self.expected else 1.0
+
+    @property
+    def f1(self) -> float:
+        if self.precision + self.recall == 0:
+            return 0.0
+        return 2 * self.precision * self.recall / (self.precision + self.recall)
+
+    def __str__(self) -> str:
+        return (
+            f"Matched {self.matched} of {self.expected} notes, {self.detected} detected "
+            f"(precision {self.precision:.3f}, recall {self.recall:.3f}, f1 {self.f1:.3f})"
+        )
+
+
+def _frames(time_ms: int, fps: float) -> int:
+    # inverse of the delta times of KeySequenceWriter, which truncates
+    # 1000 / fps * frames to whole milliseconds
+    frames = int(time_ms * fps / 1000)
+    while int(1000 / fps * frames) < time_ms:
+        frames += 1
+    return frames
+
+
+def midi_notes(midi_path: Path, fps: float) -> list[DetectedNote]:
+    """Reads the notes of a MIDI file written by KeySequenceWriter, in frames."""
+    notes = []
+    frame = 0
+    started: dict[int, int] = {}
+    for message in mido.MidiFile(midi_path).tracks[0]:
+        if message.is_meta:
+            continue
+        frame += _frames(message.time, fps)
+        key_index = message.note - A0_OFFSET
+        if message.type == "note_on" and message.velocity > 0:
+            started[key_index] = frame
+        elif key_index in started:
+            notes.append(
+                DetectedNote(
+                    key_index=key_index, start=started.pop(key_index), end=frame
+                )
+            )
+    return notes
+
+
+def compare_notes(
+    expected: list[GroundTruthNote],
+    detected: list[DetectedNote],
+    tolerance_frames: int = 0,
+) -> Accuracy:
+    """Matches every expected note with a detected note of the same key.
+
+    Notes match when both their start and end lie within tolerance_frames.
+    """
+    unmatched: dict[int, list[DetectedNote]] = defaultdict(list)
+    for note in detected:
+        unmatched[note.key_index].append(note)
+    matched = 0
+    for expected_note in expected:
+        candidates = unmatched[expected_note.key_index]
+        for candidate in candidates:
+            if (
+                abs(candidate.start - expected_note.start) <= tolerance_frames
+                and abs(candidate.end - expected_note.end) <= tolerance_frames
+            ):
+                candidates.remove(candidate)
+                matched += 1
+                break
+    return Accuracy(expected=len(expected), detected=len(detected), matched=matched)
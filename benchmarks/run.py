@@ -0,0 +1,220 @@
+import contextlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Generator
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from pydantic import BaseModel
+
+from benchmarks.accuracy import Accuracy, compare_notes, midi_notes
+from benchmarks.synthetic_video import (
+    SyntheticVideo,
+    SyntheticVideoConfig,
+    render_synthetic_video,
+)
+from piano_midi.key_press_detector import KeyPressDetector
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from piano_midi.models import KeyColors, KeySegments
+from piano_midi.time_slicer import TimeSlicer
+from piano_midi.video_capture import (
+    VideoBackend,
+    VideoCapture,
+    create_video_capture,
+    is_backend_available,
+)
+
+MAIN_PATH = Path(__file__).parents[1] / "main.py"
+
+
+class StageResult(BaseModel):
+    name: str
+    seconds: float = 0.0
+    frames: int = 0
+    peak_mb: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<16}{self.seconds:>9.3f}s{self.fps:>12.1f} frames/s"
+            f"{self.peak_mb:>10.1f} MB"
+        )
+
+
+class BenchmarkReport(BaseModel):
+    config: SyntheticVideoConfig
+    stages: list[StageResult]
+    accuracy: Accuracy
+
+    def __str__(self) -> str:
+        header = f"{'stage':<16}{'time':>10}{'throughput':>21}{'peak':>13}"
+        return "\n".join(
+            [header, *(str(stage) for stage in self.stages), str(self.accuracy)]
+        )
+
+
+@contextlib.contextmanager
+def measure(name: str, frames: int) -> Generator[StageResult, None, None]:
+    """Times a stage and traces the peak of the memory it allocates."""
+    result = StageResult(name=name, frames=frames)
+    tracemalloc.start()
+    t_start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - t_start
+        result.peak_mb = tracemalloc.get_traced_memory()[1] / 1024**2
+        tracemalloc.stop()
+
+
+def run_command(video: SyntheticVideo, midi_path: Path) -> StageResult:
+    """Runs video-to-midi in a subprocess, its peak memory is the resident set size."""
+    result = StageResult(name="video-to-midi", frames=video.config.num_frames)
+    t_start = time.perf_counter()
+    subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            str(MAIN_PATH),
+            "video-to-midi",
+            "--video-path",
+            str(video.video_path),
+            "--key-segments-path",
+            str(video.key_segments_path),
+            "--colors-path",
+            str(video.colors_path),
+            "--midi-path",
+            str(midi_path),
+            "--quiet",
+        ],
+        check=True,
+    )
+    result.seconds = time.perf_counter() - t_start
+    # ru_maxrss is in kilobytes on Linux, and the maximum over all children
+    result.peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return result
+
+
+def run_benchmark(config: SyntheticVideoConfig, work_dir: Path) -> BenchmarkReport:
+    stages = []
+    with measure("render", config.num_frames) as stage:
+        video = render_synthetic_video(config, work_dir)
+    stages.append(stage)
+    # the last frame is never read
+    num_frames = config.num_frames - 1
+
+    for backend in VideoBackend:
+        if not is_backend_available(backend):
+            continue
+        video_capture = create_video_capture(video.video_path, backend)
+        with measure(f"decode {backend}", num_frames) as stage, video_capture as cap:
+            for _ in cap.read_scanlines(0, None, scan_line_px=config.scan_line_px):
+                pass
+        stages.append(stage)
+
+    with measure("time slice", num_frames) as stage:
+        TimeSlicer(VideoCapture(video.video_path)).generate(
+            frame_start=0, frame_end=None, scan_line_px=config.scan_line_px
+        )
+    stages.append(stage)
+
+    key_sequence_writer = KeySequenceWriter(fps=config.fps, verbosity=Verbosity.QUIET)
+    with measure("detect", num_frames) as stage:
+        KeyPressDetector(
+            video_capture=VideoCapture(video.video_path),
+            key_segments=KeySegments.from_yaml(video.key_segments_path),
+            key_colors=KeyColors.from_yaml(video.colors_path),
+        ).run(
+            key_sequence_writer=key_sequence_writer,
+            scan_line_px=config.scan_line_px,
+            frame_start=0,
+            frame_end=None,
+        )
+    stages.append(stage)
+
+    midi_path = work_dir / "synthetic.mid"
+    with measure("save", num_frames) as stage:
+        key_sequence_writer.save(midi_path)
+    stages.append(stage)
+
+    command_midi_path = work_dir / "command.mid"
+    stages.append(run_command(video, command_midi_path))
+
+    accuracy = compare_notes(video.notes, midi_notes(command_midi_path, config.fps))
+    return BenchmarkReport(config=config, stages=stages, accuracy=accuracy)
+
+
+app = typer.Typer(
+    name="benchmarks",
+    add_completion=False,
+    help="Benchmark the conversion of a synthetic Synthesia video",
+)
+
+
+@app.command()
+def benchmark(
+    *,
+    width: Annotated[int, typer.Option("--width")] = 1280,
+    height: Annotated[int, typer.Option("--height")] = 720,
+    fps: Annotated[float, typer.Option("--fps")] = 30,
+    num_frames: Annotated[
+        int, typer.Option("--num-frames", help="Length of the video in frames")
+    ] = 900,
+    note_density: Annotated[
+        float,
+        typer.Option(
+            "--note-density", help="Probability that a note starts in a frame"
+        ),
+    ] = 0.5,
+    seed: Annotated[int, typer.Option("--seed")] = 0,
+    fourcc: Annotated[
+        str,
+        typer.Option(
+            "--fourcc",
+            help="Codec of the video, e.g. MJPG or the inter frame codec mp4v",
+        ),
+    ] = "MJPG",
+    report_path: Annotated[
+        Path | None,
+        typer.Option("--report", help="JSON file to write the report to"),
+    ] = None,
+    work_dir: Annotated[
+        Path | None,
+        typer.Option(
+            "--work-dir",
+            help="Directory to keep the video and MIDI files in, a temporary directory by default",
+        ),
+    ] = None,
+    min_f1: Annotated[
+        float,
+        typer.Option("--min-f1", help="Fail when the accuracy drops below this f1"),
+    ] = 1.0,
+) -> None:
+    config = SyntheticVideoConfig(
+        width=width,
+        height=height,
+        fps=fps,
+        num_frames=num_frames,
+        note_density=note_density,
+        seed=seed,
+        fourcc=fourcc,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = run_benchmark(config, work_dir or Path(tmp_dir))
+    typer.echo(str(report))
+    if report_path is not None:
+        report_path.write_text(report.model_dump_json(indent=2))
+    if report.accuracy.f1 < min_f1:
+        typer.echo(f"Accuracy below the minimum f1 of {min_f1}", err=True)
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,79 @@
+import statistics
+import subprocess
+import sys
+import time
+from typing import Annotated
+
+import typer
+from pydantic import BaseModel
+
+from benchmarks.run import MAIN_PATH
+
+COMMANDS = [
+    [],
+    ["key-picker"],
+    ["find-key-segments"],
+    ["color-picker"],
+    ["calibrate-colors"],
+    ["video-to-midi"],
+    ["render-midi"],
+    ["batch"],
+]
+
+
+class StartupResult(BaseModel):
+    command: str
+    runs: list[float]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.command:<32}{self.median * 1000:>9.1f} ms"
+            f"{min(self.runs) * 1000:>9.1f} ms"
+        )
+
+
+def time_help(command: list[str], runs: int) -> StartupResult:
+    """Times `main.py <command> --help`, which starts the command line but does no work."""
+    args = [sys.executable, str(MAIN_PATH), *command, "--help"]
+    times = []
+    for _ in range(runs):
+        t_start = time.perf_counter()
+        subprocess.run(args, check=True, stdout=subprocess.DEVNULL)  # noqa: S603
+        times.append(time.perf_counter() - t_start)
+    return StartupResult(command=" ".join(["main.py", *command, "--help"]), runs=times)
+
+
+app = typer.Typer(
+    name="startup",
+    add_completion=False,
+    help="Benchmark the start-up time of the command line",
+)
+
+
+@app.command()
+def startup(
+    *,
+    runs: Annotated[int, typer.Option("--runs", min=1)] = 5,
+    max_ms: Annotated[
+        float | None,
+        typer.Option(
+            "--max-ms", help="Fail when the median start-up of a command is slower"
+        ),
+    ] = None,
+) -> None:
+    results = [time_help(command, runs) for command in COMMANDS]
+    typer.echo(f"{'command':<32}{'median':>12}{'min':>12}")
+    for result in results:
+        typer.echo(str(result))
+    slowest = max(result.median for result in results) * 1000
+    if max_ms is not None and slowest > max_ms:
+        typer.echo(f"Start-up slower than {max_ms} ms", err=True)
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,228 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+from pydantic import BaseModel
+
+from piano_midi.models import (
+    BLACK_KEY_INDICES,
+    NUM_KEYS,
+    WHITE_KEY_INDICES,
+    Hand,
+    HSVRange,
+    KeyColors,
+    KeySegment,
+    KeySegments,
+    Range,
+)
+
+WHITE_KEY_COLOR = (235, 235, 235)
+BLACK_KEY_COLOR = (20, 20, 20)
+BACKGROUND_COLOR = (40, 30, 30)
+HUE_MARGIN = 8
+SATURATION = 200
+VALUE = 220
+FALL_SPEED = 6  # pixels per frame of the falling notes above the keyboard
+
+
+class SyntheticVideoConfig(BaseModel):
+    width: int = 1280
+    height: int = 720
+    fps: float = 30
+    num_frames: int = 900
+    # probability that a note starts in a frame
+    note_density: float = 0.5
+    min_note_frames: int = 3
+    max_note_frames: int = 30
+    # frames a key stays released before it is pressed again
+    min_pause_frames: int = 1
+    # OpenCV hue (0-179) of the pressed keys per hand
+    left_white_hue: int = 30
+    left_black_hue: int = 60
+    right_white_hue: int = 110
+    right_black_hue: int = 150
+    scan_line_px: int = 100
+    fourcc: str = "MJPG"
+    seed: int = 0
+
+
+class GroundTruthNote(BaseModel):
+    key_index: int
+    hand: Hand
+    start: int  # first frame the key is pressed
+    end: int  # first frame the key is released
+
+
+class SyntheticVideo(BaseModel):
+    config: SyntheticVideoConfig
+    video_path: Path
+    key_segments_path: Path
+    colors_path: Path
+    notes: list[GroundTruthNote]
+
+
+def _key_segments(width: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the start and end pixel of every key, ordered by key index."""
+    white_width = width / len(WHITE_KEY_INDICES)
+    starts = np.zeros(NUM_KEYS, dtype=int)
+    ends = np.zeros(NUM_KEYS, dtype=int)
+    for n, key_index in enumerate(WHITE_KEY_INDICES):
+        starts[key_index] = round(n * white_width) + 1
+        ends[key_index] = round((n + 1) * white_width) - 1
+    for key_index in BLACK_KEY_INDICES:
+        # black keys straddle the edge between the white keys around them
+        edge = ends[key_index - 1] + 1
+        half_width = round(white_width * 0.3)
+        starts[key_index] = edge - half_width
+        ends[key_index] = edge + half_width
+    return starts, ends
+
+
+def _bgr(hue: int) -> tuple[int, int, int]:
+    hsv = np.array([[[hue, SATURATION, VALUE]]], dtype=np.uint8)
+    b, g, r = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0]
+    return int(b), int(g), int(r)
+
+
+def _hsv_range(hue: int) -> HSVRange:
+    return HSVRange(
+        h=Range(min=max(hue - HUE_MARGIN, 0), max=min(hue + HUE_MARGIN, 179)),
+        s=Range(min=SATURATION - 80, max=255),
+        v=Range(min=VALUE - 80, max=255),
+    )
+
+
+def generate_notes(config: SyntheticVideoConfig) -> list[GroundTruthNote]:
+    """Draws random notes that a detector can tell apart frame by frame.
+
+    A key is only pressed again after it was released for min_pause_frames,
+    and every note is released before the last frame, which is never read.
+    """
+    rng = np.random.default_rng(config.seed)
+    free_from = np.zeros(NUM_KEYS, dtype=int)
+    notes = []
+    for frame in range(config.num_frames):
+        if rng.random() >= config.note_density:
+            continue
+        key_index = int(rng.integers(NUM_KEYS))
+        end = frame + int(
+            rng.integers(config.min_note_frames, config.max_note_frames + 1)
+        )
+        if free_from[key_index] > frame or end >= config.num_frames - 1:
+            continue
+        hand = Hand.LEFT if key_index < NUM_KEYS // 2 else Hand.RIGHT
+        notes.append(
+            GroundTruthNote(key_index=key_index, hand=hand, start=frame, end=end)
+        )
+        free_from[key_index] = end + config.min_pause_frames
+    return notes
+
+
+def render_synthetic_video(
+    config: SyntheticVideoConfig, output_dir: Path
+) -> SyntheticVideo:
+    """Renders a Synthesia style video together with its key segments and colors."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    starts, ends = _key_segments(config.width)
+    colors = {
+        (Hand.LEFT, False): _bgr(config.left_white_hue),
+        (Hand.LEFT, True): _bgr(config.left_black_hue),
+        (Hand.RIGHT, False): _bgr(config.right_white_hue),
+        (Hand.RIGHT, True): _bgr(config.right_black_hue),
+    }
+    is_black = np.zeros(NUM_KEYS, dtype=bool)
+    is_black[list(BLACK_KEY_INDICES)] = True
+    # the scan line crosses the black keys, the white keys reach further down
+    keyboard_top = config.scan_line_px - 20
+    black_bottom = config.scan_line_px + 10
+
+    keyboard = np.zeros((config.height, config.width, 3), dtype=np.uint8)
+    keyboard[:] = BACKGROUND_COLOR
+    keyboard[keyboard_top:] = WHITE_KEY_COLOR
+    for key_index in WHITE_KEY_INDICES:
+        keyboard[keyboard_top:, ends[key_index]] = BLACK_KEY_COLOR
+    black_columns = np.zeros(config.width, dtype=bool)
+    for key_index in BLACK_KEY_INDICES:
+        black_columns[starts[key_index] : ends[key_index]] = True
+    keyboard[keyboard_top:black_bottom, black_columns] = BLACK_KEY_COLOR
+
+    notes = generate_notes(config)
+    video_path = output_dir / "synthetic.avi"
+    writer = cv2.VideoWriter(
+        str(video_path),
+        cv2.VideoWriter.fourcc(*config.fourcc),
+        config.fps,
+        (config.width, config.height),
+    )
+    black_keys = keyboard[keyboard_top:black_bottom, black_columns]
+    frame = np.zeros_like(keyboard)
+    for frame_num in range(config.num_frames):
+        frame[:] = keyboard
+        pressed = [note for note in notes if note.start <= frame_num < note.end]
+        for note in pressed:
+            if not is_black[note.key_index]:
+                frame[keyboard_top:, starts[note.key_index] : ends[note.key_index]] = (
+                    colors[(note.hand, False)]
+                )
+        # the black keys lie on top of the white keys
+        frame[keyboard_top:black_bottom, black_columns] = black_keys
+        for note in pressed:
+            if is_black[note.key_index]:
+                frame[
+                    keyboard_top:black_bottom,
+                    starts[note.key_index] : ends[note.key_index],
+                ] = colors[(note.hand, True)]
+        _draw_falling_notes(
+            frame, notes, frame_num, starts=starts, ends=ends, keyboard_top=keyboard_top
+        )
+        writer.write(frame)
+    writer.release()
+
+    key_segments = KeySegments(
+        white=[
+            KeySegment(start=int(starts[key_index]), end=int(ends[key_index]))
+            for key_index in WHITE_KEY_INDICES
+        ],
+        black=[
+            KeySegment(start=int(starts[key_index]), end=int(ends[key_index]))
+            for key_index in BLACK_KEY_INDICES
+        ],
+    )
+    key_segments_path = output_dir / "keys.yaml"
+    key_segments.to_yaml(key_segments_path)
+    key_colors = KeyColors(
+        left_white=_hsv_range(config.left_white_hue),
+        left_black=_hsv_range(config.left_black_hue),
+        right_white=_hsv_range(config.right_white_hue),
+        right_black=_hsv_range(config.right_black_hue),
+    )
+    colors_path = output_dir / "colors.yaml"
+    key_colors.to_yaml(colors_path)
+    return SyntheticVideo(
+        config=config,
+        video_path=video_path,
+        key_segments_path=key_segments_path,
+        colors_path=colors_path,
+        notes=notes,
+    )
+
+
+def _draw_falling_notes(
+    frame: np.ndarray,
+    notes: list[GroundTruthNote],
+    frame_num: int,
+    *,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    keyboard_top: int,
+) -> None:
+    # notes fall onto the keyboard above it, which gives the encoder realistic motion
+    for note in notes:
+        bottom = keyboard_top - (note.start - frame_num) * FALL_SPEED
+        top = bottom - (note.end - note.start) * FALL_SPEED
+        if bottom <= 0 or top >= keyboard_top:
+            continue
+        frame[
+            max(top, 0) : min(bottom, keyboard_top),
+            starts[note.key_index] : ends[note.key_index],
+        ] = (200, 200, 200)
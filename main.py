@@ -1,15 +1,68 @@
 from pathlib import Path
-from typing import Annotated, cast
+from typing import TYPE_CHECKING, Annotated, cast
 
 import typer
 
-from piano_midi.color_picker import ColorPicker
-from piano_midi.key_picker import KeyPicker
-from piano_midi.key_press_detector import KeyPressDetector
-from piano_midi.key_sequence_writer import KeySequenceWriter
-from piano_midi.models import KeyColors, KeySegments
-from piano_midi.time_slicer import TimeSlicer
-from piano_midi.video_capture import VideoCapture
+from piano_midi.defaults import (
+    DEFAULT_CHECKPOINT_INTERVAL,
+    DEFAULT_MAX_BYTES,
+    VideoBackend,
+)
+
+if TYPE_CHECKING:
+    from piano_midi.profiler import Profiler
+    from piano_midi.scanline_cache import ScanlineCache
+
+# the commands import what they need themselves, so that the command line
+# starts without loading OpenCV and NumPy
+
+
+def _echo_nothing(_: str) -> None:
+    pass
+
+
+def _profiler(cprofile_path: Path | None, *, enabled: bool) -> "Profiler":
+    from piano_midi.profiler import NULL_PROFILER, CProfileHook, Profiler
+
+    if cprofile_path is not None:
+        return Profiler(hot_loop_hooks=[CProfileHook(cprofile_path)])
+    if enabled:
+        return Profiler()
+    return NULL_PROFILER
+
+
+def _scanline_cache(
+    scanline_cache_dir: Path | None, scanline_cache_max_mb: int
+) -> "ScanlineCache | None":
+    from piano_midi.scanline_cache import ScanlineCache
+
+    if scanline_cache_dir is None:
+        return None
+    return ScanlineCache(scanline_cache_dir, max_bytes=scanline_cache_max_mb * 1024**2)
+
+
+def _check_video_to_midi_options(
+    *,
+    pipeline: bool,
+    workers: int,
+    sample_step: int,
+    resume: bool,
+    stream: bool,
+    unchanged_tolerance: int,
+) -> None:
+    if workers > 1 and (pipeline or unchanged_tolerance):
+        msg = "--workers can not be combined with --pipeline or an --unchanged-tolerance above 0"
+        raise typer.BadParameter(msg)
+    if pipeline and sample_step > 1:
+        msg = "--pipeline can not be combined with --sample-step"
+        raise typer.BadParameter(msg)
+    if resume and (pipeline or workers > 1 or sample_step > 1):
+        msg = "--resume can not be combined with --pipeline, --workers or --sample-step"
+        raise typer.BadParameter(msg)
+    if stream and (workers > 1 or sample_step > 1 or resume):
+        msg = "A stream is read once from start to end, so it can not be combined with --workers, --sample-step or --resume"
+        raise typer.BadParameter(msg)
+
 
 app = typer.Typer(
     name="midi tools",
@@ -30,15 +83,61 @@ def key_picker(
         Path,
         typer.Option("--key-segments-path", help="Path to store the keysegments to"),
     ],
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
 ) -> None:
+    from piano_midi.key_picker import KeyPicker
+    from piano_midi.video_capture import create_video_capture
+
     typer.echo(f"Starting key picker with image path: {video_path}")
-    video_capture = VideoCapture(video_path)
+    video_capture = create_video_capture(video_path, backend)
     with video_capture as cap:
         frame = cap.get_frame(frame_number=0)
     key_picker = KeyPicker(frame=frame, key_segments_path=key_segments_path)
     key_picker.run()
 
 
+@app.command()
+def find_key_segments(
+    *,
+    video_path: Annotated[
+        Path,
+        typer.Option("--video-path", help="Video to find the key segments in"),
+    ],
+    key_segments_path: Annotated[
+        Path,
+        typer.Option("--key-segments-path", help="Path to store the keysegments to"),
+    ],
+    frame_number: Annotated[
+        int,
+        typer.Option("--frame", min=0, help="Frame with all keys released to search"),
+    ] = 0,
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
+) -> None:
+    """Finds the key segments without a display, as an alternative to key-picker."""
+    from piano_midi.key_segmenter import KeySegmentsNotFoundError, search_key_segments
+    from piano_midi.models import InvalidNumOfKeySegmentsError
+    from piano_midi.video_capture import create_video_capture
+
+    video_capture = create_video_capture(video_path, backend)
+    with video_capture as cap:
+        frame = cap.get_frame(frame_number=frame_number)
+    try:
+        search = search_key_segments(frame)
+        key_segments = search.key_segments()
+    except (KeySegmentsNotFoundError, InvalidNumOfKeySegmentsError) as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1) from e
+    typer.echo(str(search))
+    key_segments.to_yaml(key_segments_path)
+    typer.echo(f"Saved key segments to {key_segments_path}")
+
+
 @app.command()
 def color_picker(
     *,
@@ -60,24 +159,193 @@ def color_picker(
         int | None,
         typer.Option("--frame-end", help="Frame end for the timeslice"),
     ] = None,
+    stride: Annotated[
+        int,
+        typer.Option("--stride", min=1, help="Only use every this many frames"),
+    ] = 1,
+    max_rows: Annotated[
+        int | None,
+        typer.Option(
+            "--max-rows",
+            min=1,
+            help="Raise the stride until the timeslice has at most this many rows",
+        ),
+    ] = None,
+    time_slice_memmap: Annotated[
+        Path | None,
+        typer.Option(
+            "--time-slice-memmap",
+            help="Keep the timeslice in this .npy file instead of in memory",
+        ),
+    ] = None,
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
+    scanline_cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            "--scanline-cache-dir",
+            help="Directory to cache the scanlines in, so reruns do not decode the video again",
+        ),
+    ] = None,
+    scanline_cache_max_mb: Annotated[
+        int,
+        typer.Option(
+            "--scanline-cache-max-mb",
+            help="Size of the scanline cache after which the least recently used entries are removed",
+        ),
+    ] = DEFAULT_MAX_BYTES // 1024**2,
+    profile_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--profile",
+            help="JSON file to write the wall and CPU time per stage, counts and peak memory to",
+        ),
+    ] = None,
+    cprofile_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--cprofile",
+            help="File to write cProfile stats of the hot loop to, for pstats or snakeviz",
+        ),
+    ] = None,
 ) -> None:
+    from piano_midi.color_picker import ColorPicker
+    from piano_midi.time_slicer import TimeSlicer
+    from piano_midi.video_capture import create_video_capture
+
     typer.echo(f"Starting color picker with image path: {video_path}")
-    video_capture = VideoCapture(video_path)
+    profiler = _profiler(cprofile_path, enabled=profile_path is not None)
+    video_capture = create_video_capture(
+        video_path,
+        backend,
+        _scanline_cache(scanline_cache_dir, scanline_cache_max_mb),
+        profiler,
+    )
     time_slicer = TimeSlicer(video_capture)
     time_slice = time_slicer.generate(
-        frame_start=frame_start, frame_end=frame_end, scan_line_px=100
+        frame_start=frame_start,
+        frame_end=frame_end,
+        scan_line_px=100,
+        stride=stride,
+        max_rows=max_rows,
+        memmap_path=time_slice_memmap,
     )
+    # the report covers the time slice, not the time spent picking colors
+    if profile_path is not None:
+        profiler.report("color-picker").save(profile_path)
+        typer.echo(f"Saved profile to {profile_path}")
     color_picker = ColorPicker(time_slice=time_slice, colors_path=colors_path)
     color_picker.run()
 
 
+@app.command()
+def calibrate_colors(
+    *,
+    video_path: Annotated[
+        Path,
+        typer.Option("--video-path", help="Video to calibrate the colors for"),
+    ],
+    key_segments_path: Annotated[
+        Path,
+        typer.Option(
+            "--key-segments-path", help="Key segments to tell white from black keys"
+        ),
+    ],
+    colors_path: Annotated[
+        Path,
+        typer.Option("--colors-path", help="Path to store the colors to"),
+    ],
+    frame_start: Annotated[
+        int,
+        typer.Option("--frame-start", help="Frame start for the timeslice"),
+    ] = 0,
+    frame_end: Annotated[
+        int | None,
+        typer.Option("--frame-end", help="Frame end for the timeslice"),
+    ] = None,
+    stride: Annotated[
+        int,
+        typer.Option("--stride", min=1, help="Only use every this many frames"),
+    ] = 1,
+    max_rows: Annotated[
+        int | None,
+        typer.Option(
+            "--max-rows",
+            min=1,
+            help="Raise the stride until the timeslice has at most this many rows",
+        ),
+    ] = None,
+    time_slice_memmap: Annotated[
+        Path | None,
+        typer.Option(
+            "--time-slice-memmap",
+            help="Keep the timeslice in this .npy file instead of in memory",
+        ),
+    ] = None,
+    min_confidence: Annotated[
+        float,
+        typer.Option(
+            "--min-confidence",
+            min=0.0,
+            max=1.0,
+            help="Exit with status 1 when the confidence is lower, so the colors can be checked with color-picker",
+        ),
+    ] = 0.0,
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
+    scanline_cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            "--scanline-cache-dir",
+            help="Directory to cache the scanlines in, so reruns do not decode the video again",
+        ),
+    ] = None,
+) -> None:
+    """Picks the colors of both hands without a display, as an alternative to color-picker."""
+    from piano_midi import color_calibration
+    from piano_midi.models import KeySegments
+    from piano_midi.time_slicer import TimeSlicer
+    from piano_midi.video_capture import create_video_capture
+
+    video_capture = create_video_capture(
+        video_path,
+        backend,
+        _scanline_cache(scanline_cache_dir, DEFAULT_MAX_BYTES // 1024**2),
+    )
+    time_slice = TimeSlicer(video_capture).generate(
+        frame_start=frame_start,
+        frame_end=frame_end,
+        scan_line_px=100,
+        stride=stride,
+        max_rows=max_rows,
+        memmap_path=time_slice_memmap,
+    )
+    try:
+        key_colors = color_calibration.calibrate_colors(
+            time_slice, KeySegments.from_yaml(key_segments_path)
+        )
+    except color_calibration.ColorCalibrationError as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1) from e
+    key_colors.to_yaml(colors_path)
+    typer.echo(f"Saved colors with confidence {key_colors.confidence} to {colors_path}")
+    if cast(float, key_colors.confidence) < min_confidence:
+        typer.echo(f"Confidence below the minimum of {min_confidence}", err=True)
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def video_to_midi(
     *,
     video_path: Annotated[
         Path,
         typer.Option(
-            "--video-path", help="Video path that is used for creating the mask"
+            "--video-path",
+            help="Video to convert, - or a named pipe to convert a stream while it comes in",
         ),
     ],
     key_segments_path: Annotated[
@@ -100,22 +368,322 @@ def video_to_midi(
         int | None,
         typer.Option("--frame-end", help="Frame end for the timeslice"),
     ] = None,
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
+    scanline_cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            "--scanline-cache-dir",
+            help="Directory to cache the scanlines in, so reruns do not decode the video again",
+        ),
+    ] = None,
+    scanline_cache_max_mb: Annotated[
+        int,
+        typer.Option(
+            "--scanline-cache-max-mb",
+            help="Size of the scanline cache after which the least recently used entries are removed",
+        ),
+    ] = DEFAULT_MAX_BYTES // 1024**2,
+    profile_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--profile",
+            help="JSON file to write the wall and CPU time per stage, counts and peak memory to",
+        ),
+    ] = None,
+    cprofile_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--cprofile",
+            help="File to write cProfile stats of the hot loop to, for pstats or snakeviz",
+        ),
+    ] = None,
+    block_size: Annotated[
+        int,
+        typer.Option(
+            "--block-size",
+            min=1,
+            help="Number of scanlines that are classified at once",
+        ),
+    ] = 256,
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            min=1,
+            help="Number of processes that each detect a contiguous range of frames",
+        ),
+    ] = 1,
+    pipeline: Annotated[
+        bool,
+        typer.Option(
+            "--pipeline",
+            help="Decode, classify and write in concurrent stages",
+        ),
+    ] = False,
+    color_lut: Annotated[
+        bool,
+        typer.Option(
+            "--color-lut/--no-color-lut",
+            help="Classify pixels with a lookup table of all colors, cached next to the colors file",
+        ),
+    ] = True,
+    sample_step: Annotated[
+        int,
+        typer.Option(
+            "--sample-step",
+            min=1,
+            help="Only probe every this many frames and scan the frames around changes, notes and pauses that are shorter can be missed",
+        ),
+    ] = 1,
+    skip_unchanged: Annotated[
+        bool,
+        typer.Option(
+            "--skip-unchanged/--no-skip-unchanged",
+            help="Reuse the keys of the scanline before when a scanline did not change",
+        ),
+    ] = True,
+    unchanged_tolerance: Annotated[
+        int,
+        typer.Option(
+            "--unchanged-tolerance",
+            min=0,
+            max=255,
+            help="Largest per channel difference with the scanline before that still counts as unchanged",
+        ),
+    ] = 0,
+    verbose: Annotated[
+        bool,
+        typer.Option("--verbose", "-v", help="Print every note on and off"),
+    ] = False,
+    quiet: Annotated[
+        bool,
+        typer.Option("--quiet", "-q", help="Only print errors"),
+    ] = False,
+    event_log_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--event-log",
+            help="CSV file to write all note on and off events to",
+        ),
+    ] = None,
+    events_path: Annotated[
+        Path | None,
+        typer.Option(
+            "--events-path",
+            help="Compact .npz file to write all note events to, which render-midi turns into MIDI again",
+        ),
+    ] = None,
+    min_note_length: Annotated[
+        int,
+        typer.Option(
+            "--min-note-length",
+            min=1,
+            help="Remove notes that are pressed for fewer frames",
+        ),
+    ] = 1,
+    max_gap: Annotated[
+        int,
+        typer.Option(
+            "--max-gap",
+            min=0,
+            help="Join two notes of a key and hand that are released for at most this many frames",
+        ),
+    ] = 0,
+    checkpoint_interval: Annotated[
+        int,
+        typer.Option(
+            "--checkpoint-interval",
+            min=0,
+            help="Frames between two checkpoints next to the MIDI file, 0 disables them. Not written with --workers, --pipeline, --sample-step or a stream",
+        ),
+    ] = DEFAULT_CHECKPOINT_INTERVAL,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Continue from the checkpoint of an interrupted run with the same inputs and options",
+        ),
+    ] = False,
 ) -> None:
-    typer.echo(f"Starting video to midi with image path: {video_path}")
-    video_capture = VideoCapture(video_path)
-    key_segments = KeySegments.from_yaml(key_segments_path)
-    key_colors = KeyColors.from_yaml(colors_path)
-    with video_capture as cap:
-        key_sequence_writer = KeySequenceWriter(fps=cast(float,cap.fps))
-    key_press_detector = KeyPressDetector(
-        video_capture=video_capture, key_segments=key_segments, key_colors=key_colors
+    from piano_midi.checkpoint import CheckpointMismatchError
+    from piano_midi.conversion import convert_video
+    from piano_midi.key_sequence_writer import Verbosity
+    from piano_midi.video_capture import is_stream
+
+    _check_video_to_midi_options(
+        pipeline=pipeline,
+        workers=workers,
+        sample_step=sample_step,
+        resume=resume,
+        stream=is_stream(video_path),
+        unchanged_tolerance=unchanged_tolerance if skip_unchanged else 0,
     )
-    key_press_detector.run(
-        key_sequence_writer=key_sequence_writer,
-        frame_start=frame_start,
-        frame_end=frame_end,
+    if verbose and quiet:
+        msg = "--verbose can not be combined with --quiet"
+        raise typer.BadParameter(msg)
+    verbosity = Verbosity.NORMAL
+    if verbose:
+        verbosity = Verbosity.VERBOSE
+    elif quiet:
+        verbosity = Verbosity.QUIET
+    echo = typer.echo if verbosity >= Verbosity.NORMAL else _echo_nothing
+    echo(f"Starting video to midi with image path: {video_path}")
+    profiler = _profiler(cprofile_path, enabled=profile_path is not None)
+    try:
+        convert_video(
+            video_path,
+            key_segments_path,
+            colors_path,
+            midi_path,
+            frame_start=frame_start,
+            frame_end=frame_end,
+            backend=backend,
+            scanline_cache=_scanline_cache(scanline_cache_dir, scanline_cache_max_mb),
+            profiler=profiler,
+            verbosity=verbosity,
+            color_lut=color_lut,
+            block_size=block_size,
+            workers=workers,
+            pipeline=pipeline,
+            sample_step=sample_step,
+            unchanged_tolerance=unchanged_tolerance if skip_unchanged else None,
+            min_note_length=min_note_length,
+            max_gap=max_gap,
+            checkpoint_interval=checkpoint_interval,
+            resume=resume,
+            event_log_path=event_log_path,
+            events_path=events_path,
+        )
+    except CheckpointMismatchError as e:
+        typer.echo(e, err=True)
+        raise typer.Exit(code=1) from e
+    if profile_path is not None:
+        profiler.report("video-to-midi").save(profile_path)
+        echo(f"Saved profile to {profile_path}")
+
+
+@app.command()
+def render_midi(
+    *,
+    events_path: Annotated[
+        Path,
+        typer.Option("--events-path", help="Note events written by video-to-midi"),
+    ],
+    midi_path: Annotated[
+        Path,
+        typer.Option("--midi-path", help="Path to store the midi file to"),
+    ],
+    split_hands: Annotated[
+        bool,
+        typer.Option("--split-hands", help="Write the notes of every hand to a track"),
+    ] = False,
+    bpm: Annotated[
+        float,
+        typer.Option("--bpm", min=1, help="Tempo of the MIDI file in beats per minute"),
+    ] = 120.0,
+    ticks_per_beat: Annotated[
+        int,
+        typer.Option("--ticks-per-beat", min=1, help="Resolution of the MIDI file"),
+    ] = 480,
+    min_note_length: Annotated[
+        int,
+        typer.Option(
+            "--min-note-length",
+            min=1,
+            help="Remove notes that are pressed for fewer frames",
+        ),
+    ] = 1,
+    max_gap: Annotated[
+        int,
+        typer.Option(
+            "--max-gap",
+            min=0,
+            help="Join two notes of a key and hand that are released for at most this many frames",
+        ),
+    ] = 0,
+) -> None:
+    """Renders note events as MIDI, without decoding the video again."""
+    from piano_midi.note_cleanup import clean_up
+    from piano_midi.note_events import NoteEvents
+
+    note_events = NoteEvents.load(events_path)
+    typer.echo(f"Loaded {note_events}")
+    note_events, cleanup_stats = clean_up(
+        note_events, min_note_frames=min_note_length, max_gap_frames=max_gap
+    )
+    typer.echo(str(cleanup_stats))
+    midi_file = note_events.render(
+        split_hands=split_hands, ticks_per_beat=ticks_per_beat, bpm=bpm
+    )
+    midi_file.save(midi_path)
+    typer.echo(
+        f"Saved midi file of {midi_file.length:.1f}s to {midi_path}, tracks: {len(midi_file.tracks)}"
+    )
+
+
+@app.command()
+def batch(
+    *,
+    manifest_path: Annotated[
+        Path,
+        typer.Option(
+            "--manifest",
+            help="YAML or CSV file with the video_path, key_segments_path, colors_path, midi_path and optional frame_start, frame_end, events_path, min_note_length and max_gap of every job",
+        ),
+    ],
+    workers: Annotated[
+        int | None,
+        typer.Option(
+            "--workers",
+            min=1,
+            help="Number of videos converted at the same time, the number of CPUs by default",
+        ),
+    ] = None,
+    retries: Annotated[
+        int,
+        typer.Option("--retries", min=0, help="Number of retries of a failed job"),
+    ] = 1,
+    force: Annotated[
+        bool,
+        typer.Option("--force", help="Also convert jobs whose MIDI file is up to date"),
+    ] = False,
+    backend: Annotated[
+        VideoBackend,
+        typer.Option("--backend", help="Video decoding backend"),
+    ] = VideoBackend.CV2,
+    color_lut: Annotated[
+        bool,
+        typer.Option(
+            "--color-lut/--no-color-lut",
+            help="Classify pixels with a lookup table of all colors, cached next to the colors file",
+        ),
+    ] = True,
+    summary_path: Annotated[
+        Path | None,
+        typer.Option("--summary", help="JSON file to write the result of every job to"),
+    ] = None,
+) -> None:
+    from piano_midi.batch import JobStatus, load_manifest, run_batch
+
+    jobs = load_manifest(manifest_path)
+    typer.echo(f"Starting batch of {len(jobs)} jobs from {manifest_path}")
+    summary = run_batch(
+        jobs,
+        backend=backend,
+        workers=workers,
+        retries=retries,
+        force=force,
+        color_lut=color_lut,
+        on_result=lambda result: typer.echo(str(result)),
     )
-    key_sequence_writer.save(midi_file_path=midi_path)
+    typer.echo(summary.totals)
+    if summary_path is not None:
+        summary_path.write_text(summary.model_dump_json(indent=2))
+    if summary.count(JobStatus.FAILED):
+        raise typer.Exit(code=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+import csv
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from enum import StrEnum
+from pathlib import Path
+from typing import cast
+
+import cv2
+import yaml
+from pydantic import BaseModel
+
+from piano_midi.checkpoint import run_digest
+from piano_midi.conversion import convert_video
+from piano_midi.defaults import DEFAULT_CHECKPOINT_INTERVAL, VideoBackend
+from piano_midi.key_sequence_writer import Verbosity
+
+PATH_FIELDS = ("video_path", "key_segments_path", "colors_path", "midi_path")
+
+
+class BatchJob(BaseModel):
+    video_path: Path
+    key_segments_path: Path
+    colors_path: Path
+    midi_path: Path
+    frame_start: int = 0
+    frame_end: int | None = None
+    events_path: Path | None = None
+    min_note_length: int = 1
+    max_gap: int = 0
+
+    def inputs(self) -> list[Path]:
+        return [self.video_path, self.key_segments_path, self.colors_path]
+
+    @property
+    def digest_path(self) -> Path:
+        return self.midi_path.with_suffix(".digest")
+
+    def options_digest(self, backend: VideoBackend, *, color_lut: bool) -> str:
+        return run_digest(self.model_dump_json(), backend, color_lut)
+
+    def is_up_to_date(self, backend: VideoBackend, *, color_lut: bool) -> bool:
+        """Whether the outputs were converted with these options and are newer than the inputs."""
+        outputs = [self.midi_path, self.digest_path]
+        if self.events_path is not None:
+            outputs.append(self.events_path)
+        if not all(path.exists() for path in outputs):
+            return False
+        if self.digest_path.read_text() != self.options_digest(
+            backend, color_lut=color_lut
+        ):
+            return False
+        midi_mtime = self.midi_path.stat().st_mtime
+        return all(
+            path.exists() and path.stat().st_mtime <= midi_mtime
+            for path in self.inputs()
+        )
+
+
+class JobStatus(StrEnum):
+    CONVERTED = "converted"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+
+class JobResult(BaseModel):
+    job: BatchJob
+    status: JobStatus
+    attempts: int = 0
+    frames: int = 0
+    events: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        line = f"{self.status:<10}{self.job.video_path.name}"
+        if self.status == JobStatus.CONVERTED:
+            line += (
+                f": {self.frames} frames, {self.events} events in {self.seconds:.2f}s"
+                f" ({self.fps:.1f} frames/s)"
+            )
+        elif self.status == JobStatus.FAILED:
+            line += f": {self.error} after {self.attempts} attempts"
+        return line
+
+
+class BatchSummary(BaseModel):
+    results: list[JobResult]
+    seconds: float
+
+    def count(self, status: JobStatus) -> int:
+        return sum(result.status == status for result in self.results)
+
+    @property
+    def totals(self) -> str:
+        frames = sum(result.frames for result in self.results)
+        return (
+            f"{self.count(JobStatus.CONVERTED)} converted, "
+            f"{self.count(JobStatus.SKIPPED)} skipped and "
+            f"{self.count(JobStatus.FAILED)} failed in {self.seconds:.2f}s "
+            f"({frames / self.seconds if self.seconds else 0.0:.1f} frames/s)"
+        )
+
+    def __str__(self) -> str:
+        return "\n".join([*(str(result) for result in self.results), self.totals])
+
+
+def load_manifest(manifest_path: Path) -> list[BatchJob]:
+    """Reads the jobs of a YAML or CSV manifest.
+
+    A YAML manifest is a list of jobs, a CSV manifest has a header with the
+    job fields. Relative paths are relative to the manifest.
+    """
+    with manifest_path.open("r", newline="") as file:
+        if manifest_path.suffix.lower() == ".csv":
+            # empty cells fall back to the defaults of the job
+            rows = [
+                {key: value for key, value in row.items() if value}
+                for row in csv.DictReader(file)
+            ]
+        else:
+            rows = yaml.safe_load(file) or []
+    jobs = [BatchJob.model_validate(row) for row in rows]
+    for job in jobs:
+        for field in PATH_FIELDS:
+            setattr(job, field, manifest_path.parent / getattr(job, field))
+        if job.events_path is not None:
+            job.events_path = manifest_path.parent / job.events_path
+    return jobs
+
+
+def convert_job(
+    job: BatchJob, backend: VideoBackend, *, color_lut: bool, resume: bool = False
+) -> tuple[int, int]:
+    """Converts the video of a job to MIDI and returns the frames read and events written.
+
+    With resume, the conversion continues from the checkpoint of an earlier attempt.
+    """
+    job.midi_path.parent.mkdir(parents=True, exist_ok=True)
+    job.digest_path.unlink(missing_ok=True)
+    result = convert_video(
+        job.video_path,
+        job.key_segments_path,
+        job.colors_path,
+        job.midi_path,
+        frame_start=job.frame_start,
+        frame_end=job.frame_end,
+        backend=backend,
+        verbosity=Verbosity.QUIET,
+        color_lut=color_lut,
+        min_note_length=job.min_note_length,
+        max_gap=job.max_gap,
+        checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+        resume=resume,
+        events_path=job.events_path,
+    )
+    # written last, so an interrupted conversion is never taken as up to date
+    job.digest_path.write_text(job.options_digest(backend, color_lut=color_lut))
+    return (result.frames, result.events)
+
+
+def run_job(
+    job: BatchJob, backend: VideoBackend, retries: int, *, color_lut: bool
+) -> JobResult:
+    result = JobResult(job=job, status=JobStatus.FAILED)
+    t_start = time.perf_counter()
+    while result.attempts <= retries:
+        result.attempts += 1
+        try:
+            # a retry continues where the attempt before it was checkpointed
+            result.frames, result.events = convert_job(
+                job, backend, color_lut=color_lut, resume=result.attempts > 1
+            )
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            continue
+        result.status = JobStatus.CONVERTED
+        result.error = None
+        break
+    result.seconds = time.perf_counter() - t_start
+    return result
+
+
+def _init_worker() -> None:
+    # jobs already run in parallel, so keep OpenCV from oversubscribing the cores
+    cv2.setNumThreads(1)
+
+
+def run_batch(
+    jobs: list[BatchJob],
+    *,
+    backend: VideoBackend = VideoBackend.CV2,
+    workers: int | None = None,
+    retries: int = 1,
+    force: bool = False,
+    color_lut: bool = True,
+    on_result: Callable[[JobResult], None] | None = None,
+) -> BatchSummary:
+    """Converts all jobs on a process pool, skipping jobs that are up to date.
+
+    Every job is tried retries + 1 times before it is recorded as failed.
+    Results are in the order of the jobs, on_result is called as they finish.
+    """
+    t_start = time.perf_counter()
+    results: list[JobResult | None] = [None] * len(jobs)
+    pending = []
+    for n, job in enumerate(jobs):
+        if not force and job.is_up_to_date(backend, color_lut=color_lut):
+            result = JobResult(job=job, status=JobStatus.SKIPPED)
+            results[n] = result
+            if on_result:
+                on_result(result)
+        else:
+            pending.append(n)
+    max_workers = min(workers or os.cpu_count() or 1, len(pending))
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker if max_workers > 1 else None,
+        ) as executor:
+            futures = {
+                executor.submit(
+                    run_job, jobs[n], backend, retries, color_lut=color_lut
+                ): n
+                for n in pending
+            }
+            for future in as_completed(futures):
+                job = jobs[futures[future]]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # the worker process died, e.g. killed for running out of memory
+                    result = JobResult(
+                        job=job,
+                        status=JobStatus.FAILED,
+                        error=f"{type(e).__name__}: {e}",
+                    )
+                results[futures[future]] = result
+                if on_result:
+                    on_result(result)
+    return BatchSummary(
+        results=[cast(JobResult, result) for result in results],
+        seconds=time.perf_counter() - t_start,
+    )
@@ -0,0 +1,123 @@
+import hashlib
+from pathlib import Path
+from typing import Self
+
+import numpy as np
+
+from piano_midi.npz import atomic_savez
+
+EVENT_COLUMNS = ("frame", "key", "hand", "note_on")
+
+
+class CheckpointMismatchError(Exception):
+    def __init__(self, checkpoint_path: Path) -> None:
+        super().__init__(
+            f"The checkpoint at {checkpoint_path} was written for other inputs or "
+            "options, remove it or run without --resume"
+        )
+
+
+def run_digest(*parts: object) -> str:
+    """Hashes everything that the detected events depend on."""
+    return hashlib.blake2b(
+        "\n".join(str(part) for part in parts).encode(), digest_size=16
+    ).hexdigest()
+
+
+class Checkpoint:
+    """The progress of a run up to and including frame_num.
+
+    Holds the pressed keys after frame_num, the last classified scanline and
+    its keys, and the columns of all events so far.
+    """
+
+    def __init__(
+        self,
+        *,
+        frame_num: int,
+        pressed: np.ndarray,
+        previous_line: np.ndarray | None,
+        previous_pressed: np.ndarray,
+        events: dict[str, np.ndarray],
+    ) -> None:
+        self.frame_num = frame_num
+        self.pressed = pressed
+        self.previous_line = previous_line
+        self.previous_pressed = previous_pressed
+        self.events = events
+
+    @property
+    def num_events(self) -> int:
+        return len(self.events["frame"])
+
+
+class Checkpointer:
+    """Writes a checkpoint to a sidecar file every interval frames.
+
+    The checkpoint is replaced atomically, so a run that is killed leaves
+    either the previous or the new checkpoint behind. It carries a digest of
+    the run, so it is never resumed with other inputs. An interval of 0
+    never writes checkpoints.
+    """
+
+    def __init__(self, path: Path, digest: str, interval: int) -> None:
+        self.path = path
+        self.digest = digest
+        self.interval = interval
+        self.num_saved = 0
+        self._last_frame: int | None = None
+
+    def is_due(self, frame_num: int) -> bool:
+        if not self.interval:
+            return False
+        if self._last_frame is None:
+            self._last_frame = frame_num
+        return frame_num - self._last_frame >= self.interval
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        previous_line = (
+            np.zeros((0, 3), dtype=np.uint8)
+            if checkpoint.previous_line is None
+            else checkpoint.previous_line
+        )
+        atomic_savez(
+            self.path,
+            digest=np.array(self.digest),
+            frame_num=np.array(checkpoint.frame_num),
+            pressed=checkpoint.pressed,
+            previous_line=previous_line,
+            previous_pressed=checkpoint.previous_pressed,
+            frame=checkpoint.events["frame"],
+            key=checkpoint.events["key"],
+            hand=checkpoint.events["hand"],
+            note_on=checkpoint.events["note_on"],
+        )
+        self._last_frame = checkpoint.frame_num
+        self.num_saved += 1
+
+    def load(self) -> Checkpoint | None:
+        """Returns the checkpoint of this run, or None when there is none."""
+        if not self.path.exists():
+            return None
+        with np.load(self.path) as data:
+            if str(data["digest"]) != self.digest:
+                raise CheckpointMismatchError(self.path)
+            checkpoint = Checkpoint(
+                frame_num=int(data["frame_num"]),
+                pressed=data["pressed"],
+                previous_line=data["previous_line"]
+                if len(data["previous_line"])
+                else None,
+                previous_pressed=data["previous_pressed"],
+                events={column: data[column] for column in EVENT_COLUMNS},
+            )
+        self._last_frame = checkpoint.frame_num
+        return checkpoint
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    @classmethod
+    def for_midi(cls, midi_path: Path, digest: str, interval: int) -> Self:
+        """Keeps the checkpoint next to the MIDI file."""
+        return cls(midi_path.with_suffix(".checkpoint.npz"), digest, interval)
@@ -0,0 +1,156 @@
+from typing import cast
+
+import cv2
+import numpy as np
+
+from piano_midi.models import HSVRange, KeyColors, KeySegment, KeySegments, Range
+
+NUM_HUES = 180
+# a pixel is pressed when a channel differs this much from the idle keyboard
+PRESSED_DIFF = 60
+# hues within this distance of a peak of the histogram belong to its cluster
+PEAK_WIDTH = 15
+# the second hue peak needs this share of the pressed pixels to count as a hand
+MIN_CLUSTER_SHARE = 0.02
+HUE_MARGIN = 4
+SATURATION_VALUE_MARGIN = 30
+WHITE, BLACK = 0, 1
+
+
+class ColorCalibrationError(Exception):
+    pass
+
+
+def _key_columns(key_segments: KeySegments, width: int) -> np.ndarray:
+    """Returns WHITE, BLACK or -1 for every column of the scanline."""
+    columns = np.full(width, -1, dtype=np.int8)
+    for key_type, segments in [
+        (WHITE, key_segments.white),
+        (BLACK, key_segments.black),
+    ]:
+        # black keys are set last, as the white segments may run below them
+        for segment in cast(list[KeySegment], segments):
+            columns[segment.start : segment.end + 1] = key_type
+    return columns
+
+
+def _hue_distance(hues: np.ndarray, hue: int) -> np.ndarray:
+    """Returns the signed distance from hue on the hue circle."""
+    return (hues.astype(np.int16) - hue + NUM_HUES // 2) % NUM_HUES - NUM_HUES // 2
+
+
+def _hue_peaks(hues: np.ndarray) -> list[int]:
+    """Returns the two highest peaks of the circular hue histogram that are apart."""
+    histogram = np.bincount(hues, minlength=NUM_HUES).astype(np.float64)
+    # smooth over neighbouring hues, wrapping around the circle
+    kernel = np.ones(5)
+    histogram = np.convolve(np.tile(histogram, 3), kernel, "same")[
+        NUM_HUES : 2 * NUM_HUES
+    ]
+    first = int(histogram.argmax())
+    all_hues = np.arange(NUM_HUES)
+    histogram[np.abs(_hue_distance(all_hues, first)) <= 2 * PEAK_WIDTH] = 0
+    second = int(histogram.argmax())
+    return [first, second]
+
+
+def _hsv_range(pixels: np.ndarray, hue: int) -> HSVRange:
+    """Returns the HSV range that covers the pixels of a cluster around hue."""
+    distances = _hue_distance(pixels[:, 0], hue)
+    low, high = np.percentile(distances, [1, 99])
+    s_low, s_high = np.percentile(pixels[:, 1], [1, 99])
+    v_low, v_high = np.percentile(pixels[:, 2], [1, 99])
+    # ranges can not wrap around the hue circle, so they are clipped at red
+    return HSVRange(
+        h=Range(
+            min=max(hue + int(low) - HUE_MARGIN, 0),
+            max=min(hue + int(high) + HUE_MARGIN, NUM_HUES - 1),
+        ),
+        s=Range(
+            min=max(int(s_low) - SATURATION_VALUE_MARGIN, 0),
+            max=min(int(s_high) + SATURATION_VALUE_MARGIN, 255),
+        ),
+        v=Range(
+            min=max(int(v_low) - SATURATION_VALUE_MARGIN, 0),
+            max=min(int(v_high) + SATURATION_VALUE_MARGIN, 255),
+        ),
+    )
+
+
+def _in_range(time_slice_hsv: np.ndarray, hsv_range: HSVRange) -> np.ndarray:
+    return (
+        cv2.inRange(
+            time_slice_hsv,
+            hsv_range.lower().astype(np.uint8),
+            hsv_range.upper().astype(np.uint8),
+        )
+        != 0
+    )
+
+
+def _calibrate_key_type(
+    time_slice_hsv: np.ndarray, *, pressed: np.ndarray, idle: np.ndarray, name: str
+) -> tuple[HSVRange, HSVRange, float]:
+    """Returns the left and right hand ranges of a key type and their confidence.
+
+    The confidence is the share of pressed pixels that match exactly one of
+    the ranges, times the share of idle pixels that match none.
+    """
+    pixels = time_slice_hsv[pressed]
+    columns = np.nonzero(pressed)[1]
+    if len(pixels) == 0:
+        msg = f"No pressed {name} keys found"
+        raise ColorCalibrationError(msg)
+    clusters = []
+    for hue in _hue_peaks(pixels[:, 0]):
+        in_cluster = np.abs(_hue_distance(pixels[:, 0], hue)) <= PEAK_WIDTH
+        if np.count_nonzero(in_cluster) < MIN_CLUSTER_SHARE * len(pixels):
+            msg = f"Did not find the colors of both hands on the {name} keys"
+            raise ColorCalibrationError(msg)
+        clusters.append(
+            (columns[in_cluster].mean(), _hsv_range(pixels[in_cluster], hue))
+        )
+    # the left hand plays left of the right hand on average
+    (_, left), (_, right) = sorted(clusters, key=lambda cluster: cluster[0])
+    left_match = _in_range(time_slice_hsv, left)
+    right_match = _in_range(time_slice_hsv, right)
+    explained = np.count_nonzero((left_match ^ right_match)[pressed]) / len(pixels)
+    false_positives = np.count_nonzero((left_match | right_match)[idle])
+    num_idle = int(np.count_nonzero(idle))
+    idle_share = 1 - false_positives / num_idle if num_idle else 1.0
+    return left, right, float(explained * idle_share)
+
+
+def calibrate_colors(time_slice: np.ndarray, key_segments: KeySegments) -> KeyColors:
+    """Proposes the key colors of both hands from a time slice of the keyboard.
+
+    Pressed pixels are the pixels that differ from the idle keyboard, which
+    is the median of every column, so keys are assumed to be released most
+    of the time. The key segments tell pressed white and black keys apart,
+    and the two highest peaks of their hue histogram are the two hands. The
+    confidence is the lowest of both key types, see _calibrate_key_type.
+    """
+    idle_keyboard = np.median(time_slice, axis=0).astype(np.uint8)
+    diff = cv2.absdiff(time_slice, np.broadcast_to(idle_keyboard, time_slice.shape))
+    is_pressed = diff.max(axis=2) > PRESSED_DIFF
+    columns = _key_columns(key_segments, time_slice.shape[1])[np.newaxis]
+    time_slice_hsv = cv2.cvtColor(time_slice, cv2.COLOR_BGR2HSV)
+    left_white, right_white, white_confidence = _calibrate_key_type(
+        time_slice_hsv,
+        pressed=is_pressed & (columns == WHITE),
+        idle=~is_pressed & (columns == WHITE),
+        name="white",
+    )
+    left_black, right_black, black_confidence = _calibrate_key_type(
+        time_slice_hsv,
+        pressed=is_pressed & (columns == BLACK),
+        idle=~is_pressed & (columns == BLACK),
+        name="black",
+    )
+    return KeyColors(
+        left_white=left_white,
+        right_white=right_white,
+        left_black=left_black,
+        right_black=right_black,
+        confidence=round(min(white_confidence, black_confidence), 3),
+    )
@@ -0,0 +1,100 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import Self, cast
+
+import cv2
+import numpy as np
+
+from piano_midi.models import HSVRange, KeyColors
+from piano_midi.npz import atomic_savez
+
+NUM_COLORS = 1 << 24
+# the 2**24 BGR colors are converted in a single square image
+_IMAGE_SIDE = 1 << 12
+
+
+def color_ranges(key_colors: KeyColors) -> list[HSVRange]:
+    """Returns the HSV ranges in mask order: white then black keys, per Hand value."""
+    return [
+        cast(HSVRange, key_colors.left_white),
+        cast(HSVRange, key_colors.right_white),
+        cast(HSVRange, key_colors.left_black),
+        cast(HSVRange, key_colors.right_black),
+    ]
+
+
+def color_indices(lines: np.ndarray) -> np.ndarray:
+    """Returns the table index of every pixel of NxWx3 BGR lines, blue in the lowest byte."""
+    # the alpha channel is masked out again, but makes every pixel a single uint32
+    bgra = cv2.cvtColor(lines, cv2.COLOR_BGR2BGRA)
+    return np.bitwise_and(bgra.view(np.uint32)[..., 0], NUM_COLORS - 1)
+
+
+class ColorLut:
+    """Maps every BGR color straight to the key colors it matches.
+
+    Every entry holds a bit per HSV range of the KeyColors, in the order of
+    color_ranges, so overlapping ranges classify exactly like the per range
+    inRange passes. The table covers all 2**24 colors, which takes 16 MiB.
+    """
+
+    def __init__(self, table: np.ndarray, digest: str, build_seconds: float) -> None:
+        self.table = table
+        self.digest = digest
+        self.build_seconds = build_seconds
+
+    @staticmethod
+    def key_colors_digest(key_colors: KeyColors) -> str:
+        return hashlib.blake2b(
+            key_colors.model_dump_json(exclude={"confidence"}).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    @classmethod
+    def build(cls, key_colors: KeyColors) -> Self:
+        t_start = time.perf_counter()
+        indices = np.arange(NUM_COLORS, dtype=np.uint32)
+        image = indices.view(np.uint8).reshape(_IMAGE_SIDE, _IMAGE_SIDE, 4)[..., :3]
+        image_hsv = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_BGR2HSV)
+        del indices, image
+        table = np.zeros((_IMAGE_SIDE, _IMAGE_SIDE), dtype=np.uint8)
+        mask = np.empty_like(table)
+        for color, hsv_range in enumerate(color_ranges(key_colors)):
+            cv2.inRange(
+                image_hsv,
+                hsv_range.lower().astype(np.uint8),
+                hsv_range.upper().astype(np.uint8),
+                dst=mask,
+            )
+            table |= mask & (1 << color)
+        return cls(
+            table.ravel(),
+            cls.key_colors_digest(key_colors),
+            time.perf_counter() - t_start,
+        )
+
+    @classmethod
+    def load_or_build(cls, key_colors: KeyColors, lut_path: Path) -> Self:
+        """Loads the table from lut_path, or builds and stores it when the colors changed."""
+        digest = cls.key_colors_digest(key_colors)
+        if lut_path.exists():
+            with np.load(lut_path) as data:
+                if str(data["digest"]) == digest:
+                    return cls(data["table"], digest, build_seconds=0.0)
+        color_lut = cls.build(key_colors)
+        color_lut.save(lut_path)
+        return color_lut
+
+    def save(self, lut_path: Path) -> None:
+        atomic_savez(lut_path, table=self.table, digest=np.array(self.digest))
+
+    def lookup(self, lines: np.ndarray) -> np.ndarray:
+        """Returns the color bits of every pixel of NxWx3 BGR lines as NxW uint8."""
+        return self.table.take(color_indices(lines))
+
+    def __str__(self) -> str:
+        size = f"{self.table.nbytes / 1024**2:.0f} MiB"
+        if self.build_seconds:
+            return f"Built color lookup table ({size}) in {self.build_seconds:.2f}s"
+        return f"Loaded color lookup table ({size})"
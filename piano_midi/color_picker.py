@@ -6,6 +6,7 @@ import typer
 import yaml
 
 from piano_midi.models import ESC_KEY, HSVRange, KeyColor, KeyColors, Range
+from piano_midi.preview import WAIT_KEY_MS, Preview
 
 
 class ColorPicker:
@@ -37,6 +38,7 @@ class ColorPicker:
 
     def click_event(self, event, x, y, flags, param) -> None:  # noqa: ANN001, ARG002
         if event == cv2.EVENT_LBUTTONDOWN:
+            # the window shows the preview, which holds the colors of the image
             color = self.hsv[y, x]
             print(f"Clicked color HSV: {color}")
 
@@ -55,22 +57,22 @@ class ColorPicker:
 
     def create_trackbars(self) -> None:
         cv2.createTrackbar(
-            "HMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 179, lambda _: None
+            "HMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 179, self._on_change
         )
         cv2.createTrackbar(
-            "HMax", self.WIN_NAME_HSV_MASK_CREATOR, 179, 179, lambda _: None
+            "HMax", self.WIN_NAME_HSV_MASK_CREATOR, 179, 179, self._on_change
         )
         cv2.createTrackbar(
-            "SMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, lambda _: None
+            "SMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, self._on_change
         )
         cv2.createTrackbar(
-            "SMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, lambda _: None
+            "SMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, self._on_change
         )
         cv2.createTrackbar(
-            "VMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, lambda _: None
+            "VMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, self._on_change
         )
         cv2.createTrackbar(
-            "VMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, lambda _: None
+            "VMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, self._on_change
         )
 
     def create_windows(self) -> None:
@@ -81,12 +83,19 @@ class ColorPicker:
     def __init__(self, time_slice: np.ndarray, colors_path: Path) -> None:
         self.image = time_slice
         self.colors_path = colors_path
-        self.hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        self.preview = Preview(time_slice)
+        self.hsv = cv2.cvtColor(self.preview.image, cv2.COLOR_BGR2HSV)
+        self._dirty = True
+
+    def _on_change(self, _: int) -> None:
+        self._dirty = True
 
     def save_color(self, key_color: KeyColor, hsv_range: HSVRange) -> None:
         key_colors = KeyColors.from_yaml(self.colors_path)
         color_num = key_color.name.lower()
         setattr(key_colors, color_num, hsv_range)
+        # the colors are checked by a person now
+        key_colors.confidence = None
         typer.echo(f"{key_color} with {hsv_range} stored in {self.colors_path}")
         key_colors.to_yaml(self.colors_path)
 
@@ -102,22 +111,27 @@ class ColorPicker:
     def reset(self) -> None:
         # reset trackbars
         self.create_trackbars()
+        self._dirty = True
         # remove entries from colors file
         with self.colors_path.open("w") as file:
             yaml.dump({}, file)
         typer.echo("Trackbars reset and colors file cleared")
 
     def loop(self) -> None:
+        cv2.imshow(self.WIN_NAME_ORIGINAL_IMAGE, self.preview.image)
         running = True
         while running:
-            hsv_range = self._get_trackbar_pos()
-            mask = cv2.inRange(self.hsv, hsv_range.lower(), hsv_range.upper())
-            result = cv2.bitwise_and(self.image, self.image, mask=mask)
-
-            cv2.imshow(self.WIN_NAME_HSV_MASK_CREATOR, result)
-            cv2.imshow(self.WIN_NAME_ORIGINAL_IMAGE, self.image)
-
-            key = cv2.waitKey(1) & 0xFF
+            # only filter the preview again after a trackbar moved
+            if self._dirty:
+                self._dirty = False
+                hsv_range = self._get_trackbar_pos()
+                mask = cv2.inRange(self.hsv, hsv_range.lower(), hsv_range.upper())
+                result = cv2.bitwise_and(
+                    self.preview.image, self.preview.image, mask=mask
+                )
+                cv2.imshow(self.WIN_NAME_HSV_MASK_CREATOR, result)
+
+            key = cv2.waitKey(WAIT_KEY_MS) & 0xFF
             if key == ESC_KEY:
                 running = False
             if key in (ord("1"), ord("2"), ord("3"), ord("4")):
@@ -127,7 +141,9 @@ class ColorPicker:
                     "3": KeyColor.RIGHT_WHITE,
                     "4": KeyColor.RIGHT_BLACK,
                 }
-                self.save_color(key_color=values[chr(key)], hsv_range=hsv_range)
+                self.save_color(
+                    key_color=values[chr(key)], hsv_range=self._get_trackbar_pos()
+                )
             if key in (ord("q"), ord("w"), ord("e"), ord("r")):
                 values = {
                     "q": KeyColor.LEFT_WHITE,
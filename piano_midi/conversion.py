@@ -0,0 +1,228 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+import typer
+from pydantic import BaseModel
+
+from piano_midi.checkpoint import Checkpointer, run_digest
+from piano_midi.color_lut import ColorLut
+from piano_midi.key_press_detector import KeyPressDetector
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from piano_midi.models import KeyColors, KeySegments
+from piano_midi.profiler import NULL_PROFILER, Profiler
+from piano_midi.scanline_cache import ScanlineCache, video_fingerprint
+from piano_midi.video_capture import (
+    ReadStats,
+    VideoBackend,
+    VideoCapture,
+    create_video_capture,
+    is_stream,
+)
+
+
+class ConversionResult(BaseModel):
+    read_stats: ReadStats
+    events: int
+
+    @property
+    def frames(self) -> int:
+        return (
+            self.read_stats.frames_decoded
+            + self.read_stats.frames_grabbed
+            + self.read_stats.frames_cached
+        )
+
+
+def _echo_nothing(_: str) -> None:
+    pass
+
+
+def _checkpointer(
+    video_path: Path,
+    midi_path: Path,
+    key_press_detector: KeyPressDetector,
+    *,
+    backend: VideoBackend,
+    frame_start: int,
+    frame_end: int | None,
+    interval: int,
+) -> Checkpointer:
+    stream = is_stream(video_path)
+    return Checkpointer.for_midi(
+        midi_path,
+        run_digest(
+            # a stream can not be read twice to fingerprint it, so it is never checkpointed
+            "" if stream else video_fingerprint(video_path),
+            backend,
+            key_press_detector.key_segments.model_dump_json(),
+            ColorLut.key_colors_digest(key_press_detector.key_colors),
+            frame_start,
+            frame_end,
+            key_press_detector.unchanged_tolerance,
+        ),
+        0 if stream else interval,
+    )
+
+
+def _resume(
+    checkpointer: Checkpointer,
+    key_press_detector: KeyPressDetector,
+    key_sequence_writer: KeySequenceWriter,
+    echo: Callable[[str], None],
+) -> int | None:
+    """Restores the checkpoint of an interrupted run, and returns the frame to continue at."""
+    checkpoint = checkpointer.load()
+    if checkpoint is None:
+        echo(f"No checkpoint at {checkpointer.path}, starting from the start")
+        return None
+    key_press_detector.restore(checkpoint, key_sequence_writer)
+    echo(
+        f"Resuming after frame {checkpoint.frame_num} with "
+        f"{checkpoint.num_events} note events from {checkpointer.path}"
+    )
+    return checkpoint.frame_num + 1
+
+
+def _save_events(
+    key_sequence_writer: KeySequenceWriter,
+    *,
+    event_log_path: Path | None,
+    events_path: Path | None,
+    echo: Callable[[str], None],
+) -> None:
+    if event_log_path is not None:
+        key_sequence_writer.save_event_log(event_log_path)
+        echo(f"Saved event log to {event_log_path}")
+    if events_path is not None:
+        key_sequence_writer.note_events().save(events_path)
+        echo(f"Saved note events to {events_path}")
+
+
+def _key_press_detector(
+    video_capture: VideoCapture,
+    key_segments_path: Path,
+    colors_path: Path,
+    *,
+    profiler: Profiler,
+    color_lut: bool,
+    unchanged_tolerance: int | None,
+    echo: Callable[[str], None],
+) -> KeyPressDetector:
+    key_colors = KeyColors.from_yaml(colors_path)
+    color_lookup_table = None
+    if color_lut:
+        with profiler.stage("color lut"):
+            color_lookup_table = ColorLut.load_or_build(
+                key_colors, colors_path.with_suffix(".lut.npz")
+            )
+        echo(str(color_lookup_table))
+    return KeyPressDetector(
+        video_capture=video_capture,
+        key_segments=KeySegments.from_yaml(key_segments_path),
+        key_colors=key_colors,
+        color_lut=color_lookup_table,
+        profiler=profiler,
+        unchanged_tolerance=unchanged_tolerance,
+    )
+
+
+def convert_video(
+    video_path: Path,
+    key_segments_path: Path,
+    colors_path: Path,
+    midi_path: Path,
+    *,
+    frame_start: int = 0,
+    frame_end: int | None = None,
+    backend: VideoBackend = VideoBackend.CV2,
+    scanline_cache: ScanlineCache | None = None,
+    profiler: Profiler = NULL_PROFILER,
+    verbosity: Verbosity = Verbosity.NORMAL,
+    color_lut: bool = True,
+    block_size: int = 256,
+    workers: int = 1,
+    pipeline: bool = False,
+    sample_step: int = 1,
+    unchanged_tolerance: int | None = 0,
+    min_note_length: int = 1,
+    max_gap: int = 0,
+    checkpoint_interval: int = 0,
+    resume: bool = False,
+    event_log_path: Path | None = None,
+    events_path: Path | None = None,
+) -> ConversionResult:
+    """Converts a video to a MIDI file, and optionally its note events.
+
+    Every checkpoint_interval frames a checkpoint is written next to the MIDI
+    file, which resume continues from. Raises CheckpointMismatchError when
+    that checkpoint was written for other inputs or options.
+    """
+    echo = typer.echo if verbosity >= Verbosity.NORMAL else _echo_nothing
+    video_capture = create_video_capture(video_path, backend, scanline_cache, profiler)
+    with video_capture as cap:
+        key_sequence_writer = KeySequenceWriter(
+            fps=cast(float, cap.fps), verbosity=verbosity, profiler=profiler
+        )
+    key_press_detector = _key_press_detector(
+        video_capture,
+        key_segments_path,
+        colors_path,
+        profiler=profiler,
+        color_lut=color_lut,
+        unchanged_tolerance=unchanged_tolerance,
+        echo=echo,
+    )
+    checkpointer = _checkpointer(
+        video_path,
+        midi_path,
+        key_press_detector,
+        backend=backend,
+        frame_start=frame_start,
+        frame_end=frame_end,
+        interval=checkpoint_interval,
+    )
+    detect_start = frame_start
+    if resume:
+        detect_start = (
+            _resume(checkpointer, key_press_detector, key_sequence_writer, echo)
+            or frame_start
+        )
+    key_press_detector.run(
+        key_sequence_writer=key_sequence_writer,
+        frame_start=detect_start,
+        frame_end=frame_end,
+        block_size=block_size,
+        workers=workers,
+        pipeline=pipeline,
+        sample_step=sample_step,
+        checkpointer=checkpointer,
+    )
+    echo(str(video_capture.read_stats))
+    if key_press_detector.pipeline_stats:
+        echo(str(key_press_detector.pipeline_stats))
+    if sample_step > 1:
+        echo(str(key_press_detector.sample_stats))
+    if unchanged_tolerance is not None:
+        echo(str(key_press_detector.classify_stats))
+    echo(f"Detected {key_sequence_writer.num_events} note events")
+    echo(
+        str(
+            key_sequence_writer.clean_up(
+                min_note_frames=min_note_length, max_gap_frames=max_gap
+            )
+        )
+    )
+    key_sequence_writer.save(midi_file_path=midi_path)
+    # the run is complete, so there is nothing to resume anymore
+    checkpointer.remove()
+    _save_events(
+        key_sequence_writer,
+        event_log_path=event_log_path,
+        events_path=events_path,
+        echo=echo,
+    )
+    return ConversionResult(
+        read_stats=video_capture.read_stats,
+        events=key_sequence_writer.num_events,
+    )
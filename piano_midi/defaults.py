@@ -0,0 +1,15 @@
+# values the command line needs to define its options, main.py imports this
+# module at start-up, so it must not import OpenCV, NumPy or other heavy modules
+from enum import StrEnum
+from pathlib import Path
+
+
+class VideoBackend(StrEnum):
+    CV2 = "cv2"
+    FFMPEG = "ffmpeg"
+    PYAV = "pyav"
+
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "piano_midi" / "scanlines"
+DEFAULT_MAX_BYTES = 4 * 1024**3
+DEFAULT_CHECKPOINT_INTERVAL = 3000
@@ -0,0 +1,125 @@
+from typing import cast
+
+import cv2
+import numpy as np
+
+from piano_midi.color_lut import ColorLut, color_ranges
+from piano_midi.models import (
+    BLACK_KEY_INDICES,
+    NUM_KEYS,
+    WHITE_KEY_INDICES,
+    KeyColors,
+    KeySegment,
+    KeySegments,
+)
+from piano_midi.profiler import NULL_PROFILER, Profiler
+
+
+class KeyClassifier:
+    """Classifies a scanline into a (hand, key) matrix of pressed keys.
+
+    The key segments are compiled once into start/end arrays that are ordered
+    by key index, so the color masks of a scanline are reduced to per key pixel
+    counts with a single integral image and one gather, instead of slicing the
+    masks segment by segment. With a ColorLut the masks are looked up per
+    pixel instead of thresholding the HSV converted lines.
+    """
+
+    def __init__(
+        self,
+        key_segments: KeySegments,
+        key_colors: KeyColors,
+        width: int,
+        color_lut: ColorLut | None = None,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
+        white = cast(list[KeySegment], key_segments.white)
+        black = cast(list[KeySegment], key_segments.black)
+        # mask rows are ordered by Hand value, first for the white and then the black keys
+        self.bounds = [
+            (hsv_range.lower().astype(np.uint8), hsv_range.upper().astype(np.uint8))
+            for hsv_range in color_ranges(key_colors)
+        ]
+        self.color_lut = color_lut
+        self.profiler = profiler
+        self.width = width
+
+        self._starts = np.zeros(NUM_KEYS, dtype=np.intp)
+        self._ends = np.zeros(NUM_KEYS, dtype=np.intp)
+        # the mask row per hand and key
+        self._mask_rows = np.zeros(NUM_KEYS, dtype=np.intp) + np.array([[0], [1]])
+        for key_index, segment in zip(WHITE_KEY_INDICES, white, strict=True):
+            self._starts[key_index], self._ends[key_index] = segment.start, segment.end
+        for key_index, segment in zip(BLACK_KEY_INDICES, black, strict=True):
+            self._starts[key_index], self._ends[key_index] = segment.start, segment.end
+            self._mask_rows[:, key_index] += 2
+        # inRange masks are 0 or 255 and lookup table masks hold the bit of their
+        # color, so compare pixel counts scaled by that value
+        scale = (
+            np.array([255] * len(self.bounds))
+            if color_lut is None
+            else 1 << np.arange(len(self.bounds))
+        )
+        self.threshold = (width // 256) * scale[self._mask_rows]  # avoid glitches
+        self._num_lines = 0
+        self._masks = np.zeros((0, width), dtype=np.uint8)
+        self._gather = np.zeros(0, dtype=np.intp)
+
+    def _prepare(self, num_lines: int) -> None:
+        if num_lines == self._num_lines:
+            return
+        self._num_lines = num_lines
+        # the masks of every color are stacked on top of each other, one row per line
+        self._masks = np.zeros((len(self.bounds) * num_lines, self.width), np.uint8)
+        # flat indices into the integral image of the masks, per line, hand and key:
+        # the segment sum of a mask row is the difference of its prefix sums in
+        # the integral rows below and above it
+        rows = self._mask_rows * num_lines + np.arange(num_lines)[:, None, None]
+        stride = self.width + 1
+        self._gather = np.stack(
+            [
+                (rows + 1) * stride + self._ends,
+                (rows + 1) * stride + self._starts,
+                rows * stride + self._ends,
+                rows * stride + self._starts,
+            ]
+        )
+
+    def classify(self, line: np.ndarray) -> np.ndarray:
+        """Returns a (2, 88) boolean matrix of the keys pressed per hand in a 1xWx3 BGR line."""
+        return self.classify_block(line)[0]
+
+    def classify_block(self, lines: np.ndarray) -> np.ndarray:
+        """Returns a (N, 2, 88) boolean matrix of the keys pressed per hand in NxWx3 BGR lines.
+
+        All lines are looked up in the color lookup table at once, or converted
+        and thresholded with a single OpenCV call per color.
+        """
+        num_lines = len(lines)
+        self._prepare(num_lines)
+        with self.profiler.stage("color conversion"):
+            if self.color_lut is not None:
+                color_bits = self.color_lut.lookup(lines)
+                for color in range(len(self.bounds)):
+                    np.bitwise_and(
+                        color_bits,
+                        1 << color,
+                        out=self._masks[color * num_lines : (color + 1) * num_lines],
+                    )
+            else:
+                self._threshold_hsv(lines)
+        with self.profiler.stage("key classification"):
+            sums = cv2.integral(self._masks).take(self._gather)
+            counts = sums[0] - sums[1] - sums[2] + sums[3]
+            return counts > self.threshold
+
+    def _threshold_hsv(self, lines: np.ndarray) -> None:
+        num_lines = len(lines)
+        lines_hsv = cv2.cvtColor(lines, cv2.COLOR_BGR2HSV)
+        for color, (lower, upper) in enumerate(self.bounds):
+            cv2.inRange(
+                lines_hsv,
+                lower,
+                upper,
+                dst=self._masks[color * num_lines : (color + 1) * num_lines],
+            )
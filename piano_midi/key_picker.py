@@ -5,6 +5,7 @@ import numpy as np
 import typer
 from numpy import ndarray
 
+from piano_midi.key_segmenter import noise_floor, scanline_segments
 from piano_midi.models import (
     ESC_KEY,
     HSVRange,
@@ -14,6 +15,7 @@ from piano_midi.models import (
     PianoKey,
     Range,
 )
+from piano_midi.preview import WAIT_KEY_MS, Preview
 
 
 class KeyPicker:
@@ -49,30 +51,31 @@ class KeyPicker:
     def click_event(self, event, x, y, flags, param) -> None:  # noqa: ANN001, ARG002
         if event == cv2.EVENT_LBUTTONDOWN:
             # sets the scanline to the clicked y position
-            self._set_scanline_pct(pct=y * 100 // self.image_height)
+            _, image_y = self.preview.to_image(x, y)
+            self._set_scanline_pct(pct=image_y * 100 // self.image_height)
 
     def create_trackbars(self) -> None:
         cv2.createTrackbar(
-            "HMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 179, lambda _: None
+            "HMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 179, self._on_change
         )
         cv2.createTrackbar(
-            "HMax", self.WIN_NAME_HSV_MASK_CREATOR, 179, 179, lambda _: None
+            "HMax", self.WIN_NAME_HSV_MASK_CREATOR, 179, 179, self._on_change
         )
         cv2.createTrackbar(
-            "SMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, lambda _: None
+            "SMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, self._on_change
         )
         cv2.createTrackbar(
-            "SMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, lambda _: None
+            "SMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, self._on_change
         )
         cv2.createTrackbar(
-            "VMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, lambda _: None
+            "VMin", self.WIN_NAME_HSV_MASK_CREATOR, 0, 255, self._on_change
         )
         cv2.createTrackbar(
-            "VMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, lambda _: None
+            "VMax", self.WIN_NAME_HSV_MASK_CREATOR, 255, 255, self._on_change
         )
 
         cv2.createTrackbar(
-            "h_scanline_pct", self.WIN_NAME_HSV_MASK_CREATOR, 0, 100, lambda _: None
+            "h_scanline_pct", self.WIN_NAME_HSV_MASK_CREATOR, 0, 100, self._on_change
         )
 
     def _create_windows(self) -> None:
@@ -85,10 +88,18 @@ class KeyPicker:
         self.image_height = self.image.shape[0]
         self.image_width = self.image.shape[1]
         self.hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        self.preview = Preview(frame)
+        self.preview_hsv = cv2.cvtColor(self.preview.image, cv2.COLOR_BGR2HSV)
+        self._dirty = True
+        self._key_segments: list[KeySegment] = []
+
+    def _on_change(self, _: int) -> None:
+        self._dirty = True
 
     def _reset(self) -> None:
         # reset trackbars
         self.create_trackbars()
+        self._dirty = True
         typer.echo("Trackbars reset")
 
     def _store_segments(
@@ -108,95 +119,90 @@ class KeyPicker:
             typer.echo(e, err=True)
 
     def _get_key_segments(self, masked_scanline: ndarray) -> list[KeySegment]:
-        # first map every non zero value to white
-        masked_scanline = (masked_scanline != 0) * 255
-        white = np.array([255, 255, 255])
-        segments = []
-        start = None
-        for i, row in enumerate(masked_scanline):
-            if np.array_equal(row, white):
-                if start is None:
-                    start = i
-            elif start is not None:
-                segments.append((start, i - 1))
-                start = None
-
-        if start is not None:
-            segments.append((start, len(masked_scanline) - 1))
-        # filter out segments that are too small, for black keys this is 1/128 of the image width, so this holds for white keys as well
-        noise_floor = self.image_width // 128
-        segments = [
-            segment for segment in segments if segment[1] - segment[0] > noise_floor
-        ]
-        key_segments = [
-            KeySegment(start=segment[0], end=segment[1]) for segment in segments
-        ]
-        return key_segments
+        # every pixel that is not black in all channels is part of a segment
+        return scanline_segments(
+            (masked_scanline != 0).all(axis=-1), noise_floor(self.image_width)
+        )
+
+    def _scanline_row(self, height_pct: int) -> int:
+        """Returns the image row at height_pct, which is always inside the image."""
+        return min(
+            max(int(self.image_height * height_pct / 100), 0), self.image_height - 1
+        )
+
+    def _scanline_segments(
+        self, hsv_range: HSVRange, height_px: int
+    ) -> list[KeySegment]:
+        # the segments come from the full resolution scanline
+        line_mask = cv2.inRange(
+            self.hsv[height_px : height_px + 1], hsv_range.lower(), hsv_range.upper()
+        )
+        line = self.image[height_px : height_px + 1]
+        masked_line = cv2.bitwise_and(line, line, mask=line_mask)
+        return self._get_key_segments(masked_scanline=masked_line[0])
+
+    def _render(self) -> None:
+        hsv_range = self._get_hsv_trackbar_pos()
+        height_px = self._scanline_row(self._get_scanline_pct())
+        self._key_segments = self._scanline_segments(hsv_range, height_px)
+
+        # on the preview, every non black pixel matches the filter
+        mask = cv2.inRange(self.preview_hsv, hsv_range.lower(), hsv_range.upper())
+        overlay = cv2.bitwise_and(self.preview.image, self.preview.image, mask=mask)
+        _, preview_y = self.preview.to_preview(0, height_px)
+        cv2.line(
+            overlay,
+            (0, preview_y),
+            (overlay.shape[1], preview_y),
+            (0, 255, 0),
+            2,
+        )
+
+        # draw number of segments somewhere on the image
+        cv2.putText(
+            overlay,
+            f"Num of segments: {len(self._key_segments)}",
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            (0, 255, 0),
+            2,
+        )
+
+        # draw segments on the overlay:
+        # specifically, draw thick dots on the start and end of each segment
+        for segment in self._key_segments:
+            cv2.circle(
+                overlay,
+                self.preview.to_preview(segment.start, height_px),
+                5,
+                (0, 0, 255),
+                -1,
+            )
+            cv2.circle(
+                overlay,
+                self.preview.to_preview(segment.end, height_px),
+                5,
+                (255, 0, 0),
+                -1,
+            )
+        cv2.imshow(self.WIN_NAME_HSV_MASK_CREATOR, overlay)
 
     def _loop(self) -> None:
         running = True
         while running:
-            hsv_range = self._get_hsv_trackbar_pos()
-            height_pct = self._get_scanline_pct()
-            height_px = int(self.image_height * height_pct / 100) - 1
-            mask = cv2.inRange(self.hsv, hsv_range.lower(), hsv_range.upper())
-            masked_image = cv2.bitwise_and(self.image, self.image, mask=mask)
-            # on the result, every non black pixel is white
-            # so we can use the scanline to find the segments
-            # draw line
-            # make a copy of the image
-            masked_image_with_overlay = masked_image.copy()
-            cv2.line(
-                masked_image_with_overlay,
-                (0, height_px),
-                (self.image.shape[1], height_px),
-                (0, 255, 0),
-                2,
-            )
-
-            # save a copy of result, with intersection of scanline (ie 1d array)
-            line = masked_image[height_px, :, :]
-            key_segments = self._get_key_segments(masked_scanline=line)
-
-            # draw number of segments somewhere on the image
-            cv2.putText(
-                masked_image_with_overlay,
-                f"Num of segments: {len(key_segments)}",
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (0, 255, 0),
-                2,
-            )
+            # only render again after a trackbar moved
+            if self._dirty:
+                self._dirty = False
+                self._render()
 
-            # draw segments on result_with_line in red:
-            # specifically, draw thick dots on the start and end of each segment
-            for segment in key_segments:
-                cv2.circle(
-                    masked_image_with_overlay,
-                    (segment.start, height_px),
-                    5,
-                    (0, 0, 255),
-                    -1,
-                )
-                cv2.circle(
-                    masked_image_with_overlay,
-                    (segment.end, height_px),
-                    5,
-                    (255, 0, 0),
-                    -1,
-                )
-            cv2.imshow(self.WIN_NAME_HSV_MASK_CREATOR, masked_image_with_overlay)
-
-            # show segments on image
-
-            key = cv2.waitKey(1) & 0xFF
+            key = cv2.waitKey(WAIT_KEY_MS) & 0xFF
             if key == ESC_KEY:
                 running = False
             if key == ord("w"):
-                self._store_segments(key_segments, PianoKey.WHITE)
+                self._store_segments(self._key_segments, PianoKey.WHITE)
             if key == ord("b"):
-                self._store_segments(key_segments, PianoKey.BLACK)
+                self._store_segments(self._key_segments, PianoKey.BLACK)
             if key == ord("z"):
                 self._reset()
 
@@ -1,37 +1,383 @@
+import itertools
+import multiprocessing
+import time
+from collections.abc import Generator, Iterable
+from concurrent.futures import ProcessPoolExecutor
 from typing import cast
 
 import cv2
 import numpy as np
+from pydantic import BaseModel
 
+from piano_midi.checkpoint import Checkpoint, Checkpointer
+from piano_midi.color_lut import ColorLut
+from piano_midi.key_classifier import KeyClassifier
 from piano_midi.key_sequence_writer import KeySequenceWriter
-from piano_midi.models import Hand, HSVRange, KeyColors, KeySegment, KeySegments
-from piano_midi.piano_state import PianoState
-from piano_midi.video_capture import VideoCapture
+from piano_midi.models import KeyColors, KeySegments
+from piano_midi.piano_state import PianoChanges, PianoState
+from piano_midi.pipeline import PipelineStats, run_pipeline
+from piano_midi.profiler import NULL_PROFILER, Profiler
+from piano_midi.video_capture import ReadStats, VideoCapture
+
+# a seek costs about as much as decoding this many frames
+SEEK_FRAMES = 16
+# grabbing a skipped frame costs about 3/4 of decoding it and every scanned
+# range starts with a seek, so once this share of the probe intervals changed,
+# scanning every frame is faster than probing and scanning again
+FULL_SCAN_SHARE = 0.1
+
+
+class ClassifyStats(BaseModel):
+    lines: int = 0
+    unchanged: int = 0
+
+    @property
+    def skip_rate(self) -> float:
+        return self.unchanged / self.lines if self.lines else 0.0
+
+    def merge(self, other: "ClassifyStats") -> None:
+        self.lines += other.lines
+        self.unchanged += other.unchanged
+
+    def __str__(self) -> str:
+        return (
+            f"Skipped classification of {self.unchanged} of {self.lines} "
+            f"unchanged scanlines ({self.skip_rate:.1%})"
+        )
+
+
+class SampleStats(BaseModel):
+    intervals: int = 0
+    changed: int = 0
+    frames_scanned: int = 0
+    full_scan_from: int | None = None
+
+    @property
+    def changed_share(self) -> float:
+        return self.changed / self.intervals if self.intervals else 0.0
+
+    def merge(self, other: "SampleStats") -> None:
+        self.intervals += other.intervals
+        self.changed += other.changed
+        self.frames_scanned += other.frames_scanned
+        if other.full_scan_from is not None and (
+            self.full_scan_from is None or other.full_scan_from < self.full_scan_from
+        ):
+            self.full_scan_from = other.full_scan_from
+
+    def __str__(self) -> str:
+        line = (
+            f"Keys changed in {self.changed} of {self.intervals} probe intervals "
+            f"({self.changed_share:.1%}), scanned {self.frames_scanned} frames"
+        )
+        if self.full_scan_from is not None:
+            line += f", every frame from frame {self.full_scan_from} on"
+        return line
 
 
 class KeyPressDetector:
+    """Detects the key changes in the scanlines of a video.
+
+    A scanline that differs from the last classified line by at most
+    unchanged_tolerance per channel reuses the keys of that line instead of
+    being classified again. None classifies every line.
+    """
+
     def __init__(
         self,
         video_capture: VideoCapture,
         key_segments: KeySegments,
         key_colors: KeyColors,
+        color_lut: ColorLut | None = None,
+        profiler: Profiler = NULL_PROFILER,
+        *,
+        unchanged_tolerance: int | None = 0,
     ) -> None:
         self.video_capture = video_capture
         self.key_segments = key_segments
         self.key_colors = key_colors
+        self.color_lut = color_lut
+        self.profiler = profiler
+        self.unchanged_tolerance = unchanged_tolerance
 
         self.piano_state = PianoState()
+        self.pipeline_stats: PipelineStats | None = None
+        self.classify_stats = ClassifyStats()
+        self.sample_stats = SampleStats()
+        self._key_classifier: KeyClassifier | None = None
+        # the last classified line and its keys, which the next line is compared with
+        self._previous_line: np.ndarray | None = None
+        self._previous_pressed = np.zeros_like(self.piano_state.pressed)
+
+    def _process_block(
+        self, pressed: np.ndarray, frame_nums: np.ndarray
+    ) -> Generator[tuple[PianoChanges, int], None, None]:
+        # compare every frame with the one before it, and only build the
+        # changes for the frames in which a key actually changed
+        previous = np.concatenate([self.piano_state.pressed[np.newaxis], pressed[:-1]])
+        changed = np.flatnonzero((pressed != previous).any(axis=(1, 2)))
+        for n in changed:
+            next_piano_state = PianoState.from_pressed(pressed[n])
+            changes = next_piano_state.detect_changes(self.piano_state)
+            self.piano_state = next_piano_state
+            yield (changes, int(frame_nums[n]))
 
-    def _is_key_pressed(
+    def _read_blocks(
         self,
-        mask: np.ndarray,
-        key_segment: KeySegment,
-    ) -> bool:
-        threshold = self.video_capture.width // 256  # avoid glitches
-        return (
-            np.count_nonzero(mask[:, key_segment.start : key_segment.end]) > threshold
+        *,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        copy: bool = False,
+    ) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+        """Yields blocks of scanlines together with their frame numbers.
+
+        Scanlines are classified in blocks, which bounds memory to the block.
+        Unless copy is set, every block is read into the same buffer.
+        """
+        with self.video_capture as cap:
+            yield from self._blocks(
+                cap,
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                copy=copy,
+            )
+
+    def _blocks(
+        self,
+        cap: VideoCapture,
+        *,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        copy: bool = False,
+        step: int = 1,
+        store: bool = True,
+    ) -> Generator[tuple[np.ndarray, np.ndarray], None, None]:
+        block = np.zeros((block_size, cast(int, cap.width), 3), dtype=np.uint8)
+        frame_nums = np.zeros(block_size, dtype=np.int64)
+        num_lines = 0
+        for line, frame_num in cap.read_scanlines(
+            frame_start, frame_end, scan_line_px=scan_line_px, step=step, store=store
+        ):
+            block[num_lines] = line[0]
+            frame_nums[num_lines] = frame_num
+            num_lines += 1
+            if num_lines == block_size:
+                self.profiler.count("frames", num_lines)
+                yield (
+                    (block.copy(), frame_nums.copy())
+                    if copy
+                    else (
+                        block,
+                        frame_nums,
+                    )
+                )
+                num_lines = 0
+        if num_lines:
+            self.profiler.count("frames", num_lines)
+            yield (block[:num_lines].copy(), frame_nums[:num_lines].copy())
+
+    def _classify_block(self, block: np.ndarray) -> np.ndarray:
+        width = block.shape[1]
+        if self._key_classifier is None or self._key_classifier.width != width:
+            self._key_classifier = KeyClassifier(
+                self.key_segments,
+                self.key_colors,
+                width,
+                self.color_lut,
+                profiler=self.profiler,
+            )
+            if self._previous_line is not None and len(self._previous_line) != width:
+                self._previous_line = None
+        self.classify_stats.lines += len(block)
+        if self.unchanged_tolerance is None:
+            return self._key_classifier.classify_block(block)
+        with self.profiler.stage("unchanged lines"):
+            changed = self._changed_lines(block, self.unchanged_tolerance)
+        num_changed = int(np.count_nonzero(changed))
+        self.classify_stats.unchanged += len(block) - num_changed
+        self.profiler.count("unchanged lines", len(block) - num_changed)
+        if num_changed == len(block):
+            pressed = self._key_classifier.classify_block(block)
+        else:
+            # every unchanged line takes the keys of the last changed line before it
+            classified = [self._previous_pressed[np.newaxis]]
+            if num_changed:
+                classified.append(self._key_classifier.classify_block(block[changed]))
+            pressed = np.concatenate(classified)[np.cumsum(changed)]
+        if num_changed:
+            self._previous_line = block[np.flatnonzero(changed)[-1]].copy()
+        self._previous_pressed = pressed[-1]
+        return pressed
+
+    def _changed_lines(self, block: np.ndarray, tolerance: int) -> np.ndarray:
+        """Returns whether every line differs from the last classified line by more than tolerance."""
+        if tolerance > 0:
+            # small differences add up, so compare with the last classified line
+            # instead of the line before
+            changed = np.zeros(len(block), dtype=bool)
+            reference = self._previous_line
+            for n, line in enumerate(block):
+                if reference is None or cv2.absdiff(line, reference).max() > tolerance:
+                    changed[n] = True
+                    reference = line
+            return changed
+        # without tolerance, a line equals the last classified line exactly when
+        # it and all lines since then equal the line before them
+        changed = np.ones(len(block), dtype=bool)
+        if len(block) > 1:
+            diff = cv2.absdiff(block[1:], block[:-1])
+            changed[1:] = diff.reshape(len(block) - 1, -1).max(axis=1) > tolerance
+        if self._previous_line is not None:
+            diff = cv2.absdiff(block[0], self._previous_line)
+            changed[0] = diff.max() > tolerance
+        return changed
+
+    def _detect_block(
+        self, block: np.ndarray, frame_nums: np.ndarray
+    ) -> list[tuple[PianoChanges, int]]:
+        pressed = self._classify_block(block)
+        with self.profiler.stage("piano state"):
+            changes = list(self._process_block(pressed, frame_nums))
+        self.profiler.count("changes", len(changes))
+        return changes
+
+    def detect(
+        self,
+        *,
+        scan_line_px: int = 100,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int = 256,
+        sample_step: int = 1,
+    ) -> Generator[tuple[PianoChanges, int], None, None]:
+        """Yields the changes and frame number of every frame in which a key changed.
+
+        Changes are relative to the frame before, the first frame is compared
+        with the current piano state. With a sample_step above 1 only every
+        sample_step-th frame is probed, see _detect_sampled.
+        """
+        if sample_step > 1:
+            yield from self._detect_sampled(
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                sample_step=sample_step,
+            )
+            return
+        for block, frame_nums in self._read_blocks(
+            scan_line_px=scan_line_px,
+            frame_start=frame_start,
+            frame_end=frame_end,
+            block_size=block_size,
+        ):
+            yield from self._detect_block(block, frame_nums)
+
+    def _detect_sampled(
+        self,
+        *,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        sample_step: int,
+    ) -> Generator[tuple[PianoChanges, int], None, None]:
+        """Yields the same changes as a full scan, but only probes every sample_step-th frame.
+
+        Probes are read in windows of block_size frames. All frames between
+        two probes with different key states are scanned to find the exact
+        frames of the changes. A note, or a pause between two notes on the
+        same key, that is shorter than sample_step frames can fall between two
+        probes and is then missed. Once more than FULL_SCAN_SHARE of the probe
+        intervals changed, every frame after the window's first probe is
+        scanned instead.
+        """
+        with self.video_capture as cap:
+            _frame_end = frame_end or cast(int, cap.frame_count) - 1
+            read_stats = ReadStats()
+
+            def scan(
+                start: int, end: int
+            ) -> Generator[tuple[PianoChanges, int], None, None]:
+                for block, frame_nums in self._blocks(
+                    cap,
+                    scan_line_px=scan_line_px,
+                    frame_start=start,
+                    frame_end=end,
+                    block_size=block_size,
+                    # every short range would be an entry of its own in the cache
+                    store=False,
+                ):
+                    yield from self._detect_block(block, frame_nums)
+                read_stats.merge(cap.read_stats)
+                self.sample_stats.frames_scanned += end - start
+
+            # the last probe and its frame, which the next window is compared with
+            previous: tuple[np.ndarray, int] | None = None
+            probe_start = frame_start
+            while probe_start < _frame_end:
+                probe_end = min(probe_start + block_size, _frame_end)
+                ((block, probe_frames),) = self._blocks(
+                    cap,
+                    scan_line_px=scan_line_px,
+                    frame_start=probe_start,
+                    frame_end=probe_end,
+                    block_size=block_size,
+                    copy=True,
+                    step=sample_step,
+                )
+                probes = self._classify_block(block)
+                read_stats.merge(cap.read_stats)
+                if previous is None:
+                    # the first probe is compared with the current piano state
+                    yield from self._process_block(probes[:1], probe_frames[:1])
+                else:
+                    probes = np.concatenate([previous[0][np.newaxis], probes])
+                    probe_frames = np.append(previous[1], probe_frames)
+                changed = (probes[1:] != probes[:-1]).any(axis=(1, 2))
+                self.sample_stats.intervals += len(changed)
+                self.sample_stats.changed += int(np.count_nonzero(changed))
+                if self.sample_stats.changed_share > FULL_SCAN_SHARE:
+                    # one sequential scan instead of a seek for every changed range
+                    scan_start = int(probe_frames[0]) + 1
+                    self.sample_stats.full_scan_from = scan_start
+                    yield from scan(scan_start, _frame_end)
+                    break
+                # the frames after the last probe are scanned with the last window
+                tail_end = _frame_end if probe_end == _frame_end else None
+                for start, end in _scan_ranges(changed, probe_frames, tail_end):
+                    yield from scan(start, end)
+                previous = (probes[-1], int(probe_frames[-1]))
+                probe_start = previous[1] + sample_step
+            self.video_capture.read_stats = read_stats
+
+    def checkpoint(
+        self, frame_num: int, key_sequence_writer: KeySequenceWriter
+    ) -> Checkpoint:
+        """Returns the progress after frame_num, when all its changes are written."""
+        return Checkpoint(
+            frame_num=frame_num,
+            pressed=self.piano_state.pressed.copy(),
+            previous_line=self._previous_line,
+            previous_pressed=self._previous_pressed.copy(),
+            events=key_sequence_writer.event_columns(),
         )
 
+    def restore(
+        self, checkpoint: Checkpoint, key_sequence_writer: KeySequenceWriter
+    ) -> None:
+        """Continues from a checkpoint, detection then resumes after its frame."""
+        self.piano_state = PianoState.from_pressed(checkpoint.pressed.copy())
+        self._previous_line = checkpoint.previous_line
+        self._previous_pressed = checkpoint.previous_pressed.copy()
+        key_sequence_writer.extend_events(checkpoint.events)
+
     def run(
         self,
         *,
@@ -39,68 +385,279 @@ class KeyPressDetector:
         scan_line_px: int = 100,
         frame_start: int,
         frame_end: int | None,
+        block_size: int = 256,
+        workers: int = 1,
+        pipeline: bool = False,
+        sample_step: int = 1,
+        checkpointer: Checkpointer | None = None,
     ) -> None:
+        """Writes the detected changes to the key sequence writer.
+
+        A checkpointer is only used by a single process that scans every
+        frame, it is ignored with workers, pipeline or a sample_step. Workers
+        can not be combined with an unchanged_tolerance above 0.
+        """
+        if workers > 1 and self.unchanged_tolerance:
+            # a line is compared with the last classified line, which a worker
+            # only knows after classifying all frames before its chunk
+            msg = "Workers can not be combined with an unchanged tolerance above 0"
+            raise ValueError(msg)
+        with self.profiler.hot_loop():
+            self._run(
+                key_sequence_writer=key_sequence_writer,
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                workers=workers,
+                pipeline=pipeline,
+                sample_step=sample_step,
+                checkpointer=checkpointer,
+            )
+
+    def _run(
+        self,
+        *,
+        key_sequence_writer: KeySequenceWriter,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        workers: int,
+        pipeline: bool,
+        sample_step: int,
+        checkpointer: Checkpointer | None,
+    ) -> None:
+        if checkpointer is not None and not pipeline and workers == sample_step == 1:
+            self._run_checkpointed(
+                key_sequence_writer=key_sequence_writer,
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                checkpointer=checkpointer,
+            )
+            return
+        if pipeline:
+            self._run_pipeline(
+                key_sequence_writer=key_sequence_writer,
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+            )
+            return
+        changes: Iterable[tuple[PianoChanges, int]]
+        if workers > 1:
+            changes = self._detect_parallel(
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                workers=workers,
+                sample_step=sample_step,
+            )
+        else:
+            changes = self.detect(
+                scan_line_px=scan_line_px,
+                frame_start=frame_start,
+                frame_end=frame_end,
+                block_size=block_size,
+                sample_step=sample_step,
+            )
+        for piano_changes, frame_num in changes:
+            key_sequence_writer.process_change(piano_changes, frame_num)
+
+    def _run_checkpointed(
+        self,
+        *,
+        key_sequence_writer: KeySequenceWriter,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        checkpointer: Checkpointer,
+    ) -> None:
+        for block, frame_nums in self._read_blocks(
+            scan_line_px=scan_line_px,
+            frame_start=frame_start,
+            frame_end=frame_end,
+            block_size=block_size,
+        ):
+            for piano_changes, frame_num in self._detect_block(block, frame_nums):
+                key_sequence_writer.process_change(piano_changes, frame_num)
+            # every change up to the end of the block is written now
+            last_frame = int(frame_nums[-1])
+            if checkpointer.is_due(last_frame):
+                with self.profiler.stage("checkpoint"):
+                    checkpointer.save(self.checkpoint(last_frame, key_sequence_writer))
+
+    def _run_pipeline(
+        self,
+        *,
+        key_sequence_writer: KeySequenceWriter,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+    ) -> None:
+        def write(changes: list[tuple[PianoChanges, int]]) -> None:
+            for piano_changes, frame_num in changes:
+                key_sequence_writer.process_change(piano_changes, frame_num)
+
+        # blocks are copied, since the decode stage keeps reading while they are classified
+        blocks = self._read_blocks(
+            scan_line_px=scan_line_px,
+            frame_start=frame_start,
+            frame_end=frame_end,
+            block_size=block_size,
+            copy=True,
+        )
+        self.pipeline_stats = run_pipeline(
+            blocks,
+            lambda block: self._detect_block(*block),
+            write,
+            names=("decode", "classify", "write"),
+        )
+
+    def _detect_parallel(
+        self,
+        *,
+        scan_line_px: int,
+        frame_start: int,
+        frame_end: int | None,
+        block_size: int,
+        workers: int,
+        sample_step: int,
+    ) -> list[tuple[PianoChanges, int]]:
         with self.video_capture as cap:
-            for frame, frame_num in cap.read_range(frame_start, frame_end):
-                # read line  of frame
-                line = frame[scan_line_px : scan_line_px + 1, :, :]
-                line_hsv = cv2.cvtColor(line, cv2.COLOR_BGR2HSV)
-
-                left_white = cv2.inRange(
-                    line_hsv,
-                    cast(HSVRange, self.key_colors.left_white).lower(),
-                    cast(HSVRange, self.key_colors.left_white).upper(),
-                )
-                left_black = cv2.inRange(
-                    line_hsv,
-                    cast(HSVRange, self.key_colors.left_black).lower(),
-                    cast(HSVRange, self.key_colors.left_black).upper(),
+            _frame_end = frame_end or cast(int, cap.frame_count) - 1
+        bounds = np.linspace(frame_start, _frame_end, workers + 1).astype(int)
+        # every chunk but the first also classifies the frame before it, so its
+        # first changes are relative to that frame, exactly like in a sequential run
+        chunks = [
+            (int(start) - (start > frame_start), int(start), int(end))
+            for start, end in itertools.pairwise(bounds)
+            if end > start
+        ]
+        if not chunks:
+            # an empty range has nothing to split
+            return list(
+                self.detect(
+                    scan_line_px=scan_line_px,
+                    frame_start=frame_start,
+                    frame_end=frame_end,
+                    block_size=block_size,
+                    sample_step=sample_step,
                 )
-                right_white = cv2.inRange(
-                    line_hsv,
-                    cast(HSVRange, self.key_colors.right_white).lower(),
-                    cast(HSVRange, self.key_colors.right_white).upper(),
-                )
-                right_black = cv2.inRange(
-                    line_hsv,
-                    cast(HSVRange, self.key_colors.right_black).lower(),
-                    cast(HSVRange, self.key_colors.right_black).upper(),
+            )
+        t_start = time.perf_counter()
+        # spawned workers do not inherit the decoder threads of this process
+        with ProcessPoolExecutor(
+            max_workers=len(chunks), mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = list(
+                executor.map(
+                    _detect_chunk,
+                    [self] * len(chunks),
+                    [scan_line_px] * len(chunks),
+                    chunks,
+                    [block_size] * len(chunks),
+                    [sample_step] * len(chunks),
                 )
+            )
 
-                # # draw scan line in frame
-                # cv2.line(frame, (0, scan_line_px), (frame.shape[1], scan_line_px), (0, 255, 0), 2)
-                # cv2.imshow("frame", frame)
-                # cv2.waitKey(0)
+        read_stats = ReadStats(seconds=time.perf_counter() - t_start)
+        all_changes = []
+        for (
+            chunk_changes,
+            chunk_read_stats,
+            chunk_classify_stats,
+            chunk_sample_stats,
+            _,
+            chunk_profiler,
+        ) in results:
+            all_changes.extend(chunk_changes)
+            self.classify_stats.merge(chunk_classify_stats)
+            self.sample_stats.merge(chunk_sample_stats)
+            self.profiler.merge(chunk_profiler.stages, chunk_profiler.counters)
+            read_stats.frames_decoded += chunk_read_stats.frames_decoded
+            read_stats.frames_grabbed += chunk_read_stats.frames_grabbed
+            read_stats.frames_cached += chunk_read_stats.frames_cached
+        self.video_capture.read_stats = read_stats
+        self.piano_state = results[-1][4]
+        return all_changes
 
-                next_piano_state = self.piano_state.copy()
-                for key_idx, segment in enumerate(
-                    cast(list[KeySegment], self.key_segments.white)
-                ):
-                    next_piano_state.set_white_key(
-                        key_idx,
-                        is_pressed=self._is_key_pressed(left_white, segment),
-                        hand=Hand.LEFT,
-                    )
-                    next_piano_state.set_white_key(
-                        key_idx,
-                        is_pressed=self._is_key_pressed(right_white, segment),
-                        hand=Hand.RIGHT,
-                    )
-                for key_idx, segment in enumerate(
-                    cast(list[KeySegment], self.key_segments.black)
-                ):
-                    next_piano_state.set_black_key(
-                        key_idx,
-                        is_pressed=self._is_key_pressed(left_black, segment),
-                        hand=Hand.LEFT,
-                    )
-                    next_piano_state.set_black_key(
-                        key_idx,
-                        is_pressed=self._is_key_pressed(right_black, segment),
-                        hand=Hand.RIGHT,
-                    )
 
-                changes = next_piano_state.detect_changes(self.piano_state)
-                if changes.pressed or changes.released:
-                    key_sequence_writer.process_change(changes, frame_num)
-                self.piano_state = next_piano_state
+def _scan_ranges(
+    changed: np.ndarray, probe_frames: np.ndarray, frame_end: int | None
+) -> list[tuple[int, int]]:
+    """Returns the [start, end) frame ranges to scan around the changed probe intervals.
+
+    The probes of an unchanged interval equal the current piano state, but
+    ranges with short gaps in between are still joined, as a seek costs
+    more than decoding a few frames. The frames after the last probe are
+    scanned up to frame_end, unless it is None.
+    """
+    ranges: list[tuple[int, int]] = []
+    n = 1
+    for is_changed, group in itertools.groupby(changed.tolist()):
+        num_probes = len(list(group))
+        if is_changed:
+            start = int(probe_frames[n - 1]) + 1
+            end = int(probe_frames[n + num_probes - 1]) + 1
+            if ranges and start - ranges[-1][1] <= SEEK_FRAMES:
+                start = ranges.pop()[0]
+            ranges.append((start, end))
+        n += num_probes
+    start = int(probe_frames[-1]) + 1
+    if frame_end is not None and start < frame_end:
+        if ranges and start - ranges[-1][1] <= SEEK_FRAMES:
+            start = ranges.pop()[0]
+        ranges.append((start, frame_end))
+    return ranges
+
+
+def _detect_chunk(
+    key_press_detector: KeyPressDetector,
+    scan_line_px: int,
+    chunk: tuple[int, int, int],
+    block_size: int,
+    sample_step: int,
+) -> tuple[
+    list[tuple[PianoChanges, int]],
+    ReadStats,
+    ClassifyStats,
+    SampleStats,
+    PianoState,
+    Profiler,
+]:
+    """Detects the changes in [start, end) of a chunk in a worker process.
+
+    Decoding starts at detect_start, changes before start only set the state
+    that the changes of the chunk are compared with.
+    """
+    detect_start, start, end = chunk
+    if key_press_detector.profiler.enabled:
+        # start from scratch, so only what this chunk records is merged
+        key_press_detector.profiler = Profiler()
+        key_press_detector.video_capture.profiler = key_press_detector.profiler
+    changes = [
+        (piano_changes, frame_num)
+        for piano_changes, frame_num in key_press_detector.detect(
+            scan_line_px=scan_line_px,
+            frame_start=detect_start,
+            frame_end=end,
+            block_size=block_size,
+            sample_step=sample_step,
+        )
+        if frame_num >= start
+    ]
+    return (
+        changes,
+        key_press_detector.video_capture.read_stats,
+        key_press_detector.classify_stats,
+        key_press_detector.sample_stats,
+        key_press_detector.piano_state,
+        key_press_detector.profiler,
+    )
@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+from pydantic import BaseModel
+
+from piano_midi.models import HSVRange, KeySegment, KeySegments, PianoKey, Range
+
+# bright and unsaturated pixels of the white keys, from strict to loose
+WHITE_KEY_RANGES = [
+    HSVRange(
+        h=Range(min=0, max=179),
+        s=Range(min=0, max=s_max),
+        v=Range(min=v_min, max=255),
+    )
+    for s_max in (40, 80)
+    for v_min in (200, 160, 120)
+]
+# dark pixels of the black keys, from strict to loose
+BLACK_KEY_RANGES = [
+    HSVRange(
+        h=Range(min=0, max=179),
+        s=Range(min=0, max=255),
+        v=Range(min=0, max=v_max),
+    )
+    for v_max in (40, 70, 100)
+]
+
+
+class KeySegmentsNotFoundError(Exception):
+    def __init__(self, num_keys: int, key_name: str) -> None:
+        self.num_keys = num_keys
+        msg = f"Did not find a row with {num_keys} {key_name} keys"
+        super().__init__(msg)
+
+
+def noise_floor(width: int) -> int:
+    # segments that are too small are noise, for black keys this is 1/128 of
+    # the image width, so this holds for white keys as well
+    return width // 128
+
+
+def row_segments(
+    masks: np.ndarray, min_length: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the row, start and end pixel of every run of set pixels in HxW masks.
+
+    Ends are inclusive, runs with end - start up to min_length are left out.
+    """
+    padded = np.zeros((masks.shape[0], masks.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = masks != 0
+    edges = np.diff(padded, axis=1)
+    # every row has as many starts as ends, and both are ordered by row
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    ends -= 1
+    keep = ends - starts > min_length
+    return rows[keep], starts[keep], ends[keep]
+
+
+def scanline_segments(mask: np.ndarray, min_length: int) -> list[KeySegment]:
+    """Returns the runs of set pixels in a scanline mask as key segments."""
+    _, starts, ends = row_segments(mask[np.newaxis], min_length)
+    return [
+        KeySegment(start=int(start), end=int(end))
+        for start, end in zip(starts, ends, strict=True)
+    ]
+
+
+def _longest_run(flags: np.ndarray) -> tuple[int, int]:
+    """Returns the start and length of the longest run of set flags."""
+    edges = np.diff(np.concatenate([[0], flags.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    if len(starts) == 0:
+        return 0, 0
+    lengths = np.flatnonzero(edges == -1) - starts
+    n = int(lengths.argmax())
+    return int(starts[n]), int(lengths[n])
+
+
+class FoundSegments(BaseModel):
+    segments: list[KeySegment]
+    row: int
+    hsv_range: HSVRange
+
+
+def find_segments(
+    image_hsv: np.ndarray, hsv_ranges: list[HSVRange], piano_key: PianoKey
+) -> FoundSegments:
+    """Searches the rows and HSV ranges for exactly as many segments as there are keys.
+
+    Every HSV range is applied to the whole image at once. The range with the
+    longest band of consecutive rows that have the right number of segments
+    wins, and the segments of the middle row of that band are returned.
+    """
+    min_length = noise_floor(image_hsv.shape[1])
+    best: FoundSegments | None = None
+    best_band = 0
+    for hsv_range in hsv_ranges:
+        mask = cv2.inRange(
+            image_hsv,
+            hsv_range.lower().astype(np.uint8),
+            hsv_range.upper().astype(np.uint8),
+        )
+        rows, starts, ends = row_segments(mask, min_length)
+        counts = np.bincount(rows, minlength=len(mask))
+        band_start, band = _longest_run(counts == piano_key.value)
+        if band > best_band:
+            row = band_start + band // 2
+            in_row = rows == row
+            best = FoundSegments(
+                segments=[
+                    KeySegment(start=int(start), end=int(end))
+                    for start, end in zip(starts[in_row], ends[in_row], strict=True)
+                ],
+                row=row,
+                hsv_range=hsv_range,
+            )
+            best_band = band
+    if best is None:
+        raise KeySegmentsNotFoundError(piano_key.value, piano_key.name.lower())
+    return best
+
+
+class KeySegmentsSearch(BaseModel):
+    white: FoundSegments
+    black: FoundSegments
+
+    def key_segments(self) -> KeySegments:
+        return KeySegments(white=self.white.segments, black=self.black.segments)
+
+    def __str__(self) -> str:
+        return (
+            f"Found {len(self.white.segments)} white keys on row {self.white.row} "
+            f"and {len(self.black.segments)} black keys on row {self.black.row}"
+        )
+
+
+def search_key_segments(frame: np.ndarray) -> KeySegmentsSearch:
+    """Finds the white and black key segments in a BGR frame without user input."""
+    image_hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    return KeySegmentsSearch(
+        white=find_segments(image_hsv, WHITE_KEY_RANGES, PianoKey.WHITE),
+        black=find_segments(image_hsv, BLACK_KEY_RANGES, PianoKey.BLACK),
+    )
@@ -1,60 +1,186 @@
+import array
+import csv
+from enum import IntEnum
 from pathlib import Path
 
 import mido
+import numpy as np
+import typer
 
-from piano_midi.piano_state import PianoChanges
+from piano_midi.models import Hand
+from piano_midi.note_cleanup import CleanupStats, clean_up
+from piano_midi.note_events import A0_OFFSET, NO_HAND, VELOCITY, NoteEvents
+from piano_midi.piano_state import PianoChanges, PianoPress
+from piano_midi.profiler import NULL_PROFILER, Profiler
 
-A0_OFFSET = 21
-VELOCITY = 64
+
+class Verbosity(IntEnum):
+    QUIET = 0
+    NORMAL = 1
+    VERBOSE = 2
+
+
+def _press_order(press: PianoPress) -> tuple[int, int]:
+    return (press.index, NO_HAND if press.hand is None else press.hand.value)
 
 
 class KeySequenceWriter:
-    def __init__(self, fps: float) -> None:
+    """Buffers note on/off events and writes them as a MIDI file.
+
+    Events are kept as compact columns of frame number, key index, hand and
+    on/off, and are only turned into MIDI messages on save. Every event is
+    echoed as it comes in when verbose.
+    """
+
+    def __init__(
+        self,
+        fps: float,
+        verbosity: Verbosity = Verbosity.NORMAL,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
         self.midi_file = mido.MidiFile()
         self.track = mido.MidiTrack()
         self.midi_file.tracks.append(self.track)
         self.current_frame = 0
         self.fps = fps
+        self.verbosity = verbosity
+        self.profiler = profiler
+
+        self._frames = array.array("q")
+        self._keys = array.array("b")
+        self._hands = array.array("b")  # Hand value, or NO_HAND
+        self._note_on = array.array("b")
 
     def process_change(self, piano_changes: PianoChanges, frame_num: int) -> None:
-        # Update time reference
-        frame_diff = frame_num - self.current_frame
+        with self.profiler.stage("midi events"):
+            self._buffer_change(piano_changes, frame_num)
+
+    def _buffer_change(self, piano_changes: PianoChanges, frame_num: int) -> None:
         self.current_frame = frame_num
-        time_diff = int(1000 / self.fps * frame_diff)
-
-        # Implementation for processing changes
-        for press in piano_changes.pressed:
-            self.track.append(
-                mido.Message(
-                    "note_on",
-                    note=press.index + A0_OFFSET,
-                    velocity=VELOCITY,
-                    time=time_diff,
-                )
-            )
-            time_diff = 0
-            print(
-                f"Key {press.index} ({self.to_note(press.index)}) pressed by {press.hand}"
+        # sorted, because the iteration order of the sets depends on the hash
+        # seed of the process
+        for note_on, presses in (
+            (True, piano_changes.pressed),
+            (False, piano_changes.released),
+        ):
+            for press in sorted(presses, key=_press_order):
+                self._frames.append(frame_num)
+                self._keys.append(press.index)
+                self._hands.append(NO_HAND if press.hand is None else press.hand.value)
+                self._note_on.append(note_on)
+                if self.verbosity >= Verbosity.VERBOSE:
+                    action = "pressed" if note_on else "released"
+                    typer.echo(
+                        f"Key {press.index} ({self.to_note(press.index)}) {action} by {press.hand}"
+                    )
+        if self.verbosity >= Verbosity.VERBOSE:
+            typer.echo(f"during frame {frame_num}")
+
+    @property
+    def num_events(self) -> int:
+        return len(self._frames)
+
+    def event_columns(self) -> dict[str, np.ndarray]:
+        """Returns a copy of the frame, key, hand and note_on column of all events."""
+        return {
+            "frame": np.frombuffer(self._frames, dtype=np.int64).copy(),
+            "key": np.frombuffer(self._keys, dtype=np.int8).copy(),
+            "hand": np.frombuffer(self._hands, dtype=np.int8).copy(),
+            "note_on": np.frombuffer(self._note_on, dtype=np.int8).astype(bool),
+        }
+
+    def extend_events(self, columns: dict[str, np.ndarray]) -> None:
+        """Appends events in the columns of event_columns."""
+        self._frames.frombytes(columns["frame"].astype(np.int64).tobytes())
+        self._keys.frombytes(columns["key"].astype(np.int8).tobytes())
+        self._hands.frombytes(columns["hand"].astype(np.int8).tobytes())
+        self._note_on.frombytes(columns["note_on"].astype(np.int8).tobytes())
+        if len(columns["frame"]):
+            self.current_frame = int(columns["frame"][-1])
+
+    def note_events(self) -> NoteEvents:
+        return NoteEvents(**self.event_columns(), fps=self.fps)
+
+    def clean_up(self, *, min_note_frames: int, max_gap_frames: int) -> CleanupStats:
+        """Replaces the events by the events without glitches, see note_cleanup.clean_up."""
+        with self.profiler.stage("note clean-up"):
+            note_events, stats = clean_up(
+                self.note_events(),
+                min_note_frames=min_note_frames,
+                max_gap_frames=max_gap_frames,
             )
-        for press in piano_changes.released:
-            self.track.append(
-                mido.Message(
-                    "note_off",
-                    note=press.index + A0_OFFSET,
-                    velocity=VELOCITY,
-                    time=time_diff,
-                )
+            current_frame = self.current_frame
+            for column in (self._frames, self._keys, self._hands, self._note_on):
+                del column[:]
+            self.extend_events(note_events.columns())
+            self.current_frame = current_frame
+        return stats
+
+    def _event_times(self) -> np.ndarray:
+        """Returns the delta time in milliseconds of every event.
+
+        Only the first event of a frame is delayed, by the frames since the
+        previous frame with events.
+        """
+        frames = np.frombuffer(self._frames, dtype=np.int64)
+        frame_diffs = np.diff(frames, prepend=0)
+        # truncated per frame difference, exactly like the frames were written one by one
+        return (1000 / self.fps * frame_diffs).astype(np.int64)
+
+    def build_track(self) -> None:
+        self.track.clear()
+        note_ons = np.frombuffer(self._note_on, dtype=np.int8).astype(bool)
+        notes = np.frombuffer(self._keys, dtype=np.int8).astype(np.int64) + A0_OFFSET
+        self.track.extend(
+            mido.Message(
+                "note_on" if note_on else "note_off",
+                note=note,
+                velocity=VELOCITY,
+                time=time,
             )
-            time_diff = 0
-            print(
-                f"Key {press.index} ({self.to_note(press.index)}) released by {press.hand}"
+            for note_on, note, time in zip(
+                note_ons.tolist(),
+                notes.tolist(),
+                self._event_times().tolist(),
+                strict=True,
             )
-        print(f"during frame {frame_num}")
+        )
 
     def save(self, midi_file_path: Path) -> None:
-        self.midi_file.save(midi_file_path)
-        print(f"Saved midi file of {self.midi_file.length}s to {midi_file_path}")
-        print(f"Expected length is {self.current_frame / self.fps}s")
+        with self.profiler.stage("midi save"):
+            self.build_track()
+            self.midi_file.save(midi_file_path)
+        self.profiler.count("events", self.num_events)
+        if self.verbosity >= Verbosity.NORMAL:
+            typer.echo(
+                f"Saved midi file of {self.midi_file.length}s to {midi_file_path}"
+            )
+            typer.echo(f"Expected length is {self.current_frame / self.fps}s")
+
+    def save_event_log(self, event_log_path: Path) -> None:
+        """Writes all events to a CSV file at once."""
+        times = np.cumsum(self._event_times()) / 1000
+        with event_log_path.open("w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame", "time", "key", "note", "hand", "event"])
+            writer.writerows(
+                (
+                    frame,
+                    f"{time:.3f}",
+                    key,
+                    self.to_note(key),
+                    "" if hand == NO_HAND else Hand(hand).name.lower(),
+                    "on" if note_on else "off",
+                )
+                for frame, time, key, hand, note_on in zip(
+                    self._frames,
+                    times.tolist(),
+                    self._keys,
+                    self._hands,
+                    self._note_on,
+                    strict=True,
+                )
+            )
 
     @staticmethod
     def to_note(key: int) -> str:
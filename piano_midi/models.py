@@ -73,36 +73,29 @@ class WhiteKeyIndex(BaseModel):
     value: Annotated[int, Field(strict=True, ge=0, lt=52)]
 
     def to_key_index(self) -> KeyIndex:
-        octave = self.value // 7
-        lut: dict[int, int] = {
-            0: 0,
-            1: 2,
-            2: 3,
-            3: 5,
-            4: 7,
-            5: 8,
-            6: 10,
-        }
-        key = self.value - octave * 7
-        index = lut[key] + octave * 12
-        return KeyIndex(value=index)
+        octave, key = divmod(self.value, 7)
+        return KeyIndex(value=WHITE_KEY_OFFSETS[key] + octave * 12)
 
 
 class BlackKeyIndex(BaseModel):
     value: Annotated[int, Field(strict=True, ge=0, lt=36)]
 
     def to_key_index(self) -> KeyIndex:
-        octave = self.value // 5
-        lut: dict[int, int] = {
-            0: 1,
-            1: 4,
-            2: 6,
-            3: 9,
-            4: 11,
-        }
-        key = self.value - octave * 5
-        index = lut[key] + octave * 12
-        return KeyIndex(value=index)
+        octave, key = divmod(self.value, 5)
+        return KeyIndex(value=BLACK_KEY_OFFSETS[key] + octave * 12)
+
+
+# key index of every white and black key within an octave, starting at A
+WHITE_KEY_OFFSETS = (0, 2, 3, 5, 7, 8, 10)
+BLACK_KEY_OFFSETS = (1, 4, 6, 9, 11)
+NUM_KEYS = 88
+# key index of every white and black key on the piano
+WHITE_KEY_INDICES = tuple(
+    WhiteKeyIndex(value=n).to_key_index().value for n in range(PianoKey.WHITE.value)
+)
+BLACK_KEY_INDICES = tuple(
+    BlackKeyIndex(value=n).to_key_index().value for n in range(PianoKey.BLACK.value)
+)
 
 
 class InvalidNumOfKeySegmentsError(Exception):
@@ -155,3 +148,5 @@ class KeyColors(BaseModelYaml):
     right_white: HSVRange | None = None
     left_black: HSVRange | None = None
     right_black: HSVRange | None = None
+    # share of the pixels that automatic calibration classified cleanly, None when picked by hand
+    confidence: float | None = None
@@ -0,0 +1,85 @@
+import numpy as np
+from pydantic import BaseModel
+
+from piano_midi.note_events import NoteEvents
+
+# the end frame of a note that is still pressed when the events end
+OPEN_END = np.iinfo(np.int64).max
+
+
+class CleanupStats(BaseModel):
+    events: int = 0
+    merged_gaps: int = 0
+    short_notes: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"Merged {self.merged_gaps} short releases and removed "
+            f"{self.short_notes} short notes of {self.events} note events"
+        )
+
+
+def _notes(events: NoteEvents) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pairs every note on with the note off after it, per hand and key.
+
+    Returns the event indices of the note ons and of their offs, -1 for notes
+    that are still pressed at the end, and the hand and key group of every
+    note. Notes are ordered by group and then by frame.
+    """
+    order = np.lexsort((np.arange(len(events)), events.frame, events.key, events.hand))
+    group = events.hand[order].astype(np.int64) * 256 + events.key[order]
+    note_on = events.note_on[order]
+    same_group = np.append(group[1:] == group[:-1], False)
+    is_on = np.flatnonzero(note_on)
+    has_off = same_group[is_on] & ~np.append(note_on[1:], True)[is_on]
+    offs = np.where(has_off, order[np.minimum(is_on + 1, len(order) - 1)], -1)
+    return order[is_on], offs, group[is_on]
+
+
+def _end_frames(events: NoteEvents, offs: np.ndarray) -> np.ndarray:
+    return np.where(offs >= 0, events.frame[offs].astype(np.int64), OPEN_END)
+
+
+def clean_up(
+    events: NoteEvents, *, min_note_frames: int = 1, max_gap_frames: int = 0
+) -> tuple[NoteEvents, CleanupStats]:
+    """Removes the glitches of the detection from the events.
+
+    A release that is followed by a press of the same key and hand within
+    max_gap_frames is dropped, so both notes become one. After that, notes
+    that are shorter than min_note_frames are removed. Together they form a
+    hysteresis in time: a key has to be pressed for min_note_frames to start
+    a note, and released for more than max_gap_frames to end it.
+    """
+    stats = CleanupStats(events=len(events))
+    keep = np.ones(len(events), dtype=bool)
+
+    ons, offs, group = _notes(events)
+    if max_gap_frames > 0 and len(ons) > 1:
+        gaps = events.frame[ons[1:]].astype(np.int64) - _end_frames(events, offs[:-1])
+        merge = (group[1:] == group[:-1]) & (gaps <= max_gap_frames)
+        keep[offs[:-1][merge]] = False
+        keep[ons[1:][merge]] = False
+        stats.merged_gaps = int(np.count_nonzero(merge))
+
+    if min_note_frames > 1:
+        kept = np.flatnonzero(keep)
+        kept_events = _take(events, kept)
+        ons, offs, _ = _notes(kept_events)
+        lengths = _end_frames(kept_events, offs) - kept_events.frame[ons]
+        short = lengths < min_note_frames
+        keep[kept[ons[short]]] = False
+        keep[kept[offs[short]]] = False
+        stats.short_notes = int(np.count_nonzero(short))
+
+    return _take(events, np.flatnonzero(keep)), stats
+
+
+def _take(events: NoteEvents, indices: np.ndarray) -> NoteEvents:
+    return NoteEvents(
+        frame=events.frame[indices],
+        key=events.key[indices],
+        hand=events.hand[indices],
+        note_on=events.note_on[indices],
+        fps=events.fps,
+    )
@@ -0,0 +1,131 @@
+from pathlib import Path
+from typing import Self
+
+import mido
+import numpy as np
+
+from piano_midi.models import Hand
+from piano_midi.npz import atomic_savez
+
+A0_OFFSET = 21
+VELOCITY = 64
+TICKS_PER_BEAT = 480
+BPM = 120.0
+NO_HAND = -1
+
+
+class NoteEvents:
+    """Note on and off events as columns of frame, key index, hand and on/off.
+
+    These are the detected events before any MIDI choice is made, so they
+    can be rendered again with other options without decoding the video.
+    The hand is a Hand value, or NO_HAND.
+    """
+
+    def __init__(
+        self,
+        *,
+        frame: np.ndarray,
+        key: np.ndarray,
+        hand: np.ndarray,
+        note_on: np.ndarray,
+        fps: float,
+    ) -> None:
+        self.frame = frame.astype(np.int32, copy=False)
+        self.key = key.astype(np.int8, copy=False)
+        self.hand = hand.astype(np.int8, copy=False)
+        self.note_on = note_on.astype(bool, copy=False)
+        self.fps = fps
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {
+            "frame": self.frame,
+            "key": self.key,
+            "hand": self.hand,
+            "note_on": self.note_on,
+        }
+
+    @classmethod
+    def load(cls, events_path: Path) -> Self:
+        with np.load(events_path) as data:
+            return cls(
+                frame=data["frame"],
+                key=data["key"],
+                hand=data["hand"],
+                note_on=data["note_on"],
+                fps=float(data["fps"]),
+            )
+
+    def save(self, events_path: Path) -> None:
+        atomic_savez(
+            events_path,
+            compressed=True,
+            frame=self.frame,
+            key=self.key,
+            hand=self.hand,
+            note_on=self.note_on,
+            fps=np.array(self.fps),
+        )
+
+    def ticks(
+        self, *, ticks_per_beat: int = TICKS_PER_BEAT, bpm: float = BPM
+    ) -> np.ndarray:
+        """Returns the absolute time of every event in MIDI ticks."""
+        ticks_per_frame = ticks_per_beat * bpm / 60 / self.fps
+        return np.rint(self.frame * ticks_per_frame).astype(np.int64)
+
+    def render(
+        self,
+        *,
+        split_hands: bool = False,
+        ticks_per_beat: int = TICKS_PER_BEAT,
+        bpm: float = BPM,
+    ) -> mido.MidiFile:
+        """Renders the events as a MIDI file, with a track per hand when split_hands."""
+        midi_file = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+        ticks = self.ticks(ticks_per_beat=ticks_per_beat, bpm=bpm)
+        tracks: list[tuple[int | None, str]] = [(None, "piano")]
+        if split_hands and len(self):
+            tracks = [
+                (hand_value, _track_name(hand_value))
+                for hand_value in np.unique(self.hand).tolist()
+            ]
+        for hand_value, name in tracks:
+            selected = slice(None) if hand_value is None else self.hand == hand_value
+            track = mido.MidiTrack()
+            track.append(mido.MetaMessage("track_name", name=name, time=0))
+            if not midi_file.tracks:
+                track.append(
+                    mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(bpm), time=0)
+                )
+            notes = self.key[selected].astype(np.int64) + A0_OFFSET
+            deltas = np.diff(ticks[selected], prepend=0)
+            track.extend(
+                mido.Message(
+                    "note_on" if note_on else "note_off",
+                    note=note,
+                    velocity=VELOCITY,
+                    time=delta,
+                )
+                for note_on, note, delta in zip(
+                    self.note_on[selected].tolist(),
+                    notes.tolist(),
+                    deltas.tolist(),
+                    strict=True,
+                )
+            )
+            midi_file.tracks.append(track)
+        return midi_file
+
+    def __str__(self) -> str:
+        seconds = int(self.frame[-1]) / self.fps if len(self) else 0.0
+        return f"{len(self)} note events over {seconds:.1f}s at {self.fps} frames/s"
+
+
+def _track_name(hand_value: int) -> str:
+    if hand_value == NO_HAND:
+        return "no hand"
+    return f"{Hand(hand_value).name.lower()} hand"
@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def atomic_savez(path: Path, *, compressed: bool = False, **arrays: np.ndarray) -> None:
+    """Saves arrays to an .npz file, which is replaced only once it is complete.
+
+    A process that is killed while saving leaves the previous file behind.
+    """
+    savez = np.savez_compressed if compressed else np.savez
+    # np.savez appends .npz to paths without it, so write through a file object
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as file:
+            savez(file, **arrays)  # type: ignore[arg-type]
+            file.flush()
+            os.fsync(file.fileno())
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-import copy
 from typing import Annotated
 
+import numpy as np
 from pydantic import BaseModel, Field
 
-from piano_midi.models import BlackKeyIndex, Hand, KeyIndex, WhiteKeyIndex
+from piano_midi.models import (
+    BLACK_KEY_INDICES,
+    NUM_KEYS,
+    WHITE_KEY_INDICES,
+    Hand,
+    PianoKey,
+)
 
 
 class PianoChanges(BaseModel):
@@ -21,38 +27,64 @@ class PianoPress(BaseModel):
         return hash((self.index, self.hand))
 
 
+def _to_presses(keys: np.ndarray) -> set[PianoPress]:
+    return {
+        PianoPress(index=int(key_index), hand=Hand(int(hand_value)))
+        for hand_value, key_index in zip(*np.nonzero(keys), strict=True)
+    }
+
+
 class PianoState:
+    """Pressed keys as a (hand, key index) boolean matrix."""
+
     def copy(self) -> PianoState:
-        return copy.deepcopy(self)
+        return PianoState.from_pressed(self.pressed.copy())
 
     def __init__(self) -> None:
-        self.state: set[PianoPress] = set()
+        self.pressed = np.zeros((len(Hand), NUM_KEYS), dtype=bool)
+
+    @classmethod
+    def from_pressed(cls, pressed: np.ndarray) -> PianoState:
+        """Creates a state from a (hand, key index) matrix of pressed keys, without copying it."""
+        piano_state = cls.__new__(cls)
+        piano_state.pressed = pressed
+        return piano_state
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PianoState):
+            return NotImplemented
+        return np.array_equal(self.pressed, other.pressed)
+
+    __hash__ = None  # type: ignore[assignment]
 
-    def _set_key(self, key_index: KeyIndex, *, is_pressed: bool, hand: Hand) -> None:
-        # Key is currently not pressed and is being pressed
-        piano_press = PianoPress(index=key_index.value, hand=hand)
-        if is_pressed and piano_press not in self.state:
-            self.state.add(PianoPress(index=key_index.value, hand=hand))
-        # Key is currently pressed by hand X and is being released by hand X
-        elif not is_pressed and piano_press in self.state:
-            self.state.remove(PianoPress(index=key_index.value, hand=hand))
+    def _set_key(self, key_index: int, *, is_pressed: bool, hand: Hand) -> None:
+        self.pressed[hand.value, key_index] = is_pressed
 
     def set_white_key(
         self, white_key_idx: int, *, is_pressed: bool, hand: Hand
     ) -> None:
-        white_key_index = WhiteKeyIndex(value=white_key_idx)
-        key_index = white_key_index.to_key_index()
-        self._set_key(key_index, is_pressed=is_pressed, hand=hand)
+        if not 0 <= white_key_idx < PianoKey.WHITE.value:
+            msg = f"Invalid white key index {white_key_idx}. Must be between 0 and {PianoKey.WHITE.value - 1}"
+            raise ValueError(msg)
+        self._set_key(
+            WHITE_KEY_INDICES[white_key_idx], is_pressed=is_pressed, hand=hand
+        )
 
     def set_black_key(
         self, black_key_idx: int, *, is_pressed: bool, hand: Hand
     ) -> None:
-        key_index = BlackKeyIndex(value=black_key_idx).to_key_index()
-        self._set_key(key_index, is_pressed=is_pressed, hand=hand)
+        if not 0 <= black_key_idx < PianoKey.BLACK.value:
+            msg = f"Invalid black key index {black_key_idx}. Must be between 0 and {PianoKey.BLACK.value - 1}"
+            raise ValueError(msg)
+        self._set_key(
+            BLACK_KEY_INDICES[black_key_idx], is_pressed=is_pressed, hand=hand
+        )
 
     def detect_changes(self, old_state: PianoState) -> PianoChanges:
         # find what is present in current state but not in old state
-        pressed = self.state - old_state.state
+        pressed = self.pressed & ~old_state.pressed
         # find what is present in old state but not in current state
-        released = old_state.state - self.state
-        return PianoChanges(pressed=pressed, released=released)
+        released = old_state.pressed & ~self.pressed
+        return PianoChanges(
+            pressed=_to_presses(pressed), released=_to_presses(released)
+        )
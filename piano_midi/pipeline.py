@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+_DONE = object()
+_POLL_INTERVAL = 0.1  # seconds between checks whether the pipeline was stopped
+
+
+class StageStats(BaseModel):
+    name: str
+    busy_seconds: float = 0.0
+    items: int = 0
+
+
+class PipelineStats(BaseModel):
+    stages: list[StageStats]
+    seconds: float = 0.0
+
+    def utilisation(self, stage: StageStats) -> float:
+        if self.seconds == 0:
+            return 0.0
+        return stage.busy_seconds / self.seconds
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"Stage {stage.name}: {self.utilisation(stage):.0%} busy, "
+            f"{stage.items} items in {stage.busy_seconds:.2f}s"
+            for stage in self.stages
+        )
+
+
+class _Pipeline:
+    def __init__(self, names: tuple[str, str, str], queue_size: int) -> None:
+        self.stop = threading.Event()
+        self.errors: list[BaseException] = []
+        self.stats = PipelineStats(stages=[StageStats(name=name) for name in names])
+        self.sourced: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+        self.transformed: queue.Queue[Any] = queue.Queue(maxsize=queue_size)
+
+    def put(self, items: queue.Queue[Any], item: object) -> None:
+        while not self.stop.is_set():
+            try:
+                items.put(item, timeout=_POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return
+
+    def get(self, items: queue.Queue[Any]) -> Any:  # noqa: ANN401
+        while not self.stop.is_set():
+            try:
+                return items.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fail(self, error: BaseException) -> None:
+        self.errors.append(error)
+        self.stop.set()
+
+    def run_source(self, source: Iterator[Any]) -> None:
+        stage = self.stats.stages[0]
+        try:
+            while not self.stop.is_set():
+                t_start = time.perf_counter()
+                try:
+                    item = next(source)
+                except StopIteration:
+                    break
+                finally:
+                    stage.busy_seconds += time.perf_counter() - t_start
+                stage.items += 1
+                self.put(self.sourced, item)
+            self.put(self.sourced, _DONE)
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    def run_transform(self, transform: Callable[[Any], Any]) -> None:
+        stage = self.stats.stages[1]
+        try:
+            while (item := self.get(self.sourced)) is not _DONE:
+                t_start = time.perf_counter()
+                result = transform(item)
+                stage.busy_seconds += time.perf_counter() - t_start
+                stage.items += 1
+                self.put(self.transformed, result)
+            self.put(self.transformed, _DONE)
+        except BaseException as e:
+            self.fail(e)
+
+    def run_sink(self, sink: Callable[[Any], None]) -> None:
+        stage = self.stats.stages[2]
+        while (result := self.get(self.transformed)) is not _DONE:
+            t_start = time.perf_counter()
+            sink(result)
+            stage.busy_seconds += time.perf_counter() - t_start
+            stage.items += 1
+
+
+def run_pipeline(  # noqa: UP047
+    source: Iterator[T],
+    transform: Callable[[T], U],
+    sink: Callable[[U], None],
+    *,
+    names: tuple[str, str, str] = ("source", "transform", "sink"),
+    queue_size: int = 4,
+) -> PipelineStats:
+    """Runs source, transform and sink as concurrent stages connected by bounded queues.
+
+    The source and transform each run in a thread and the sink runs in the
+    calling thread. A full queue blocks the stage before it, and an error or
+    KeyboardInterrupt in any stage stops all of them and is raised here.
+    """
+    pipeline = _Pipeline(names, queue_size)
+    threads = [
+        threading.Thread(
+            target=pipeline.run_source, args=(source,), name=names[0], daemon=True
+        ),
+        threading.Thread(
+            target=pipeline.run_transform,
+            args=(transform,),
+            name=names[1],
+            daemon=True,
+        ),
+    ]
+    t_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        pipeline.run_sink(sink)
+    except BaseException as e:
+        pipeline.fail(e)
+    finally:
+        pipeline.stop.set()
+        for thread in threads:
+            thread.join()
+        pipeline.stats.seconds = time.perf_counter() - t_start
+    if pipeline.errors:
+        raise pipeline.errors[0]
+    return pipeline.stats
@@ -0,0 +1,41 @@
+import numpy as np
+
+# the largest preview that fits on a common screen
+PREVIEW_WIDTH = 1920
+PREVIEW_HEIGHT = 1000
+# milliseconds to wait for a key, long enough that an idle UI barely uses the CPU
+WAIT_KEY_MS = 30
+
+
+class Preview:
+    """Every step-th pixel of an image, so that it fits on the screen.
+
+    Rows and columns are subsampled by their own power of two steps, a long
+    time slice keeps its width. Pixels are picked instead of averaged, so the
+    preview only holds colors that are in the image.
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        max_width: int = PREVIEW_WIDTH,
+        max_height: int = PREVIEW_HEIGHT,
+    ) -> None:
+        self.row_step = _step(image.shape[0], max_height)
+        self.column_step = _step(image.shape[1], max_width)
+        self.image = np.ascontiguousarray(image[:: self.row_step, :: self.column_step])
+
+    def to_image(self, x: int, y: int) -> tuple[int, int]:
+        """Returns the image coordinates of a preview pixel."""
+        return x * self.column_step, y * self.row_step
+
+    def to_preview(self, x: int, y: int) -> tuple[int, int]:
+        """Returns the preview coordinates of an image pixel."""
+        return x // self.column_step, y // self.row_step
+
+
+def _step(size: int, max_size: int) -> int:
+    step = 1
+    while -(-size // step) > max_size:
+        step *= 2
+    return step
@@ -0,0 +1,136 @@
+import contextlib
+import cProfile
+import resource
+import time
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager
+from pathlib import Path
+
+from pydantic import BaseModel
+
+
+class StageProfile(BaseModel):
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+
+class ProfileReport(BaseModel):
+    command: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_mb: float
+    peak_children_rss_mb: float
+    stages: dict[str, StageProfile]
+    counters: dict[str, int]
+
+    def save(self, report_path: Path) -> None:
+        report_path.write_text(self.model_dump_json(indent=2))
+
+
+HotLoopHook = Callable[[], AbstractContextManager[object]]
+
+
+class CProfileHook:
+    """Runs cProfile over the hot loop and dumps its stats to stats_path."""
+
+    def __init__(self, stats_path: Path) -> None:
+        self.stats_path = stats_path
+
+    @contextlib.contextmanager
+    def __call__(self) -> Generator[None, None, None]:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(self.stats_path)
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+class Profiler:
+    """Records the wall and CPU time per stage and counts of processed items.
+
+    CPU time is the time of the whole process, so stages that run in other
+    threads at the same time are included. Hot loop hooks are context
+    managers that wrap the hot loop only, for example CProfileHook.
+    """
+
+    enabled = True
+
+    def __init__(self, hot_loop_hooks: list[HotLoopHook] | None = None) -> None:
+        self.hot_loop_hooks = hot_loop_hooks or []
+        self.stages: dict[str, StageProfile] = {}
+        self.counters: dict[str, int] = {}
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def stage(self, name: str) -> AbstractContextManager[None]:
+        """Adds the wall and CPU time of the block to the stage."""
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name: str) -> Generator[None, None, None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, StageProfile())
+            stage.calls += 1
+            stage.wall_seconds += time.perf_counter() - wall_start
+            stage.cpu_seconds += time.process_time() - cpu_start
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def hot_loop(self) -> AbstractContextManager[object]:
+        stack = contextlib.ExitStack()
+        for hook in self.hot_loop_hooks:
+            stack.enter_context(hook())
+        return stack
+
+    def merge(self, stages: dict[str, StageProfile], counters: dict[str, int]) -> None:
+        """Adds the stages and counters recorded by another profiler, e.g. in a worker process."""
+        for name, other in stages.items():
+            stage = self.stages.setdefault(name, StageProfile())
+            stage.calls += other.calls
+            stage.wall_seconds += other.wall_seconds
+            stage.cpu_seconds += other.cpu_seconds
+        for name, n in counters.items():
+            self.count(name, n)
+
+    def report(self, command: str) -> ProfileReport:
+        return ProfileReport(
+            command=command,
+            wall_seconds=time.perf_counter() - self._wall_start,
+            cpu_seconds=time.process_time() - self._cpu_start,
+            peak_rss_mb=_peak_rss_mb(resource.RUSAGE_SELF),
+            peak_children_rss_mb=_peak_rss_mb(resource.RUSAGE_CHILDREN),
+            stages=self.stages,
+            counters=self.counters,
+        )
+
+
+class NullProfiler(Profiler):
+    """Profiler that records nothing, the default of every component."""
+
+    enabled = False
+
+    def stage(self, name: str) -> AbstractContextManager[None]:  # noqa: ARG002
+        return _NULL_CONTEXT
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def hot_loop(self) -> AbstractContextManager[object]:
+        return _NULL_CONTEXT
+
+
+_NULL_CONTEXT = contextlib.nullcontext()
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,114 @@
+import contextlib
+import hashlib
+import os
+import re
+from collections.abc import Generator
+from pathlib import Path
+
+import numpy as np
+
+from piano_midi.defaults import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+
+FINGERPRINT_SAMPLE_BYTES = 1024**2
+# <fingerprint>_<scan line>_<band>_<start>_<end>, see ScanlineCache._prefix
+ENTRY_NAME = re.compile(r"[0-9a-f]{32}(_\d+){4}")
+
+
+def video_fingerprint(video_path: Path) -> str:
+    """Hashes the size and the first, middle and last megabyte of the video."""
+    size = video_path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with video_path.open("rb") as file:
+        for offset in (0, size // 2, max(size - FINGERPRINT_SAMPLE_BYTES, 0)):
+            file.seek(offset)
+            digest.update(file.read(FINGERPRINT_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+class ScanlineCache:
+    """Stores the scanlines of a video on disk as memory mapped .npy arrays.
+
+    Entries are keyed by a fingerprint of the video content, the scan line,
+    the band height and the frame range, so a rerun with other colors or key
+    segments reads the scanlines from disk instead of decoding the video.
+    The least recently used entries are removed once the cache grows beyond
+    max_bytes.
+    """
+
+    def __init__(
+        self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._fingerprints: dict[Path, str] = {}
+
+    def fingerprint(self, video_path: Path) -> str:
+        if video_path not in self._fingerprints:
+            self._fingerprints[video_path] = video_fingerprint(video_path)
+        return self._fingerprints[video_path]
+
+    def _prefix(self, video_path: Path, scan_line_px: int, band: int) -> str:
+        return f"{self.fingerprint(video_path)}_{scan_line_px}_{band}"
+
+    def find(
+        self, video_path: Path, scan_line_px: int, band: int, start: int, end: int
+    ) -> tuple[np.ndarray, int] | None:
+        """Returns the cached scanlines that contain [start, end) and the frame number of the first one."""
+        prefix = self._prefix(video_path, scan_line_px, band)
+        for path in self.cache_dir.glob(f"{prefix}_*_*.npy"):
+            cached_start, cached_end = (int(n) for n in path.stem.split("_")[-2:])
+            if cached_start <= start and end <= cached_end:
+                # touch the entry, the modification time orders the entries for eviction
+                path.touch()
+                return np.load(path, mmap_mode="r"), cached_start
+        return None
+
+    @contextlib.contextmanager
+    def store(
+        self,
+        video_path: Path,
+        scan_line_px: int,
+        band: int,
+        start: int,
+        end: int,
+        *,
+        shape: tuple[int, int, int],
+    ) -> Generator[np.ndarray, None, None]:
+        """Yields a memory mapped array for the scanlines of [start, end) to fill.
+
+        The entry only becomes visible once the block exits without an error.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        prefix = self._prefix(video_path, scan_line_px, band)
+        path = self.cache_dir / f"{prefix}_{start}_{end}.npy"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        scanlines = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.uint8, shape=(end - start, *shape)
+        )
+        try:
+            yield scanlines
+            scanlines.flush()
+            del scanlines
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self.evict(keep=path)
+
+    def entries(self) -> list[Path]:
+        """Returns the entries of the cache, other files in the directory are left alone."""
+        return [
+            path
+            for path in self.cache_dir.glob("*_*_*_*_*.npy")
+            if ENTRY_NAME.fullmatch(path.stem)
+        ]
+
+    def evict(self, keep: Path | None = None) -> None:
+        entries = sorted(self.entries(), key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
@@ -1,3 +1,7 @@
+import math
+from pathlib import Path
+from typing import cast
+
 import numpy as np
 import typer
 
@@ -9,21 +13,53 @@ class TimeSlicer:
         self.video_capture = video_capture
 
     def generate(
-        self, frame_start: int, frame_end: int | None, scan_line_px: int
+        self,
+        frame_start: int,
+        frame_end: int | None,
+        scan_line_px: int,
+        *,
+        stride: int = 1,
+        max_rows: int | None = None,
+        memmap_path: Path | None = None,
     ) -> np.ndarray:
+        """Stacks the scanline of every stride-th frame into a time slice.
+
+        The time slice is allocated up front from the frame range, in memory
+        or as a .npy file at memmap_path. With max_rows the stride is raised
+        until the time slice has at most that many rows.
+        """
         with self.video_capture as cap:
             _frame_start = frame_start or 0
-            if cap.frame_count:
-                _frame_end = min(frame_end or cap.frame_count - 1, cap.frame_count - 1)
+            if not cap.frame_count:
+                msg = "VideoCapture does not have a frame count"
+                raise ValueError(msg)
+            _frame_end = min(frame_end or cap.frame_count - 1, cap.frame_count - 1)
+            num_frames = max(_frame_end - _frame_start, 0)
+            if max_rows is not None:
+                stride = max(stride, math.ceil(num_frames / max_rows))
+            shape = (math.ceil(num_frames / stride), cast(int, cap.width), 3)
+            if memmap_path is None:
+                timeslice = np.empty(shape, dtype=np.uint8)
+                location = "of memory"
             else:
-                typer.echo(message="VideoCapture does not have a frame count")
-                typer.Exit(code=1)
-
-            timeslice = []
+                timeslice = np.lib.format.open_memmap(
+                    memmap_path, mode="w+", dtype=np.uint8, shape=shape
+                )
+                location = f"on disk at {memmap_path}"
+            typer.echo(
+                f"Time slice of {shape[0]} rows, one every {stride} frames, "
+                f"takes {math.prod(shape) / 1024**2:.1f} MiB {location}"
+            )
 
-            cap.set_frame(_frame_start)
-            for frame, _ in cap.read_range(_frame_start, _frame_end):
-                scan_line = frame[scan_line_px, :, :]
-                timeslice.append(scan_line)
+            num_rows = 0
+            with cap.profiler.hot_loop():
+                for line, _ in cap.read_scanlines(
+                    _frame_start, _frame_end, scan_line_px=scan_line_px, step=stride
+                ):
+                    timeslice[num_rows] = line[0]
+                    num_rows += 1
+            cap.profiler.count("frames", num_rows)
+            typer.echo(str(cap.read_stats))
 
-            return np.array(timeslice)
+            # the frame count of a video is an estimate, so fewer frames can be read
+            return timeslice[:num_rows]
@@ -1,27 +1,99 @@
-from collections.abc import Generator
+import importlib.util
+import io
+import itertools
+import shutil
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Generator
 from pathlib import Path
 from types import TracebackType
-from typing import Any
+from typing import Any, cast
 
 import cv2
+import numpy as np
+import typer
+from pydantic import BaseModel
+
+from piano_midi.defaults import VideoBackend
+from piano_midi.profiler import NULL_PROFILER, Profiler
+from piano_midi.scanline_cache import ScanlineCache
+
+# the video path that reads the video from standard input
+STDIN = "-"
+
+
+def is_stream(video_path: str | Path) -> bool:
+    """Returns whether the video is read from standard input or a named pipe."""
+    return str(video_path) == STDIN or Path(video_path).is_fifo()
+
+
+class ReadStats(BaseModel):
+    frames_decoded: int = 0
+    frames_grabbed: int = 0
+    frames_cached: int = 0
+    seconds: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        if self.seconds == 0:
+            return 0.0
+        frames = self.frames_decoded + self.frames_grabbed + self.frames_cached
+        return frames / self.seconds
+
+    def merge(self, other: "ReadStats") -> None:
+        self.frames_decoded += other.frames_decoded
+        self.frames_grabbed += other.frames_grabbed
+        self.frames_cached += other.frames_cached
+        self.seconds += other.seconds
+
+    def __str__(self) -> str:
+        return (
+            f"Decoded {self.frames_decoded} frames (grabbed {self.frames_grabbed}, "
+            f"cached {self.frames_cached}) in {self.seconds:.2f}s ({self.fps:.1f} frames/s)"
+        )
 
 
 class VideoCapture:
-    def __init__(self, video_path: str | Path) -> None:
+    """Reads the frames of a video file through OpenCV.
+
+    A stream, standard input or a named pipe, is decoded as the bytes come
+    in. It has no frame count, can not seek and is read until it ends.
+    """
+
+    def __init__(
+        self,
+        video_path: str | Path,
+        scanline_cache: ScanlineCache | None = None,
+        *,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
         self.video_path: Path = Path(video_path)
+        self.scanline_cache = scanline_cache
+        self.profiler = profiler
         self.cap: cv2.VideoCapture | None = None
         self._properties: dict[str, Any] = {}
+        self._frame_buffer: np.ndarray | None = None
+        self.read_stats = ReadStats()
+        self.is_stream = is_stream(video_path)
+        # the number of frames read from a stream so far
+        self._stream_position = 0
         self._validate_file()
 
     def _validate_file(self) -> None:
+        if str(self.video_path) == STDIN:
+            return
         if not self.video_path.exists():
             msg = f"Video file not found: {self.video_path}"
             raise FileNotFoundError(msg)
-        if not self.video_path.is_file():
+        if self.video_path.is_dir():
             msg = f"Expected a file, got a directory: {self.video_path}"
             raise IsADirectoryError(msg)
 
     def _initialize_capture(self) -> None:
+        if self.is_stream:
+            self._initialize_stream()
+            return
         self.cap = cv2.VideoCapture(str(self.video_path))
         if not self.cap.isOpened():
             msg = f"Unable to open video file: {self.video_path}"
@@ -34,6 +106,23 @@ class VideoCapture:
             "frame_count": int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
         }
 
+    def _initialize_stream(self) -> None:
+        # a stream can only be read once, so it stays open between with blocks
+        if self.cap is not None:
+            return
+        source = "pipe:0" if str(self.video_path) == STDIN else str(self.video_path)
+        self.cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+        if not self.cap.isOpened():
+            msg = f"Unable to open video stream: {self.video_path}, streams need a container that does not have to seek, like mkv, webm or mpegts"
+            raise OSError(msg)
+        # the frame count in the header of a stream, if any, can not be trusted
+        self._properties = {
+            "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "fps": self.cap.get(cv2.CAP_PROP_FPS),
+            "frame_count": None,
+        }
+
     def __enter__(self) -> "VideoCapture":
         self._initialize_capture()
         return self
@@ -44,7 +133,8 @@ class VideoCapture:
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
-        self.release()
+        if not self.is_stream:
+            self.release()
 
     def __str__(self) -> str:
         if not self._properties:
@@ -56,10 +146,18 @@ class VideoCapture:
             f"Frame Count: {self._properties['frame_count']}"
         )
 
+    def _check_seekable(self) -> None:
+        if self.is_stream:
+            msg = (
+                f"Can not seek in the stream {self.video_path}, use read_range instead"
+            )
+            raise ValueError(msg)
+
     def get_frame(self, frame_number: int) -> cv2.typing.MatLike:
         if not self.cap:
             msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
             raise RuntimeError(msg)
+        self._check_seekable()
         if frame_number < 0 or frame_number >= self._properties["frame_count"]:
             msg = f"Invalid frame number. Must be between 0 and {self._properties['frame_count'] - 1}"
             raise ValueError(msg)
@@ -75,29 +173,212 @@ class VideoCapture:
         if not self.cap:
             msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
             raise RuntimeError(msg)
+        self._check_seekable()
         if frame_number < 0 or frame_number >= self._properties["frame_count"]:
             msg = f"Invalid frame number. Must be between 0 and {self._properties['frame_count'] - 1}"
             raise ValueError(msg)
         self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
 
     def read_range(
-        self, start: int = 0, end: int | None = None
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        step: int = 1,
+        sequential: bool = True,
     ) -> Generator[tuple[cv2.typing.MatLike, int], None, None]:
+        """Yields every `step`-th frame in [start, end) together with its number.
+
+        In sequential mode the capture seeks once and decodes forward, skipped
+        frames are only grabbed and every frame is decoded into the same
+        buffer, so a yielded frame is only valid until the next one is read.
+        """
         if not self.cap:
             msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
             raise RuntimeError(msg)
+        if self.is_stream:
+            yield from self._read_stream(start, end, step)
+            return
+        end = self._validate_range(start, end, step)
+
+        if sequential:
+            yield from self._read_range_sequential(start, end, step)
+            return
+
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        try:
+            for frame_number in range(start, end, step):
+                with self.profiler.stage("seek"):
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                with self.profiler.stage("decode"):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    msg = f"Unable to read frame {frame_number}"
+                    raise OSError(msg)
+                self.read_stats.frames_decoded += 1
+                yield (frame, frame_number)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+
+    def _read_stream(
+        self, start: int, end: int | None, step: int
+    ) -> Generator[tuple[cv2.typing.MatLike, int], None, None]:
+        """Reads forward from the current position of the stream until end or until it ends.
+
+        Frames before start are grabbed, a start before the current position
+        can not be read anymore.
+        """
+        if start < self._stream_position:
+            msg = f"Frame {start} was already read from the stream, the next frame is {self._stream_position}"
+            raise ValueError(msg)
+        if step < 1:
+            msg = f"Invalid step {step}. Must be at least 1"
+            raise ValueError(msg)
+        cap = cast(cv2.VideoCapture, self.cap)
+        buffer = self._get_frame_buffer()
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        try:
+            for frame_number in itertools.count(self._stream_position):
+                if end is not None and frame_number >= end:
+                    return
+                if frame_number < start or (frame_number - start) % step:
+                    with self.profiler.stage("grab"):
+                        grabbed = cap.grab()
+                    if not grabbed:
+                        return
+                    self._stream_position += 1
+                    self.read_stats.frames_grabbed += 1
+                    continue
+                with self.profiler.stage("decode"):
+                    ret, frame = cap.read(image=buffer)
+                if not ret:
+                    return
+                self._stream_position += 1
+                self.read_stats.frames_decoded += 1
+                yield (frame, frame_number)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+
+    def _validate_range(self, start: int, end: int | None, step: int) -> int:
         end = end or self._properties["frame_count"] - 1
         if start < 0 or end >= self._properties["frame_count"]:
             msg = f"Invalid frame range. Must be between 0 and {self._properties['frame_count'] - 1}"
             raise ValueError(msg)
+        if step < 1:
+            msg = f"Invalid step {step}. Must be at least 1"
+            raise ValueError(msg)
+        return end
 
-        for frame_number in range(start, end):
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = self.cap.read()
-            if not ret:
-                msg = f"Unable to read frame {frame_number}"
-                raise OSError(msg)
-            yield (frame, frame_number)
+    def _get_frame_buffer(self) -> np.ndarray:
+        shape = (self._properties["height"], self._properties["width"], 3)
+        if self._frame_buffer is None or self._frame_buffer.shape != shape:
+            self._frame_buffer = np.empty(shape, dtype=np.uint8)
+        return self._frame_buffer
+
+    def _read_range_sequential(
+        self, start: int, end: int, step: int
+    ) -> Generator[tuple[cv2.typing.MatLike, int], None, None]:
+        cap = cast(cv2.VideoCapture, self.cap)
+        buffer = self._get_frame_buffer()
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        try:
+            with self.profiler.stage("seek"):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for frame_number in range(start, end):
+                if (frame_number - start) % step:
+                    with self.profiler.stage("grab"):
+                        grabbed = cap.grab()
+                    if not grabbed:
+                        msg = f"Unable to grab frame {frame_number}"
+                        raise OSError(msg)
+                    self.read_stats.frames_grabbed += 1
+                    continue
+                with self.profiler.stage("decode"):
+                    ret, frame = cap.read(image=buffer)
+                if not ret:
+                    msg = f"Unable to read frame {frame_number}"
+                    raise OSError(msg)
+                self.read_stats.frames_decoded += 1
+                yield (frame, frame_number)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+
+    def read_scanlines(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        scan_line_px: int,
+        band: int = 1,
+        step: int = 1,
+        store: bool = True,
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        """Like read_range, but only yields the `band` rows starting at `scan_line_px`.
+
+        With a scanline cache, cached rows are read from disk and the rows of
+        complete ranges that are not cached yet are stored while reading,
+        unless store is False.
+        """
+        # a stream has no fingerprint, so it is never cached
+        if self.scanline_cache is None or self.is_stream:
+            yield from self._read_scanlines(
+                start, end, scan_line_px=scan_line_px, band=band, step=step
+            )
+            return
+        if not self._properties:
+            msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
+            raise RuntimeError(msg)
+        end = self._validate_range(start, end, step)
+        cached = self.scanline_cache.find(
+            self.video_path, scan_line_px, band, start, end
+        )
+        if cached is not None:
+            yield from self._read_cached_scanlines(*cached, start, end, step)
+        elif step > 1 or not store:
+            yield from self._read_scanlines(
+                start, end, scan_line_px=scan_line_px, band=band, step=step
+            )
+        else:
+            with self.scanline_cache.store(
+                self.video_path,
+                scan_line_px,
+                band,
+                start,
+                end,
+                shape=(band, self._properties["width"], 3),
+            ) as scanlines:
+                for line, frame_number in self._read_scanlines(
+                    start, end, scan_line_px=scan_line_px, band=band
+                ):
+                    scanlines[frame_number - start] = line
+                    yield (line, frame_number)
+
+    def _read_cached_scanlines(
+        self, scanlines: np.ndarray, cached_start: int, start: int, end: int, step: int
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        try:
+            for frame_number in range(start, end, step):
+                self.read_stats.frames_cached += 1
+                yield (scanlines[frame_number - cached_start], frame_number)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+
+    def _read_scanlines(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        scan_line_px: int,
+        band: int = 1,
+        step: int = 1,
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        for frame, frame_number in self.read_range(start, end, step=step):
+            yield (frame[scan_line_px : scan_line_px + band], frame_number)
 
     def read(self) -> tuple[bool, cv2.typing.MatLike]:
         if not self.cap:
@@ -125,3 +406,405 @@ class VideoCapture:
     @property
     def frame_count(self) -> int | None:
         return self._properties.get("frame_count")
+
+
+class _ForwardVideoCapture(VideoCapture, ABC):
+    """A backend that only decodes forward from a frame, without an OpenCV capture.
+
+    set_frame and read emulate the read position of OpenCV: read decodes
+    forward from the position, and set_frame restarts decoding there.
+    """
+
+    def __init__(
+        self,
+        video_path: str | Path,
+        scanline_cache: ScanlineCache | None = None,
+        *,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
+        super().__init__(video_path, scanline_cache, profiler=profiler)
+        self._position = 0
+        self._reader: Generator[tuple[np.ndarray, int], None, None] | None = None
+
+    @abstractmethod
+    def _check_initialized(self) -> None:
+        """Raises a RuntimeError when the backend is not initialized."""
+
+    @abstractmethod
+    def _read_from(self, start: int) -> Generator[tuple[np.ndarray, int], None, None]:
+        """Yields every frame from start on, in BGR."""
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def set_frame(self, frame_number: int) -> None:
+        self._check_initialized()
+        if frame_number < 0 or frame_number >= self._properties["frame_count"]:
+            msg = f"Invalid frame number. Must be between 0 and {self._properties['frame_count'] - 1}"
+            raise ValueError(msg)
+        self._close_reader()
+        self._position = frame_number
+
+    def read(self) -> tuple[bool, cv2.typing.MatLike]:
+        self._check_initialized()
+        if self._reader is None:
+            self._reader = self._read_from(self._position)
+        try:
+            frame = next(self._reader, None)
+        except OSError:
+            # the frame count is an estimate, so the video can end earlier
+            frame = None
+        if frame is None:
+            self._close_reader()
+            return False, np.empty((0, 0, 3), dtype=np.uint8)
+        image, frame_number = frame
+        self._position = frame_number + 1
+        return True, image.copy()
+
+    def release(self) -> None:
+        self._close_reader()
+        super().release()
+
+
+class FFmpegVideoCapture(_ForwardVideoCapture):
+    """Decodes through an ffmpeg subprocess that pipes raw BGR rows.
+
+    Scanline reads crop the frame inside ffmpeg, so only the requested band
+    of rows crosses the pipe and is copied into a reusable buffer. read keeps
+    a pipe open from the read position, which set_frame restarts.
+    """
+
+    FFMPEG = "ffmpeg"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which(cls.FFMPEG) is not None
+
+    def _initialize_capture(self) -> None:
+        # probe the stream through OpenCV, so both backends agree on the properties
+        super()._initialize_capture()
+        super().release()
+
+    def _check_initialized(self) -> None:
+        if not self._properties:
+            msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
+            raise RuntimeError(msg)
+
+    def _ffmpeg_command(
+        self, start: int, num_frames: int, y: int, rows: int
+    ) -> list[str]:
+        command = [self.FFMPEG, "-v", "error", "-nostdin"]
+        if start > 0:
+            # accurate seeking snaps to the nearest frame, so aim at its timestamp
+            command += ["-ss", f"{start / self._properties['fps']:.6f}"]
+        command += [
+            "-i",
+            str(self.video_path),
+            "-an",
+            "-sn",
+            "-frames:v",
+            str(num_frames),
+        ]
+        if rows != self._properties["height"]:
+            command += ["-vf", f"crop=iw:{rows}:0:{y}"]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        return command
+
+    def _read_rows(
+        self, start: int, end: int, step: int, y: int, rows: int
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        # chroma subsampled sources can only be cropped on even rows
+        band_start = y - y % 2
+        band_end = min(y + rows + (y + rows) % 2, self._properties["height"])
+        buffer = np.empty(
+            (band_end - band_start, self._properties["width"], 3), dtype=np.uint8
+        )
+        view = buffer.data.cast("B")
+        rows_view = buffer[y - band_start : y - band_start + rows]
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        process = subprocess.Popen(  # noqa: S603
+            self._ffmpeg_command(start, end - start, band_start, len(buffer)),
+            stdout=subprocess.PIPE,
+        )
+        stdout = cast(io.BufferedReader, process.stdout)
+        try:
+            for frame_number in range(start, end):
+                with self.profiler.stage("decode"):
+                    num_bytes = stdout.readinto(view)
+                if num_bytes != buffer.nbytes:
+                    msg = f"Unable to read frame {frame_number}"
+                    raise OSError(msg)
+                if (frame_number - start) % step:
+                    self.read_stats.frames_grabbed += 1
+                    continue
+                self.read_stats.frames_decoded += 1
+                yield (rows_view, frame_number)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+            process.kill()
+            process.wait()
+            stdout.close()
+
+    def get_frame(self, frame_number: int) -> cv2.typing.MatLike:
+        self._check_initialized()
+        if frame_number < 0 or frame_number >= self._properties["frame_count"]:
+            msg = f"Invalid frame number. Must be between 0 and {self._properties['frame_count'] - 1}"
+            raise ValueError(msg)
+        for frame, _ in self._read_rows(
+            frame_number, frame_number + 1, 1, 0, self._properties["height"]
+        ):
+            return frame.copy()
+        msg = f"Unable to read frame {frame_number}"
+        raise OSError(msg)
+
+    def _read_from(self, start: int) -> Generator[tuple[np.ndarray, int], None, None]:
+        return self._read_rows(
+            start,
+            self._properties["frame_count"],
+            1,
+            0,
+            self._properties["height"],
+        )
+
+    def read_range(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        step: int = 1,
+        sequential: bool = True,  # noqa: ARG002
+    ) -> Generator[tuple[cv2.typing.MatLike, int], None, None]:
+        # the pipe always decodes sequentially
+        self._check_initialized()
+        end = self._validate_range(start, end, step)
+        yield from self._read_rows(start, end, step, 0, self._properties["height"])
+
+    def _read_scanlines(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        scan_line_px: int,
+        band: int = 1,
+        step: int = 1,
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        self._check_initialized()
+        end = self._validate_range(start, end, step)
+        if scan_line_px < 0 or scan_line_px + band > self._properties["height"]:
+            msg = f"Invalid scan line. Must be between 0 and {self._properties['height'] - band}"
+            raise ValueError(msg)
+        yield from self._read_rows(start, end, step, scan_line_px, band)
+
+
+class PyAVVideoCapture(_ForwardVideoCapture):
+    """Decodes with PyAV, which lets libav decode on multiple threads.
+
+    Frames with limited range yuv420p pixels, as in most H.264 and VP9
+    downloads, are not converted to BGR as a whole. Scanline reads only
+    convert the requested band of rows, every other pixel format is
+    converted by libav. read decodes forward from the read position.
+    """
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("av") is not None
+
+    def __init__(
+        self,
+        video_path: str | Path,
+        scanline_cache: ScanlineCache | None = None,
+        *,
+        profiler: Profiler = NULL_PROFILER,
+    ) -> None:
+        super().__init__(video_path, scanline_cache, profiler=profiler)
+        self.container: Any = None
+        self.stream: Any = None
+
+    def _initialize_capture(self) -> None:
+        import av  # noqa: PLC0415
+
+        # probe the stream through OpenCV, so all backends agree on the properties
+        super()._initialize_capture()
+        super().release()
+        self.container = av.open(str(self.video_path))
+        self.stream = self.container.streams.video[0]
+        # decode several frames at once, and split frames into slices
+        self.stream.thread_type = "AUTO"
+
+    def _check_initialized(self) -> None:
+        if self.container is None:
+            msg = "VideoCapture is not initialized. Use with 'with' statement or call _initialize_capture() first."
+            raise RuntimeError(msg)
+
+    def _frame_number(self, frame: Any) -> int:  # noqa: ANN401
+        pts = frame.pts - (self.stream.start_time or 0)
+        return round(float(pts * self.stream.time_base) * self._properties["fps"])
+
+    def _decode(self, start: int, end: int) -> Generator[tuple[Any, int], None, None]:
+        """Yields the frames in [start, end) in their native pixel format."""
+        with self.profiler.stage("seek"):
+            # seeking lands on the key frame before start, decode forward from there
+            pts = int(start / self._properties["fps"] / self.stream.time_base)
+            self.container.seek(
+                pts + (self.stream.start_time or 0), stream=self.stream, backward=True
+            )
+        frames = self.container.decode(self.stream)
+        while True:
+            with self.profiler.stage("decode"):
+                frame = next(frames, None)
+            if frame is None:
+                return
+            frame_number = self._frame_number(frame)
+            if frame_number >= end:
+                return
+            if frame_number >= start:
+                yield (frame, frame_number)
+
+    def _read_frames(
+        self,
+        start: int,
+        end: int,
+        step: int,
+        convert: Callable[[Any], np.ndarray],
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        self.read_stats = ReadStats()
+        t_start = time.perf_counter()
+        expected = start
+        try:
+            for frame, frame_number in self._decode(start, end):
+                if frame_number != expected:
+                    msg = f"Unable to read frame {expected}"
+                    raise OSError(msg)
+                expected += 1
+                if (frame_number - start) % step:
+                    self.read_stats.frames_grabbed += 1
+                    continue
+                with self.profiler.stage("pixel format"):
+                    image = convert(frame)
+                self.read_stats.frames_decoded += 1
+                yield (image, frame_number)
+            if expected < end:
+                msg = f"Unable to read frame {expected}"
+                raise OSError(msg)
+        finally:
+            self.read_stats.seconds = time.perf_counter() - t_start
+
+    def get_frame(self, frame_number: int) -> cv2.typing.MatLike:
+        self._check_initialized()
+        if frame_number < 0 or frame_number >= self._properties["frame_count"]:
+            msg = f"Invalid frame number. Must be between 0 and {self._properties['frame_count'] - 1}"
+            raise ValueError(msg)
+        for frame, _ in self._read_frames(frame_number, frame_number + 1, 1, _to_bgr):
+            return frame
+        msg = f"Unable to read frame {frame_number}"
+        raise OSError(msg)
+
+    def _read_from(self, start: int) -> Generator[tuple[np.ndarray, int], None, None]:
+        return self._read_frames(start, self._properties["frame_count"], 1, _to_bgr)
+
+    def read_range(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        step: int = 1,
+        sequential: bool = True,  # noqa: ARG002
+    ) -> Generator[tuple[cv2.typing.MatLike, int], None, None]:
+        # frames are always decoded forward from the key frame before start
+        self._check_initialized()
+        end = self._validate_range(start, end, step)
+        yield from self._read_frames(start, end, step, _to_bgr)
+
+    def _read_scanlines(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        *,
+        scan_line_px: int,
+        band: int = 1,
+        step: int = 1,
+    ) -> Generator[tuple[np.ndarray, int], None, None]:
+        self._check_initialized()
+        end = self._validate_range(start, end, step)
+        if scan_line_px < 0 or scan_line_px + band > self._properties["height"]:
+            msg = f"Invalid scan line. Must be between 0 and {self._properties['height'] - band}"
+            raise ValueError(msg)
+        yield from self._read_frames(
+            start,
+            end,
+            step,
+            lambda frame: _rows_to_bgr(frame, scan_line_px, band),
+        )
+
+    def release(self) -> None:
+        super().release()
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+            self.stream = None
+
+
+def _to_bgr(frame: Any) -> np.ndarray:  # noqa: ANN401
+    return frame.to_ndarray(format="bgr24")
+
+
+def _plane_rows(plane: Any, start: int, end: int, width: int) -> np.ndarray:  # noqa: ANN401
+    rows = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)
+    return rows[start:end, :width]
+
+
+def _rows_to_bgr(frame: Any, y: int, rows: int) -> np.ndarray:  # noqa: ANN401
+    """Converts rows [y, y + rows) of a frame to BGR, without converting the others."""
+    if frame.format.name != "yuv420p" or frame.width % 2 or frame.height % 2:
+        # I420 conversion needs even dimensions, chroma is rounded up otherwise
+        return _to_bgr(frame)[y : y + rows]
+    # a chroma row covers two rows, so convert an even band of rows as I420
+    band_start = y - y % 2
+    band_end = min(y + rows + (y + rows) % 2, frame.height)
+    width = frame.width
+    i420 = np.concatenate(
+        [
+            _plane_rows(frame.planes[0], band_start, band_end, width).ravel(),
+            _plane_rows(
+                frame.planes[1], band_start // 2, band_end // 2, width // 2
+            ).ravel(),
+            _plane_rows(
+                frame.planes[2], band_start // 2, band_end // 2, width // 2
+            ).ravel(),
+        ]
+    ).reshape(-1, width)
+    bgr = cv2.cvtColor(i420, cv2.COLOR_YUV2BGR_I420)
+    return bgr[y - band_start : y - band_start + rows]
+
+
+def is_backend_available(backend: VideoBackend) -> bool:
+    if backend == VideoBackend.FFMPEG:
+        return FFmpegVideoCapture.is_available()
+    if backend == VideoBackend.PYAV:
+        return PyAVVideoCapture.is_available()
+    return True
+
+
+def create_video_capture(
+    video_path: str | Path,
+    backend: VideoBackend = VideoBackend.CV2,
+    scanline_cache: ScanlineCache | None = None,
+    profiler: Profiler = NULL_PROFILER,
+) -> VideoCapture:
+    if backend != VideoBackend.CV2 and is_stream(video_path):
+        typer.echo(f"Streams are read by the cv2 backend, not by {backend}", err=True)
+        backend = VideoBackend.CV2
+    if backend == VideoBackend.FFMPEG:
+        if FFmpegVideoCapture.is_available():
+            return FFmpegVideoCapture(video_path, scanline_cache, profiler=profiler)
+        typer.echo(
+            "ffmpeg not found on PATH, falling back to the cv2 backend", err=True
+        )
+    if backend == VideoBackend.PYAV:
+        if PyAVVideoCapture.is_available():
+            return PyAVVideoCapture(video_path, scanline_cache, profiler=profiler)
+        typer.echo("PyAV is not installed, falling back to the cv2 backend", err=True)
+    return VideoCapture(video_path, scanline_cache, profiler=profiler)
@@ -0,0 +1,62 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_video import (
+    SyntheticVideo,
+    SyntheticVideoConfig,
+    render_synthetic_video,
+)
+from piano_midi.key_press_detector import KeyPressDetector
+from piano_midi.models import KeyColors, KeySegments
+from piano_midi.video_capture import VideoCapture
+
+NUM_FRAMES = 12
+# notes and pauses of at least 4 frames, so sampling every 4th frame misses none
+SYNTHETIC_CONFIG = SyntheticVideoConfig(
+    width=640,
+    height=160,
+    num_frames=120,
+    note_density=0.1,
+    min_note_frames=4,
+    min_pause_frames=4,
+)
+
+
+@pytest.fixture
+def video_path(tmp_path: Path) -> Path:
+    """A 64x48 MJPG video of NUM_FRAMES gray frames that get brighter."""
+    path = tmp_path / "video.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter.fourcc(*"MJPG"), 30, (64, 48))
+    for n in range(NUM_FRAMES):
+        writer.write(np.full((48, 64, 3), n * 20, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture(scope="session")
+def synthetic_video(tmp_path_factory: pytest.TempPathFactory) -> SyntheticVideo:
+    """A synthetic video of SYNTHETIC_CONFIG with its key segments and colors."""
+    return render_synthetic_video(
+        SYNTHETIC_CONFIG, tmp_path_factory.mktemp("synthetic")
+    )
+
+
+@pytest.fixture
+def make_key_press_detector(
+    synthetic_video: SyntheticVideo,
+) -> Callable[..., KeyPressDetector]:
+    """Returns a factory of new detectors of the synthetic video."""
+
+    def make(*, unchanged_tolerance: int | None = 0) -> KeyPressDetector:
+        return KeyPressDetector(
+            video_capture=VideoCapture(synthetic_video.video_path),
+            key_segments=KeySegments.from_yaml(synthetic_video.key_segments_path),
+            key_colors=KeyColors.from_yaml(synthetic_video.colors_path),
+            unchanged_tolerance=unchanged_tolerance,
+        )
+
+    return make
@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+
+from benchmarks.synthetic_video import SyntheticVideo
+from piano_midi.batch import BatchJob, JobStatus, load_manifest, run_batch
+from piano_midi.defaults import VideoBackend
+from piano_midi.note_events import NoteEvents
+from tests.conftest import SYNTHETIC_CONFIG
+
+
+def test_load_manifest_resolves_paths_relative_to_manifest(tmp_path: Path) -> None:
+    manifest_path = tmp_path / "manifest.csv"
+    manifest_path.write_text(
+        "video_path,key_segments_path,colors_path,midi_path,frame_start,frame_end\n"
+        "a.mp4,keys.yaml,colors.yaml,out/a.mid,10,\n"
+    )
+
+    (job,) = load_manifest(manifest_path)
+
+    assert job.video_path == tmp_path / "a.mp4"
+    assert job.midi_path == tmp_path / "out" / "a.mid"
+    assert job.frame_start == 10  # noqa: PLR2004
+    assert job.frame_end is None
+
+
+def test_load_yaml_manifest(tmp_path: Path) -> None:
+    manifest_path = tmp_path / "manifest.yaml"
+    manifest_path.write_text(
+        "- video_path: /videos/a.mp4\n"
+        "  key_segments_path: keys.yaml\n"
+        "  colors_path: colors.yaml\n"
+        "  midi_path: a.mid\n"
+        "  frame_end: 100\n"
+    )
+
+    (job,) = load_manifest(manifest_path)
+
+    assert job.video_path == Path("/videos/a.mp4")
+    assert job.frame_end == 100  # noqa: PLR2004
+
+
+def test_job_is_up_to_date_when_midi_is_newer_than_inputs(tmp_path: Path) -> None:
+    for name in ["a.mp4", "keys.yaml", "colors.yaml"]:
+        (tmp_path / name).touch()
+    job = BatchJob(
+        video_path=tmp_path / "a.mp4",
+        key_segments_path=tmp_path / "keys.yaml",
+        colors_path=tmp_path / "colors.yaml",
+        midi_path=tmp_path / "a.mid",
+    )
+    assert not job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+
+    job.midi_path.touch()
+    job.digest_path.write_text(job.options_digest(VideoBackend.CV2, color_lut=True))
+    assert job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+
+    os.utime(job.colors_path, (job.midi_path.stat().st_mtime + 1,) * 2)
+    assert not job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+
+
+def test_job_is_stale_when_options_changed_or_events_are_missing(
+    tmp_path: Path,
+) -> None:
+    for name in ["a.mp4", "keys.yaml", "colors.yaml", "a.mid"]:
+        (tmp_path / name).touch()
+    job = BatchJob(
+        video_path=tmp_path / "a.mp4",
+        key_segments_path=tmp_path / "keys.yaml",
+        colors_path=tmp_path / "colors.yaml",
+        midi_path=tmp_path / "a.mid",
+    )
+    job.digest_path.write_text(job.options_digest(VideoBackend.CV2, color_lut=True))
+    assert job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+    assert not job.is_up_to_date(VideoBackend.FFMPEG, color_lut=True)
+
+    job.max_gap = 2
+    assert not job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+
+    job.max_gap = 0
+    job.events_path = tmp_path / "a.npz"
+    job.digest_path.write_text(job.options_digest(VideoBackend.CV2, color_lut=True))
+    assert not job.is_up_to_date(VideoBackend.CV2, color_lut=True)
+
+
+def test_run_batch_converts_skips_and_records_failures(
+    synthetic_video: SyntheticVideo, tmp_path: Path
+) -> None:
+    jobs = [
+        BatchJob(
+            video_path=video_path,
+            key_segments_path=synthetic_video.key_segments_path,
+            colors_path=synthetic_video.colors_path,
+            midi_path=tmp_path / f"{video_path.stem}.mid",
+        )
+        for video_path in [synthetic_video.video_path, tmp_path / "missing.avi"]
+    ]
+
+    summary = run_batch(jobs, workers=2, retries=1)
+    rerun = run_batch(jobs, workers=2, retries=0)
+
+    assert [result.status for result in summary.results] == [
+        JobStatus.CONVERTED,
+        JobStatus.FAILED,
+    ]
+    assert summary.results[0].frames == SYNTHETIC_CONFIG.num_frames - 1
+    assert summary.results[1].attempts == 2  # noqa: PLR2004
+    assert [result.status for result in rerun.results] == [
+        JobStatus.SKIPPED,
+        JobStatus.FAILED,
+    ]
+
+
+def test_run_batch_writes_note_events(
+    synthetic_video: SyntheticVideo, tmp_path: Path
+) -> None:
+    job = BatchJob(
+        video_path=synthetic_video.video_path,
+        key_segments_path=synthetic_video.key_segments_path,
+        colors_path=synthetic_video.colors_path,
+        midi_path=tmp_path / "out" / "video.mid",
+        events_path=tmp_path / "video.npz",
+        min_note_length=2,
+    )
+
+    summary = run_batch([job], workers=1)
+
+    (result,) = summary.results
+    assert result.status == JobStatus.CONVERTED
+    assert len(NoteEvents.load(tmp_path / "video.npz")) == result.events
+    assert not (tmp_path / "out" / "video.checkpoint.npz").exists()
+    assert summary.totals == str(summary).splitlines()[-1]
+
+    (tmp_path / "video.npz").unlink()
+    (rerun,) = run_batch([job], workers=1).results
+    assert rerun.status == JobStatus.CONVERTED
+    assert (tmp_path / "video.npz").exists()
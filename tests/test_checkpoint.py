@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from piano_midi.checkpoint import Checkpoint, Checkpointer, CheckpointMismatchError
+from piano_midi.key_sequence_writer import KeySequenceWriter
+
+
+def test_checkpoint_of_other_run_is_not_resumed(tmp_path: Path) -> None:
+    checkpointer = Checkpointer(tmp_path / "checkpoint.npz", "run", interval=1)
+    checkpointer.save(
+        Checkpoint(
+            frame_num=12,
+            pressed=np.zeros((2, 88), dtype=bool),
+            previous_line=None,
+            previous_pressed=np.zeros((2, 88), dtype=bool),
+            events=KeySequenceWriter(fps=30).event_columns(),
+        )
+    )
+
+    checkpoint = checkpointer.load()
+    assert checkpoint is not None
+    assert checkpoint.frame_num == 12  # noqa: PLR2004
+    assert checkpoint.previous_line is None
+    with pytest.raises(CheckpointMismatchError):
+        Checkpointer(checkpointer.path, "other run", interval=1).load()
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_video import SyntheticVideoConfig, render_synthetic_video
+from piano_midi.color_calibration import ColorCalibrationError, calibrate_colors
+from piano_midi.models import HSVRange, KeySegments
+from piano_midi.time_slicer import TimeSlicer
+from piano_midi.video_capture import VideoCapture
+
+
+def test_calibrated_colors_cover_the_hue_of_every_hand(tmp_path: Path) -> None:
+    config = SyntheticVideoConfig(width=640, height=160, num_frames=300)
+    video = render_synthetic_video(config, tmp_path)
+    time_slice = TimeSlicer(VideoCapture(video.video_path)).generate(
+        frame_start=0, frame_end=None, scan_line_px=config.scan_line_px
+    )
+
+    key_colors = calibrate_colors(
+        time_slice, KeySegments.from_yaml(video.key_segments_path)
+    )
+
+    for hsv_range, hue in [
+        (key_colors.left_white, config.left_white_hue),
+        (key_colors.right_white, config.right_white_hue),
+        (key_colors.left_black, config.left_black_hue),
+        (key_colors.right_black, config.right_black_hue),
+    ]:
+        assert isinstance(hsv_range, HSVRange)
+        assert hsv_range.h.min <= hue <= hsv_range.h.max
+    assert key_colors.confidence is not None
+    assert key_colors.confidence > 0.5  # noqa: PLR2004
+
+
+def test_calibration_fails_without_pressed_keys(tmp_path: Path) -> None:
+    config = SyntheticVideoConfig(width=640, height=160, num_frames=2, note_density=0)
+    video = render_synthetic_video(config, tmp_path)
+    time_slice = np.repeat(
+        TimeSlicer(VideoCapture(video.video_path)).generate(
+            frame_start=0, frame_end=None, scan_line_px=config.scan_line_px
+        ),
+        10,
+        axis=0,
+    )
+
+    with pytest.raises(ColorCalibrationError):
+        calibrate_colors(time_slice, KeySegments.from_yaml(video.key_segments_path))
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from piano_midi.color_lut import ColorLut
+from piano_midi.models import HSVRange, KeyColors, Range
+
+
+def hsv_range(hue_min: int, hue_max: int) -> HSVRange:
+    return HSVRange(
+        h=Range(min=hue_min, max=hue_max),
+        s=Range(min=100, max=255),
+        v=Range(min=100, max=255),
+    )
+
+
+def key_colors(hue: int) -> KeyColors:
+    # the white and black ranges of both hands overlap around hue
+    return KeyColors(
+        left_white=hsv_range(hue - 10, hue),
+        right_white=hsv_range(hue, hue + 10),
+        left_black=hsv_range(hue - 10, hue + 10),
+        right_black=hsv_range(hue + 20, hue + 30),
+    )
+
+
+def test_lookup_sets_bit_of_every_matching_range() -> None:
+    hues = np.array([[0, 55, 60, 65, 85, 120]], dtype=np.uint8)
+    line_hsv = np.stack([hues, np.full_like(hues, 200), np.full_like(hues, 200)], -1)
+    line = cv2.cvtColor(line_hsv, cv2.COLOR_HSV2BGR)
+
+    color_bits = ColorLut.build(key_colors(60)).lookup(line)
+
+    assert color_bits.tolist() == [[0b0000, 0b0101, 0b0111, 0b0110, 0b1000, 0b0000]]
+
+
+def test_load_or_build_rebuilds_table_for_other_colors(tmp_path: Path) -> None:
+    lut_path = tmp_path / "colors.lut.npz"
+
+    built = ColorLut.load_or_build(key_colors(60), lut_path)
+    loaded = ColorLut.load_or_build(key_colors(60), lut_path)
+    rebuilt = ColorLut.load_or_build(key_colors(90), lut_path)
+
+    assert built.build_seconds > 0
+    assert loaded.build_seconds == 0
+    assert np.array_equal(loaded.table, built.table)
+    assert rebuilt.build_seconds > 0
+    assert rebuilt.digest != built.digest
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+import pytest
+
+from piano_midi.color_lut import ColorLut
+from piano_midi.key_classifier import KeyClassifier
+from piano_midi.models import (
+    NUM_KEYS,
+    BlackKeyIndex,
+    HSVRange,
+    KeyColors,
+    KeySegment,
+    KeySegments,
+    Range,
+    WhiteKeyIndex,
+)
+
+WIDTH = 52 * 20
+
+
+def hsv_range(hue: int) -> HSVRange:
+    return HSVRange(
+        h=Range(min=hue - 5, max=hue + 5),
+        s=Range(min=100, max=255),
+        v=Range(min=100, max=255),
+    )
+
+
+@pytest.fixture
+def key_segments() -> KeySegments:
+    white = [KeySegment(start=n * 20 + 1, end=n * 20 + 19) for n in range(52)]
+    black = [KeySegment(start=n * 28 + 5, end=n * 28 + 15) for n in range(36)]
+    return KeySegments(white=white, black=black)
+
+
+@pytest.fixture
+def key_colors() -> KeyColors:
+    return KeyColors(
+        left_white=hsv_range(30),
+        right_white=hsv_range(60),
+        left_black=hsv_range(90),
+        right_black=hsv_range(120),
+    )
+
+
+def classify_per_segment(
+    line: np.ndarray, key_segments: KeySegments, key_colors: KeyColors
+) -> np.ndarray:
+    line_hsv = cv2.cvtColor(line, cv2.COLOR_BGR2HSV)
+    threshold = WIDTH // 256
+    expected = np.zeros((2, NUM_KEYS), dtype=bool)
+    for hand, (white_range, black_range) in enumerate(
+        [
+            (key_colors.left_white, key_colors.left_black),
+            (key_colors.right_white, key_colors.right_black),
+        ]
+    ):
+        assert white_range is not None
+        assert black_range is not None
+        white_mask = cv2.inRange(line_hsv, white_range.lower(), white_range.upper())
+        black_mask = cv2.inRange(line_hsv, black_range.lower(), black_range.upper())
+        for n, segment in enumerate(key_segments.white or []):
+            count = np.count_nonzero(white_mask[:, segment.start : segment.end])
+            expected[hand, WhiteKeyIndex(value=n).to_key_index().value] = (
+                count > threshold
+            )
+        for n, segment in enumerate(key_segments.black or []):
+            count = np.count_nonzero(black_mask[:, segment.start : segment.end])
+            expected[hand, BlackKeyIndex(value=n).to_key_index().value] = (
+                count > threshold
+            )
+    return expected
+
+
+def random_lines(num_lines: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    hues = rng.choice([0, 30, 60, 90, 120], size=(num_lines, WIDTH // 4)).repeat(
+        4, axis=1
+    )
+    lines_hsv = np.stack(
+        [hues, np.full_like(hues, 200), np.full_like(hues, 200)], axis=-1
+    ).astype(np.uint8)
+    return cv2.cvtColor(lines_hsv, cv2.COLOR_HSV2BGR)
+
+
+def test_classify_matches_per_segment_classification(
+    key_segments: KeySegments, key_colors: KeyColors
+) -> None:
+    line = random_lines(1)
+
+    classifier = KeyClassifier(key_segments, key_colors, WIDTH)
+
+    expected = classify_per_segment(line, key_segments, key_colors)
+    assert expected.any()
+    assert np.array_equal(classifier.classify(line), expected)
+
+
+def test_classify_empty_line_has_no_pressed_keys(
+    key_segments: KeySegments, key_colors: KeyColors
+) -> None:
+    line = np.zeros((1, WIDTH, 3), dtype=np.uint8)
+
+    classifier = KeyClassifier(key_segments, key_colors, WIDTH)
+
+    assert not classifier.classify(line).any()
+
+
+@pytest.mark.parametrize(("num_lines"), [1, 7, 32])
+def test_classify_block_matches_classify_per_line(
+    key_segments: KeySegments, key_colors: KeyColors, num_lines: int
+) -> None:
+    lines = random_lines(num_lines, seed=num_lines)
+
+    classifier = KeyClassifier(key_segments, key_colors, WIDTH)
+
+    pressed = classifier.classify_block(lines)
+    assert pressed.shape == (num_lines, 2, NUM_KEYS)
+    for n in range(num_lines):
+        assert np.array_equal(pressed[n], classifier.classify(lines[n : n + 1]))
+
+
+def test_classify_block_with_color_lut_matches_hsv_thresholds(
+    key_segments: KeySegments, key_colors: KeyColors
+) -> None:
+    lines = random_lines(16)
+    # noise in the saturation and value also hits the edges of the ranges
+    lines = cv2.add(
+        lines, np.random.default_rng(0).integers(0, 60, lines.shape, np.uint8)
+    )
+
+    classifier = KeyClassifier(key_segments, key_colors, WIDTH)
+    lut_classifier = KeyClassifier(
+        key_segments, key_colors, WIDTH, ColorLut.build(key_colors)
+    )
+
+    pressed = classifier.classify_block(lines)
+    assert pressed.any()
+    assert np.array_equal(lut_classifier.classify_block(lines), pressed)
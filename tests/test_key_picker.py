@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import numpy as np
+
+from piano_midi.key_picker import KeyPicker
+from piano_midi.models import HSVRange, Range
+
+ALL_COLORS = HSVRange(
+    h=Range(min=0, max=179), s=Range(min=0, max=255), v=Range(min=0, max=255)
+)
+
+
+def test_scanline_row_stays_inside_the_image(tmp_path: Path) -> None:
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    key_picker = KeyPicker(frame, tmp_path / "keys.yaml")
+
+    assert key_picker._scanline_row(0) == 0  # noqa: SLF001
+    assert key_picker._scanline_row(50) == 24  # noqa: SLF001, PLR2004
+    assert key_picker._scanline_row(100) == 47  # noqa: SLF001, PLR2004
+
+
+def test_segments_are_found_on_the_first_row(tmp_path: Path) -> None:
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, 10:20] = 255
+    frame[:, 30:40] = 255
+    key_picker = KeyPicker(frame, tmp_path / "keys.yaml")
+
+    segments = key_picker._scanline_segments(ALL_COLORS, key_picker._scanline_row(0))  # noqa: SLF001
+
+    assert len(segments) == 2  # noqa: PLR2004
@@ -0,0 +1,192 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from piano_midi import key_press_detector as key_press_detector_module
+from piano_midi.checkpoint import Checkpointer
+from piano_midi.key_press_detector import KeyPressDetector
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from piano_midi.piano_state import PianoChanges, PianoState
+from tests.conftest import SYNTHETIC_CONFIG
+
+CRASH_FRAME = 70
+
+MakeDetector = Callable[..., KeyPressDetector]
+
+
+class CrashingKeySequenceWriter(KeySequenceWriter):
+    def process_change(self, piano_changes: PianoChanges, frame_num: int) -> None:
+        if frame_num >= CRASH_FRAME:
+            msg = "Worker died"
+            raise RuntimeError(msg)
+        super().process_change(piano_changes, frame_num)
+
+
+def _detect(
+    key_press_detector: KeyPressDetector, sample_step: int = 1
+) -> list[tuple[PianoChanges, int]]:
+    return list(
+        key_press_detector.detect(
+            scan_line_px=SYNTHETIC_CONFIG.scan_line_px,
+            frame_start=0,
+            frame_end=None,
+            block_size=16,
+            sample_step=sample_step,
+        )
+    )
+
+
+def _run(
+    key_press_detector: KeyPressDetector,
+    key_sequence_writer: KeySequenceWriter | None = None,
+    *,
+    frame_start: int = 0,
+    frame_end: int | None = None,
+    block_size: int = 16,
+    workers: int = 1,
+    pipeline: bool = False,
+    checkpointer: Checkpointer | None = None,
+) -> dict[str, np.ndarray]:
+    if key_sequence_writer is None:
+        key_sequence_writer = KeySequenceWriter(
+            fps=SYNTHETIC_CONFIG.fps, verbosity=Verbosity.QUIET
+        )
+    key_press_detector.run(
+        key_sequence_writer=key_sequence_writer,
+        scan_line_px=SYNTHETIC_CONFIG.scan_line_px,
+        frame_start=frame_start,
+        frame_end=frame_end,
+        block_size=block_size,
+        workers=workers,
+        pipeline=pipeline,
+        checkpointer=checkpointer,
+    )
+    return key_sequence_writer.event_columns()
+
+
+@pytest.mark.parametrize("full_scan_share", [0.0, 1.0])
+def test_sampled_detection_matches_full_scan(
+    make_key_press_detector: MakeDetector,
+    monkeypatch: pytest.MonkeyPatch,
+    full_scan_share: float,
+) -> None:
+    monkeypatch.setattr(key_press_detector_module, "FULL_SCAN_SHARE", full_scan_share)
+    key_press_detector = make_key_press_detector()
+    full_scan = _detect(key_press_detector)
+    key_press_detector.piano_state = PianoState()
+
+    assert full_scan
+    assert _detect(key_press_detector, sample_step=4) == full_scan
+    stats = key_press_detector.sample_stats
+    assert stats.intervals > 0
+    if full_scan_share:
+        # every changed probe interval is scanned on its own
+        assert stats.full_scan_from is None
+        assert stats.frames_scanned < SYNTHETIC_CONFIG.num_frames
+    else:
+        # the first window changed, so every frame after the first probe is scanned
+        assert stats.full_scan_from == 1
+
+
+def test_unchanged_scanlines_are_not_classified(
+    make_key_press_detector: MakeDetector,
+) -> None:
+    classify_all = make_key_press_detector(unchanged_tolerance=None)
+    skip_unchanged = make_key_press_detector(unchanged_tolerance=0)
+
+    assert _detect(skip_unchanged) == _detect(classify_all)
+    assert classify_all.classify_stats.unchanged == 0
+    assert skip_unchanged.classify_stats.lines == classify_all.classify_stats.lines
+    assert skip_unchanged.classify_stats.unchanged > 0
+    assert skip_unchanged.classify_stats.unchanged < skip_unchanged.classify_stats.lines
+
+
+def test_gradual_changes_are_compared_with_the_last_classified_line(
+    make_key_press_detector: MakeDetector,
+) -> None:
+    key_press_detector = make_key_press_detector(unchanged_tolerance=2)
+    with key_press_detector.video_capture as cap:
+        line = cap.get_frame(0)[SYNTHETIC_CONFIG.scan_line_px] // 2
+    # every line is 1 brighter than the line before, so 3 lines apart is too much
+    ramp = np.stack([line + n for n in range(12)])
+
+    key_press_detector._classify_block(ramp)  # noqa: SLF001
+
+    assert key_press_detector.classify_stats.unchanged == 8  # noqa: PLR2004
+
+
+def test_parallel_and_pipelined_runs_match_a_sequential_run(
+    make_key_press_detector: MakeDetector,
+) -> None:
+    sequential = _run(make_key_press_detector())
+
+    assert len(sequential["frame"]) > 0
+    for events in [
+        _run(make_key_press_detector(), workers=3),
+        _run(make_key_press_detector(), pipeline=True),
+    ]:
+        for column, values in sequential.items():
+            assert np.array_equal(events[column], values)
+
+
+def test_resumed_run_writes_the_same_events(
+    make_key_press_detector: MakeDetector, tmp_path: Path
+) -> None:
+    def run(key_sequence_writer: KeySequenceWriter, checkpointer: Checkpointer) -> None:
+        key_press_detector = make_key_press_detector()
+        frame_start = 0
+        checkpoint = checkpointer.load()
+        if checkpoint is not None:
+            key_press_detector.restore(checkpoint, key_sequence_writer)
+            frame_start = checkpoint.frame_num + 1
+        _run(
+            key_press_detector,
+            key_sequence_writer,
+            frame_start=frame_start,
+            block_size=8,
+            checkpointer=checkpointer,
+        )
+
+    uninterrupted = KeySequenceWriter(
+        fps=SYNTHETIC_CONFIG.fps, verbosity=Verbosity.QUIET
+    )
+    run(uninterrupted, Checkpointer(tmp_path / "uninterrupted.npz", "run", 0))
+
+    checkpointer = Checkpointer(tmp_path / "checkpoint.npz", "run", interval=16)
+    with pytest.raises(RuntimeError):
+        run(
+            CrashingKeySequenceWriter(
+                fps=SYNTHETIC_CONFIG.fps, verbosity=Verbosity.QUIET
+            ),
+            checkpointer,
+        )
+    assert checkpointer.num_saved > 0
+    resumed = KeySequenceWriter(fps=SYNTHETIC_CONFIG.fps, verbosity=Verbosity.QUIET)
+    run(resumed, Checkpointer(tmp_path / "checkpoint.npz", "run", interval=16))
+
+    assert uninterrupted.num_events > 0
+    for column, values in uninterrupted.event_columns().items():
+        assert np.array_equal(resumed.event_columns()[column], values)
+
+
+@pytest.mark.parametrize(("frame_start", "frame_end"), [(10, 10), (100, 50)])
+def test_parallel_run_of_an_empty_range_detects_nothing(
+    make_key_press_detector: MakeDetector, frame_start: int, frame_end: int
+) -> None:
+    events = _run(
+        make_key_press_detector(),
+        frame_start=frame_start,
+        frame_end=frame_end,
+        workers=2,
+    )
+
+    assert len(events["frame"]) == 0
+
+
+def test_parallel_run_rejects_an_unchanged_tolerance(
+    make_key_press_detector: MakeDetector,
+) -> None:
+    with pytest.raises(ValueError, match="tolerance"):
+        _run(make_key_press_detector(unchanged_tolerance=2), workers=2)
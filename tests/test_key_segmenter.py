@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_video import SyntheticVideoConfig, render_synthetic_video
+from piano_midi.key_segmenter import (
+    KeySegmentsNotFoundError,
+    scanline_segments,
+    search_key_segments,
+)
+from piano_midi.models import KeySegment, KeySegments
+from piano_midi.video_capture import VideoCapture
+
+
+def test_scanline_segments_drop_short_runs() -> None:
+    mask = np.zeros(40, dtype=bool)
+    mask[0:5] = True
+    mask[10:12] = True
+    mask[20:40] = True
+
+    assert scanline_segments(mask, min_length=2) == [
+        KeySegment(start=0, end=4),
+        KeySegment(start=20, end=39),
+    ]
+
+
+def test_search_finds_the_segments_of_a_keyboard(tmp_path: Path) -> None:
+    config = SyntheticVideoConfig(width=1280, height=160, num_frames=2, note_density=0)
+    video = render_synthetic_video(config, tmp_path)
+    with VideoCapture(video.video_path) as cap:
+        frame = cap.get_frame(frame_number=0)
+
+    key_segments = search_key_segments(frame).key_segments()
+
+    expected = KeySegments.from_yaml(video.key_segments_path)
+    for found, segments in [
+        (key_segments.white, expected.white),
+        (key_segments.black, expected.black),
+    ]:
+        assert found is not None
+        assert segments is not None
+        for segment, expected_segment in zip(found, segments, strict=True):
+            assert abs(segment.start - expected_segment.start) <= 1
+            assert abs(segment.end - expected_segment.end) <= 1
+
+
+def test_search_fails_without_a_keyboard() -> None:
+    frame = np.zeros((40, 640, 3), dtype=np.uint8)
+
+    with pytest.raises(KeySegmentsNotFoundError):
+        search_key_segments(frame)
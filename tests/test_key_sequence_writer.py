@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import mido
+import pytest
+
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from piano_midi.models import Hand
+from piano_midi.piano_state import PianoChanges, PianoPress
+
+
+def changes(
+    pressed: list[int] | None = None, released: list[int] | None = None
+) -> PianoChanges:
+    return PianoChanges(
+        pressed={PianoPress(index=n, hand=Hand.LEFT) for n in pressed or []},
+        released={PianoPress(index=n, hand=Hand.LEFT) for n in released or []},
+    )
+
+
+@pytest.fixture
+def writer() -> KeySequenceWriter:
+    writer = KeySequenceWriter(fps=30, verbosity=Verbosity.QUIET)
+    writer.process_change(changes(pressed=[5, 3]), 10)
+    writer.process_change(changes(pressed=[7], released=[3]), 13)
+    writer.process_change(changes(released=[5, 7]), 14)
+    return writer
+
+
+def test_save_writes_messages_with_delta_times(
+    writer: KeySequenceWriter, tmp_path: Path
+) -> None:
+    midi_path = tmp_path / "out.mid"
+
+    writer.save(midi_path)
+
+    messages = [
+        (message.type, message.note, message.time)
+        for message in mido.MidiFile(midi_path).tracks[0]
+        if not message.is_meta
+    ]
+    assert messages == [
+        ("note_on", 24, 333),
+        ("note_on", 26, 0),
+        ("note_on", 28, 100),
+        ("note_off", 24, 0),
+        ("note_off", 26, 33),
+        ("note_off", 28, 0),
+    ]
+
+
+def test_process_change_does_not_print_by_default(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    writer = KeySequenceWriter(fps=30)
+
+    writer.process_change(changes(pressed=[5]), 10)
+
+    assert capsys.readouterr().out == ""
+    assert writer.num_events == 1
+
+
+def test_save_event_log_writes_every_event(
+    writer: KeySequenceWriter, tmp_path: Path
+) -> None:
+    event_log_path = tmp_path / "events.csv"
+
+    writer.save_event_log(event_log_path)
+
+    lines = event_log_path.read_text().splitlines()
+    assert lines[0] == "frame,time,key,note,hand,event"
+    assert lines[1:4] == [
+        "10,0.333,3,C1,left,on",
+        "10,0.333,5,D1,left,on",
+        "13,0.433,7,E1,left,on",
+    ]
+    assert len(lines) == 7  # noqa: PLR2004
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import typer
+
+from main import _check_video_to_midi_options
+
+HEAVY_MODULES = ["cv2", "numpy", "mido", "yaml"]
+
+
+def test_command_line_starts_without_heavy_imports() -> None:
+    # a fresh interpreter, as this one already imported everything
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, main; print(' '.join(sorted(sys.modules)))",
+        ],
+        cwd=Path(__file__).parents[1],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    imported = set(result.stdout.split())
+    assert not imported.intersection(HEAVY_MODULES)
+
+
+def test_stream_can_not_be_resumed() -> None:
+    with pytest.raises(typer.BadParameter):
+        _check_video_to_midi_options(
+            pipeline=False,
+            workers=1,
+            sample_step=1,
+            resume=True,
+            stream=True,
+            unchanged_tolerance=0,
+        )
+
+
+def test_workers_can_not_skip_lines_with_a_tolerance() -> None:
+    with pytest.raises(typer.BadParameter):
+        _check_video_to_midi_options(
+            pipeline=False,
+            workers=2,
+            sample_step=1,
+            resume=False,
+            stream=False,
+            unchanged_tolerance=2,
+        )
@@ -0,0 +1,77 @@
+import numpy as np
+
+from piano_midi.models import Hand
+from piano_midi.note_cleanup import clean_up
+from piano_midi.note_events import NoteEvents
+
+LEFT, RIGHT = Hand.LEFT.value, Hand.RIGHT.value
+
+
+def note_events(events: list[tuple[int, int, int, bool]]) -> NoteEvents:
+    frame, key, hand, note_on = zip(*events, strict=True)
+    return NoteEvents(
+        frame=np.array(frame),
+        key=np.array(key),
+        hand=np.array(hand),
+        note_on=np.array(note_on),
+        fps=30,
+    )
+
+
+def as_list(events: NoteEvents) -> list[tuple[int, int, int, bool]]:
+    return list(
+        zip(
+            events.frame.tolist(),
+            events.key.tolist(),
+            events.hand.tolist(),
+            events.note_on.tolist(),
+            strict=True,
+        )
+    )
+
+
+EVENTS = [
+    (10, 5, LEFT, True),
+    (11, 5, LEFT, False),  # a flicker of a single frame
+    (20, 7, RIGHT, True),
+    (20, 7, LEFT, True),
+    (30, 7, RIGHT, False),
+    (31, 7, RIGHT, True),  # released for a single frame
+    (33, 7, LEFT, False),
+    (40, 7, RIGHT, False),
+    (50, 9, LEFT, True),  # still pressed at the end
+]
+
+
+def test_clean_up_keeps_everything_by_default() -> None:
+    cleaned, stats = clean_up(note_events(EVENTS))
+
+    assert as_list(cleaned) == EVENTS
+    assert stats.merged_gaps == stats.short_notes == 0
+
+
+def test_clean_up_merges_gaps_and_removes_short_notes() -> None:
+    cleaned, stats = clean_up(note_events(EVENTS), min_note_frames=2, max_gap_frames=1)
+
+    assert as_list(cleaned) == [
+        (20, 7, RIGHT, True),
+        (20, 7, LEFT, True),
+        (33, 7, LEFT, False),
+        (40, 7, RIGHT, False),
+        (50, 9, LEFT, True),
+    ]
+    assert stats.merged_gaps == 1
+    assert stats.short_notes == 1
+
+
+def test_merged_notes_are_not_removed_as_short() -> None:
+    events = [
+        (0, 3, LEFT, True),
+        (1, 3, LEFT, False),
+        (2, 3, LEFT, True),
+        (3, 3, LEFT, False),
+    ]
+
+    cleaned, _ = clean_up(note_events(events), min_note_frames=3, max_gap_frames=1)
+
+    assert as_list(cleaned) == [(0, 3, LEFT, True), (3, 3, LEFT, False)]
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import mido
+import numpy as np
+
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from piano_midi.models import Hand
+from piano_midi.note_events import NoteEvents
+from piano_midi.piano_state import PianoChanges, PianoPress
+
+
+def press(index: int, hand: Hand) -> PianoPress:
+    return PianoPress(index=index, hand=hand)
+
+
+def note_events() -> NoteEvents:
+    writer = KeySequenceWriter(fps=30, verbosity=Verbosity.QUIET)
+    writer.process_change(
+        PianoChanges(
+            pressed={press(5, Hand.LEFT), press(40, Hand.RIGHT)}, released=set()
+        ),
+        15,
+    )
+    writer.process_change(
+        PianoChanges(pressed=set(), released={press(5, Hand.LEFT)}), 30
+    )
+    writer.process_change(
+        PianoChanges(pressed=set(), released={press(40, Hand.RIGHT)}), 45
+    )
+    return writer.note_events()
+
+
+def test_note_events_survive_a_round_trip(tmp_path: Path) -> None:
+    events = note_events()
+
+    events.save(tmp_path / "events.npz")
+    loaded = NoteEvents.load(tmp_path / "events.npz")
+
+    assert loaded.fps == events.fps
+    for column in ["frame", "key", "hand", "note_on"]:
+        assert np.array_equal(getattr(loaded, column), getattr(events, column))
+
+
+def test_render_splits_hands_into_tracks() -> None:
+    midi_file = note_events().render(split_hands=True, ticks_per_beat=96, bpm=60)
+
+    tracks = [
+        [
+            (message.type, message.note, message.time)
+            for message in track
+            if not message.is_meta
+        ]
+        for track in midi_file.tracks
+    ]
+    # at 60 bpm a beat lasts a second, which is 30 frames
+    assert tracks == [
+        [("note_on", 26, 48), ("note_off", 26, 48)],
+        [("note_on", 61, 48), ("note_off", 61, 96)],
+    ]
+    assert [track.name for track in midi_file.tracks] == ["left hand", "right hand"]
+    assert midi_file.length == 1.5  # noqa: PLR2004
+    assert mido.bpm2tempo(60) in [
+        message.tempo for message in midi_file.tracks[0] if message.type == "set_tempo"
+    ]
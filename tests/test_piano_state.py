@@ -1,9 +1,10 @@
 import copy
 
+import numpy as np
 import pytest
 
 from piano_midi.models import Hand
-from piano_midi.piano_state import PianoState
+from piano_midi.piano_state import PianoPress, PianoState
 
 
 @pytest.mark.parametrize(("num_keys_pressed"), [1])
@@ -69,3 +70,34 @@ def test_white_key_pressed_again_makes_no_difference() -> None:
     changes = piano_next_state.detect_changes(piano_state)
     assert len(changes.released) == 0
     assert len(changes.pressed) == 0
+
+
+def test_same_key_pressed_by_both_hands_is_tracked_per_hand() -> None:
+    piano_state = PianoState()
+
+    piano_next_state = PianoState()
+    piano_next_state.set_black_key(0, is_pressed=True, hand=Hand.LEFT)
+    piano_next_state.set_black_key(0, is_pressed=True, hand=Hand.RIGHT)
+
+    changes = piano_next_state.detect_changes(piano_state)
+    assert changes.pressed == {
+        PianoPress(index=1, hand=Hand.LEFT),
+        PianoPress(index=1, hand=Hand.RIGHT),
+    }
+
+
+def test_state_from_pressed_matrix_equals_state_from_keys() -> None:
+    piano_state = PianoState()
+    piano_state.set_white_key(1, is_pressed=True, hand=Hand.RIGHT)
+
+    pressed = np.zeros((2, 88), dtype=bool)
+    pressed[Hand.RIGHT.value, 2] = True
+
+    assert PianoState.from_pressed(pressed) == piano_state
+    assert PianoState() != piano_state
+
+
+@pytest.mark.parametrize(("white_key_idx"), [-1, 52])
+def test_invalid_white_key_raises(white_key_idx: int) -> None:
+    with pytest.raises(ValueError):
+        PianoState().set_white_key(white_key_idx, is_pressed=True, hand=Hand.LEFT)
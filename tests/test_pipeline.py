@@ -0,0 +1,35 @@
+from collections.abc import Generator
+
+import pytest
+
+from piano_midi.pipeline import run_pipeline
+
+
+def test_pipeline_keeps_order_of_items() -> None:
+    results: list[int] = []
+
+    stats = run_pipeline(iter(range(100)), lambda n: n * 2, results.append)
+
+    assert results == [n * 2 for n in range(100)]
+    assert [stage.items for stage in stats.stages] == [100, 100, 100]
+
+
+def test_pipeline_raises_error_of_stage_and_closes_source() -> None:
+    closed = False
+
+    def source() -> Generator[int, None, None]:
+        nonlocal closed
+        try:
+            yield from range(1000)
+        finally:
+            closed = True
+
+    def transform(n: int) -> int:
+        if n == 10:  # noqa: PLR2004
+            msg = "transform failed"
+            raise ValueError(msg)
+        return n
+
+    with pytest.raises(ValueError, match="transform failed"):
+        run_pipeline(source(), transform, lambda _: None, queue_size=1)
+    assert closed
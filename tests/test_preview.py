@@ -0,0 +1,22 @@
+import numpy as np
+
+from piano_midi.preview import Preview
+
+
+def test_preview_subsamples_long_time_slices_per_axis() -> None:
+    time_slice = np.zeros((5000, 640, 3), dtype=np.uint8)
+
+    preview = Preview(time_slice, max_width=1920, max_height=1000)
+
+    assert preview.image.shape == (625, 640, 3)
+    assert preview.to_image(10, 100) == (10, 800)
+    assert preview.to_preview(10, 800) == (10, 100)
+
+
+def test_preview_keeps_the_colors_of_the_image() -> None:
+    image = np.random.default_rng(0).integers(0, 256, (400, 400, 3), dtype=np.uint8)
+
+    preview = Preview(image, max_width=100, max_height=100)
+
+    assert preview.image.shape == (100, 100, 3)
+    assert np.array_equal(preview.image[3, 7], image[12, 28])
@@ -0,0 +1,50 @@
+import pstats
+from pathlib import Path
+
+from piano_midi.profiler import NULL_PROFILER, CProfileHook, Profiler, StageProfile
+
+
+def test_stage_accumulates_calls_and_time() -> None:
+    profiler = Profiler()
+
+    for _ in range(3):
+        with profiler.stage("decode"):
+            sum(range(1000))
+    profiler.count("frames", 3)
+
+    report = profiler.report("video-to-midi")
+    assert report.stages["decode"].calls == 3  # noqa: PLR2004
+    assert report.stages["decode"].wall_seconds > 0
+    assert report.counters == {"frames": 3}
+    assert report.peak_rss_mb > 0
+
+
+def test_null_profiler_records_nothing() -> None:
+    with NULL_PROFILER.stage("decode"), NULL_PROFILER.hot_loop():
+        NULL_PROFILER.count("frames")
+
+    assert NULL_PROFILER.stages == {}
+    assert NULL_PROFILER.counters == {}
+
+
+def test_merge_adds_stages_and_counters() -> None:
+    profiler = Profiler()
+    profiler.count("frames", 2)
+
+    profiler.merge(
+        {"decode": StageProfile(calls=2, wall_seconds=1.0, cpu_seconds=0.5)},
+        {"frames": 3},
+    )
+
+    assert profiler.stages["decode"].calls == 2  # noqa: PLR2004
+    assert profiler.counters == {"frames": 5}
+
+
+def test_cprofile_hook_profiles_hot_loop(tmp_path: Path) -> None:
+    stats_path = tmp_path / "hot_loop.prof"
+    profiler = Profiler(hot_loop_hooks=[CProfileHook(stats_path)])
+
+    with profiler.hot_loop():
+        sorted(range(1000), key=lambda n: -n)
+
+    assert pstats.Stats(str(stats_path)).get_stats_profile().func_profiles
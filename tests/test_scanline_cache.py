@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from piano_midi.scanline_cache import ScanlineCache
+from piano_midi.video_capture import VideoCapture
+
+
+def test_cached_scanlines_match_decoded_scanlines(
+    video_path: Path, tmp_path: Path
+) -> None:
+    cache = ScanlineCache(tmp_path / "cache")
+    with VideoCapture(video_path) as cap:
+        expected = [
+            (line.copy(), n) for line, n in cap.read_scanlines(0, 11, scan_line_px=7)
+        ]
+    with VideoCapture(video_path, cache) as cap:
+        stored = [
+            (line.copy(), n) for line, n in cap.read_scanlines(0, 11, scan_line_px=7)
+        ]
+        assert cap.read_stats.frames_cached == 0
+    with VideoCapture(video_path, cache) as cap:
+        cached = [
+            (line.copy(), n) for line, n in cap.read_scanlines(2, 9, scan_line_px=7)
+        ]
+        stats = cap.read_stats
+
+    assert stats.frames_decoded == 0
+    assert stats.frames_cached == 7  # noqa: PLR2004
+    assert [n for _, n in cached] == list(range(2, 9))
+    for (expected_line, _), (stored_line, _) in zip(expected, stored, strict=True):
+        assert np.array_equal(expected_line, stored_line)
+    for (expected_line, _), (cached_line, _) in zip(expected[2:9], cached, strict=True):
+        assert np.array_equal(expected_line, cached_line)
+
+
+def test_cache_misses_other_scan_line(video_path: Path, tmp_path: Path) -> None:
+    cache = ScanlineCache(tmp_path / "cache")
+    with VideoCapture(video_path, cache) as cap:
+        list(cap.read_scanlines(0, 11, scan_line_px=7))
+
+    assert cache.find(video_path, 7, 1, 0, 11) is not None
+    assert cache.find(video_path, 8, 1, 0, 11) is None
+    assert cache.find(video_path, 7, 1, 0, 12) is None
+
+
+def test_unstored_scanlines_are_not_cached(video_path: Path, tmp_path: Path) -> None:
+    cache = ScanlineCache(tmp_path / "cache")
+    with VideoCapture(video_path, cache) as cap:
+        list(cap.read_scanlines(0, 11, scan_line_px=7, store=False))
+        list(cap.read_scanlines(3, 6, scan_line_px=7, step=2))
+
+    assert cache.entries() == []
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path: Path) -> None:
+    cache = ScanlineCache(tmp_path, max_bytes=2500)
+    names = [f"{n:032x}_7_1_0_1000.npy" for n in range(3)]
+    for n, name in enumerate(names):
+        path = tmp_path / name
+        np.save(path, np.zeros(1000, dtype=np.uint8))
+        os.utime(path, (n, n))
+
+    cache.evict()
+
+    assert sorted(path.name for path in tmp_path.glob("*.npy")) == names[1:]
+
+
+def test_evict_keeps_files_that_are_not_cache_entries(tmp_path: Path) -> None:
+    cache = ScanlineCache(tmp_path, max_bytes=0)
+    np.save(tmp_path / "data.npy", np.zeros(1000, dtype=np.uint8))
+    np.save(tmp_path / f"{0:032x}_7_1_0_1000.npy", np.zeros(1000, dtype=np.uint8))
+
+    cache.evict()
+
+    assert [path.name for path in tmp_path.glob("*.npy")] == ["data.npy"]
@@ -0,0 +1,33 @@
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.accuracy import compare_notes, midi_notes
+from benchmarks.synthetic_video import SyntheticVideo
+from piano_midi.key_press_detector import KeyPressDetector
+from piano_midi.key_sequence_writer import KeySequenceWriter, Verbosity
+from tests.conftest import SYNTHETIC_CONFIG
+
+
+def test_detected_notes_match_ground_truth(
+    synthetic_video: SyntheticVideo,
+    make_key_press_detector: Callable[..., KeyPressDetector],
+    tmp_path: Path,
+) -> None:
+    key_sequence_writer = KeySequenceWriter(
+        fps=SYNTHETIC_CONFIG.fps, verbosity=Verbosity.QUIET
+    )
+
+    make_key_press_detector().run(
+        key_sequence_writer=key_sequence_writer,
+        scan_line_px=SYNTHETIC_CONFIG.scan_line_px,
+        frame_start=0,
+        frame_end=None,
+    )
+    key_sequence_writer.save(tmp_path / "synthetic.mid")
+
+    accuracy = compare_notes(
+        synthetic_video.notes,
+        midi_notes(tmp_path / "synthetic.mid", SYNTHETIC_CONFIG.fps),
+    )
+    assert accuracy.expected > 0
+    assert accuracy.f1 == 1.0
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic_video import SyntheticVideoConfig, render_synthetic_video
+from piano_midi.time_slicer import TimeSlicer
+from piano_midi.video_capture import VideoCapture
+
+
+def test_max_rows_raises_the_stride(tmp_path: Path) -> None:
+    config = SyntheticVideoConfig(width=320, height=160, num_frames=41)
+    video = render_synthetic_video(config, tmp_path)
+    time_slicer = TimeSlicer(VideoCapture(video.video_path))
+
+    full = time_slicer.generate(frame_start=0, frame_end=None, scan_line_px=100)
+    bounded = time_slicer.generate(
+        frame_start=0, frame_end=None, scan_line_px=100, max_rows=10
+    )
+
+    assert full.shape == (40, 320, 3)
+    assert bounded.shape == (10, 320, 3)
+    assert np.array_equal(bounded, full[::4])
+
+
+def test_time_slice_can_be_memory_mapped(tmp_path: Path) -> None:
+    config = SyntheticVideoConfig(width=320, height=160, num_frames=11)
+    video = render_synthetic_video(config, tmp_path)
+    memmap_path = tmp_path / "time_slice.npy"
+
+    time_slice = TimeSlicer(VideoCapture(video.video_path)).generate(
+        frame_start=0, frame_end=None, scan_line_px=100, memmap_path=memmap_path
+    )
+
+    assert isinstance(time_slice, np.memmap)
+    assert np.array_equal(np.load(memmap_path), time_slice)
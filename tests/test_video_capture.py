@@ -0,0 +1,181 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from piano_midi.video_capture import (
+    FFmpegVideoCapture,
+    PyAVVideoCapture,
+    VideoCapture,
+    _ForwardVideoCapture,
+    _rows_to_bgr,
+)
+from tests.conftest import NUM_FRAMES
+
+
+def test_sequential_read_matches_seeking_read(video_path: Path) -> None:
+    with VideoCapture(video_path) as cap:
+        seeking = [
+            (frame.copy(), n) for frame, n in cap.read_range(2, 10, sequential=False)
+        ]
+        sequential = [(frame.copy(), n) for frame, n in cap.read_range(2, 10)]
+
+    assert [n for _, n in sequential] == list(range(2, 10))
+    for (expected, _), (actual, _) in zip(seeking, sequential, strict=True):
+        assert np.array_equal(expected, actual)
+
+
+def test_sequential_read_grabs_skipped_frames(video_path: Path) -> None:
+    with VideoCapture(video_path) as cap:
+        frame_numbers = [n for _, n in cap.read_range(1, 10, step=3)]
+        stats = cap.read_stats
+
+    assert frame_numbers == [1, 4, 7]
+    assert stats.frames_decoded == 3  # noqa: PLR2004
+    assert stats.frames_grabbed == 6  # noqa: PLR2004
+
+
+@pytest.mark.skipif(
+    not FFmpegVideoCapture.is_available(), reason="ffmpeg is not installed"
+)
+def test_ffmpeg_scanlines_match_cv2_scanlines(video_path: Path) -> None:
+    with VideoCapture(video_path) as cap:
+        expected = [
+            (line.copy(), n)
+            for line, n in cap.read_scanlines(3, 11, scan_line_px=7, step=2)
+        ]
+    with FFmpegVideoCapture(video_path) as cap:
+        actual = [
+            (line.copy(), n)
+            for line, n in cap.read_scanlines(3, 11, scan_line_px=7, step=2)
+        ]
+
+    assert [n for _, n in actual] == [n for _, n in expected]
+    for (expected_line, _), (actual_line, _) in zip(expected, actual, strict=True):
+        assert actual_line.shape == (1, 64, 3)
+        # both decoders convert to BGR slightly differently
+        assert np.abs(expected_line.astype(int) - actual_line).max() < 8  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("backend", [FFmpegVideoCapture, PyAVVideoCapture])
+def test_backend_reads_from_the_frame_that_was_set(
+    video_path: Path, backend: type[FFmpegVideoCapture | PyAVVideoCapture]
+) -> None:
+    if not backend.is_available():
+        pytest.skip(f"{backend.__name__} is not available")
+    with VideoCapture(video_path) as cap:
+        cap.set_frame(9)
+        expected = [cap.read()[1] for _ in range(3)]
+    with backend(video_path) as cap:
+        cap.set_frame(9)
+        actual = [cap.read() for _ in range(4)]
+
+    assert [ret for ret, _ in actual] == [True, True, True, False]
+    for expected_frame, (_, actual_frame) in zip(expected, actual, strict=False):
+        assert np.abs(expected_frame.astype(int) - actual_frame).max() < 8  # noqa: PLR2004
+
+
+@pytest.mark.skipif(not PyAVVideoCapture.is_available(), reason="PyAV is not installed")
+def test_pyav_scanlines_match_cv2_scanlines(video_path: Path) -> None:
+    with VideoCapture(video_path) as cap:
+        expected = [
+            (line.copy(), n)
+            for line, n in cap.read_scanlines(3, 11, scan_line_px=7, step=2)
+        ]
+    with PyAVVideoCapture(video_path) as cap:
+        actual = [
+            (line.copy(), n)
+            for line, n in cap.read_scanlines(3, 11, scan_line_px=7, step=2)
+        ]
+        stats = cap.read_stats
+
+    assert [n for _, n in actual] == [n for _, n in expected]
+    assert stats.frames_grabbed == 4  # noqa: PLR2004
+    for (expected_line, _), (actual_line, _) in zip(expected, actual, strict=True):
+        assert actual_line.shape == (1, 64, 3)
+        assert np.abs(expected_line.astype(int) - actual_line).max() < 8  # noqa: PLR2004
+
+
+@pytest.mark.skipif(not PyAVVideoCapture.is_available(), reason="PyAV is not installed")
+def test_yuv420p_rows_match_a_full_conversion() -> None:
+    av = pytest.importorskip("av")
+    image = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    frame = av.VideoFrame.from_ndarray(image, format="bgr24").reformat(format="yuv420p")
+    expected = cv2.cvtColor(frame.to_ndarray(), cv2.COLOR_YUV2BGR_I420)
+
+    for y, rows in [(0, 1), (7, 1), (10, 3), (47, 1)]:
+        assert np.array_equal(_rows_to_bgr(frame, y, rows), expected[y : y + rows])
+
+
+@pytest.mark.skipif(not PyAVVideoCapture.is_available(), reason="PyAV is not installed")
+def test_rows_of_odd_width_yuv420p_match_a_full_conversion() -> None:
+    av = pytest.importorskip("av")
+    image = np.random.default_rng(0).integers(0, 256, (47, 63, 3), dtype=np.uint8)
+    frame = av.VideoFrame.from_ndarray(image, format="bgr24").reformat(format="yuv420p")
+    expected = frame.to_ndarray(format="bgr24")
+
+    for y, rows in [(0, 1), (10, 3), (46, 1)]:
+        assert np.array_equal(_rows_to_bgr(frame, y, rows), expected[y : y + rows])
+
+
+def test_named_pipe_is_read_until_it_ends(video_path: Path, tmp_path: Path) -> None:
+    fifo_path = tmp_path / "video.fifo"
+    os.mkfifo(fifo_path)
+
+    def write() -> None:
+        with video_path.open("rb") as video, fifo_path.open("wb") as fifo:
+            shutil.copyfileobj(video, fifo)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with VideoCapture(video_path) as cap:
+        expected = [(line.copy(), n) for line, n in cap.read_scanlines(scan_line_px=7)]
+    with VideoCapture(fifo_path) as cap:
+        assert cap.frame_count is None
+        actual = [
+            (line.copy(), n)
+            for line, n in cap.read_scanlines(2, None, scan_line_px=7, step=3)
+        ]
+        with pytest.raises(ValueError):
+            next(cap.read_range(0, None))
+        cap.release()
+    writer.join()
+
+    # the stream is read to its end, the file to the frame before its frame count
+    assert [n for _, n in actual] == [2, 5, 8, 11]
+    for (expected_line, _), (actual_line, _) in zip(
+        expected[2::3], actual, strict=False
+    ):
+        assert np.array_equal(expected_line, actual_line)
+
+
+def test_standard_input_is_read_as_a_stream(video_path: Path) -> None:
+    script = (
+        "from piano_midi.video_capture import VideoCapture\n"
+        "with VideoCapture('-') as cap:\n"
+        "    print(sum(1 for _ in cap.read_range()))\n"
+    )
+    with video_path.open("rb") as video:
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script],
+            stdin=video,
+            cwd=Path(__file__).parents[1],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    assert int(result.stdout) == NUM_FRAMES
+
+
+def test_forward_backend_can_not_be_created_without_a_decoder(
+    video_path: Path,
+) -> None:
+    with pytest.raises(TypeError):
+        _ForwardVideoCapture(video_path)  # type: ignore[abstract]